@@ -1,5 +1,13 @@
 from fastapi import APIRouter, Security
-from app.api.api_v1.endpoints import company, developer, job, user, waitlist, contact
+from app.api.api_v1.endpoints import (
+    company,
+    developer,
+    job,
+    user,
+    waitlist,
+    contact,
+    stats,
+)
 from app.api.deps import get_current_user
 
 api_router = APIRouter()
@@ -24,3 +32,9 @@ api_router.include_router(
 )
 api_router.include_router(waitlist.router, prefix="/waitlist", tags=["waitlist"])
 api_router.include_router(contact.router, prefix="/contact", tags=["contact"])
+api_router.include_router(
+    stats.router,
+    prefix="/stats",
+    tags=["stats"],
+    dependencies=[Security(get_current_user)],
+)
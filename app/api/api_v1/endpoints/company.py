@@ -5,16 +5,36 @@ This module contains the routes for handling operations related to companies.
 
 
 """
-from fastapi import APIRouter, HTTPException, Body
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Body, Request
+from typing import Optional
 from app.schemas.company import CompanyProfile, UpdateCompanyProfileModel
 from app.db.engine import db
+from app.api.conditional import cached_profile_response, invalidate_profile
+from app.api.query_cache import query_cache
+from app.api.streaming import NDJSON_MEDIA_TYPE, ndjson_response, wants_ndjson
+from app.crud.bulk_import import BulkImporter, import_format
+from app.crud.projection import Fieldset, FieldsParam
+from app.crud.pagination import PageParams, fetch_page, parse_sort
+from app.schemas.pagination import Page
+from app.search import engine as search_engine
+from app.search.engine import search_page
+from app.search.filters import (
+    COMPANY_FILTERS,
+    compile_filters,
+    hide_shadow_fields,
+    reject_unknown_params,
+    shadow_fields,
+)
+from app.core.tracing import TracedRoute
 from bson import ObjectId
 from pymongo import ReturnDocument
-from fastapi import Query
+from fastapi import Query, Depends
+
 
+router = APIRouter(route_class=TracedRoute)
 
-router = APIRouter()
+COMPANY_PROJECTION = {"password": 0, **hide_shadow_fields(COMPANY_FILTERS)}
+COMPANY_FIELDS = FieldsParam(CompanyProfile, COMPANY_PROJECTION)
 
 
 @router.get(
@@ -25,32 +45,74 @@ router = APIRouter()
     responses={
         404: {"description": "No companies found"},
         401: {"description": "Unauthorized"},
-        200: {"description": "Successful Response"},
+        200: {
+            "description": "Successful Response",
+            "content": {NDJSON_MEDIA_TYPE: {}},
+        },
     },
 )
-async def retrieve_company_list():
+async def retrieve_company_list(
+    request: Request,
+    page: PageParams = Depends(),
+    fieldset: Fieldset = Depends(COMPANY_FIELDS),
+    sort: str = Query(
+        default=None,
+        description="Sort key, prefix with `-` for descending: name, industry",
+    ),
+):
     """
-    Retrieve the list of companies from the collection.
+    Retrieve a page of companies from the collection.
+
+    With `Accept: application/x-ndjson` every company is streamed instead,
+    one JSON document per line, and the pagination parameters are ignored.
+
+    Parameters:
+    - limit (int): The page size.
+    - after (str): The `next_cursor` of the previous page.
+    - fields (list[str]): Fields to return, all but the password by default.
+    - sort (str): Optional sort key, e.g. `name` or `-industry`.
 
     Returns:
-    - dict: A dictionary containing the list of companies.
+    - dict: A dictionary containing the page of companies and `next_cursor`.
 
     Raises:
     - HTTPException: If there is an error while retrieving the company list.
     """
+    if wants_ndjson(request):
+        return ndjson_response(
+            db.UserRegistration, {"role": "company"}, fieldset.projection
+        )
     try:
-        # Fetch all companies from the collection
-        companies = db.UserRegistration.find({"role": "company"}, {"password": 0})
-        company_list = [
-            {**company, "_id": str(company["_id"])} for company in companies
-        ]
-        return JSONResponse(
-            status_code=200,
-            content={
+        order = parse_sort(sort, {"name", "industry"})
+
+        async def compute():
+            companies, next_cursor = await fetch_page(
+                db.UserRegistration,
+                {"role": "company"},
+                fieldset.projection,
+                limit=page.limit,
+                after=page.after,
+                sort=order,
+            )
+            return {
                 "status": "success",
-                "data": company_list,
+                "data": companies,
+                "next_cursor": next_cursor,
+            }
+
+        return await query_cache.response(
+            "companies.list",
+            "UserRegistration",
+            {
+                "limit": page.limit,
+                "after": page.after,
+                "sort": order,
+                "fields": fieldset.names and sorted(fieldset.names),
             },
+            compute,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -64,47 +126,104 @@ async def retrieve_company_list():
 @router.get(
     "/search",
     response_description="Search for companies based on criteria",
-    response_model=list[CompanyProfile],
+    response_model=Page[CompanyProfile],
     response_model_by_alias=False,
     responses={
         404: {"description": "No companies found"},
         401: {"description": "Unauthorized"},
+        422: {"description": "Unknown filter or no criteria given"},
         200: {"description": "Successful Response"},
     },
 )
 async def search_companies(
-    field: str = Query(..., description="The field to search by"),
-    value: str = Query(..., description="The value to search for"),
+    request: Request,
+    q: Optional[str] = Query(
+        default=None, description="Free text query, results ranked by relevance"
+    ),
+    name: Optional[str] = Query(
+        default=None, description="Name prefix, case-insensitive"
+    ),
+    industry: Optional[str] = Query(
+        default=None, description="Industry prefix, case-insensitive"
+    ),
+    location: Optional[str] = Query(
+        default=None, description="Location prefix, case-insensitive"
+    ),
+    page: PageParams = Depends(),
+    fieldset: Fieldset = Depends(COMPANY_FIELDS),
 ):
-    print("search field: ", field, value)
     """
-    Search for companies based on a specific field and value.
+    Search for companies.
+
+    Filters are AND-ed together and each one is answered by an index; any
+    other query parameter is rejected. With `q`, the matching companies are
+    ranked by BM25 relevance over name, industry, introduction and location.
 
     Parameters:
-    - field (str): The field to search by (e.g., "company_name", "industry", etc.).
-    - value (str): The value to search for in the specified field.
+    - q (str): Free text query.
+    - name (str): Name prefix.
+    - industry (str): Industry prefix.
+    - location (str): Location prefix.
+    - limit (int): The page size.
+    - after (str): The `next_cursor` of the previous page.
+    - fields (list[str]): Fields to return, all but the password by default.
 
     Returns:
-    - List[CompanyProfile]: A list of companies matching the search criteria.
+    - Page[CompanyProfile]: A page of companies matching the search criteria.
 
     Raises:
-    - HTTPException: If there is an error during the search or no companies are found.
+    - HTTPException: If a filter is not allowed, there is an error during the
+      search or no companies are found.
     """
+    reject_unknown_params(request, COMPANY_FILTERS)
+    query = compile_filters(
+        COMPANY_FILTERS,
+        {"name": name, "industry": industry, "location": location},
+    )
+    if not q and not query:
+        raise HTTPException(status_code=422, detail="Provide q or at least one filter")
     try:
-        # Create a dynamic query to find companies based on the provided field and value
-        search_query = {"role": "company", field: {"$regex": value, "$options": "i"}}
-        companies = db.UserRegistration.find(search_query, {"password": 0})
-        print("companies-----", companies)
 
-        # Convert ObjectId to string for each company in the result
-        company_list = [
-            {**company, "_id": str(company["_id"])} for company in companies
-        ]
-
-        if not company_list:
-            raise HTTPException(status_code=404, detail=f"No companies found")
-
-        return company_list
+        async def compute():
+            if q:
+                companies, next_cursor = await search_page(
+                    search_engine.companies,
+                    q,
+                    fieldset.projection,
+                    limit=page.limit,
+                    after=page.after,
+                    query=query,
+                )
+            else:
+                companies, next_cursor = await fetch_page(
+                    db.UserRegistration,
+                    {"role": "company", **query},
+                    fieldset.projection,
+                    limit=page.limit,
+                    after=page.after,
+                )
+
+            if not companies:
+                raise HTTPException(status_code=404, detail="No companies found")
+
+            return {"data": companies, "next_cursor": next_cursor}
+
+        return await query_cache.response(
+            "companies.search",
+            "UserRegistration",
+            {
+                "q": q.strip().lower() if q else None,
+                "query": query,
+                "limit": page.limit,
+                "after": page.after,
+                "fields": fieldset.names and sorted(fieldset.names),
+            },
+            compute,
+            CompanyProfile,
+            include=fieldset.include_page(),
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -142,22 +261,87 @@ async def create_company(company: UpdateCompanyProfileModel):
     try:
         # Assuming db is your MongoDB connection object
         # and UserRegistration is your MongoDB collection for developers
-        result = db.UserRegistration.insert_one(company.dict(by_alias=True))
-        created_company = db.UserRegistration.find_one({"_id": result.inserted_id})
-
-        if created_company:
-            created_company["_id"] = str(
-                created_company["_id"]
-            )  # Convert ObjectId to string
-            return created_company
+        # Tag the profile with its role so it shows up in the company
+        # listings and search index.
+        company_dict = company.dict(by_alias=True)
+        created_company = {
+            **company_dict,
+            **shadow_fields(COMPANY_FILTERS, company_dict),
+            "role": "company",
+        }
+        # insert_one sets the generated _id on the document, so it is echoed
+        # back as written instead of being read again.
+        await db.UserRegistration.insert_one(created_company)
+        query_cache.bump("UserRegistration")
+        search_engine.companies.upsert(created_company)
+        return {**created_company, "_id": str(created_company["_id"])}
 
+    except Exception as e:
         raise HTTPException(
-            status_code=500, detail="Failed to create developer profile"
+            status_code=500, detail=f"Failed to create developer profile: {str(e)}"
         )
 
+
+def _companies_imported(docs: list):
+    query_cache.bump("UserRegistration")
+    for doc in docs:
+        search_engine.companies.upsert(doc)
+        invalidate_profile(str(doc["_id"]))
+
+
+company_importer = BulkImporter(
+    UpdateCompanyProfileModel, "company", COMPANY_FILTERS, _companies_imported
+)
+
+
+@router.post(
+    "/import",
+    response_description="Import company profiles from an NDJSON or CSV upload",
+    responses={
+        401: {"description": "Unauthorized"},
+        415: {"description": "Unsupported upload format"},
+        500: {"description": "Internal Server Error"},
+        200: {"description": "Import report"},
+    },
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def import_companies(request: Request):
+    """
+    Create or update company profiles in bulk from a streamed upload.
+
+    The body is NDJSON (`Content-Type: application/x-ndjson`), one
+    `UpdateCompanyProfileModel` object per line, or CSV
+    (`Content-Type: text/csv`) with a header row of field names. Rows with an
+    email update the company profile with that email, or create it. See
+    `app/crud/bulk_import.py`.
+
+    Parameters:
+    - request (Request): The upload, read as a stream.
+
+    Returns:
+    - dict: Rows read, inserted, updated and failed, and the row numbers and
+      reasons of the failed rows.
+
+    Raises:
+    - HTTPException: If the upload format is not supported or the import
+      fails.
+    """
+    fmt = import_format(request)
+    try:
+        return await company_importer.run(request.stream(), fmt)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
-            status_code=500, detail=f"Failed to create developer profile: {str(e)}"
+            status_code=500, detail=f"Failed to import company profiles: {str(e)}"
         )
 
 
@@ -169,15 +353,22 @@ async def create_company(company: UpdateCompanyProfileModel):
     responses={
         404: {"description": "Company not found"},
         401: {"description": "Unauthorized"},
+        304: {"description": "Not Modified, the `If-None-Match` ETag is current"},
         200: {"description": "Successful Response"},
     },
 )
-async def get_company(id: str):
+async def get_company(
+    request: Request, id: str, fieldset: Fieldset = Depends(COMPANY_FIELDS)
+):
     """
     Get the record for a specific company, looked up by `id`.
 
     Parameters:
     - id (str): The ID of the company to retrieve.
+    - fields (list[str]): Fields to return, all but the password by default.
+
+    The response carries an ETag; a request whose `If-None-Match` names the
+    current one gets 304, usually answered from the profile cache alone.
 
     Returns:
     - dict: The company profile.
@@ -185,10 +376,25 @@ async def get_company(id: str):
     Raises:
     - HTTPException: If the company with the specified ID is not found.
     """
-    if (company := db.UserRegistration.find_one({"_id": ObjectId(id)})) is not None:
-        company["_id"] = str(company["_id"])  # Convert ObjectId to string
+    object_id = ObjectId(id)
+
+    async def load():
+        company = await db.UserRegistration.find_one(
+            {"_id": object_id}, fieldset.projection
+        )
         return company
 
+    response = await cached_profile_response(
+        request,
+        "company",
+        str(object_id),
+        load,
+        CompanyProfile,
+        include=fieldset.include(),
+    )
+    if response is not None:
+        return response
+
     raise HTTPException(status_code=404, detail=f"company {id} not found")
 
 
@@ -218,21 +424,27 @@ async def update_company(id: str, company: UpdateCompanyProfileModel = Body(...)
     company_dict = company.dict(by_alias=True)
     company_updates = {k: v for k, v in company_dict.items() if v is not None}
     if company_updates:
-        updated_company = db.UserRegistration.find_one_and_update(
+        company_updates.update(shadow_fields(COMPANY_FILTERS, company_updates))
+        updated_company = await db.UserRegistration.find_one_and_update(
             {"_id": ObjectId(id)},
             {"$set": company_updates},
             return_document=ReturnDocument.AFTER,
             upsert=True,
         )
+        invalidate_profile(str(ObjectId(id)))
+        query_cache.bump("UserRegistration")
 
         if updated_company:
+            search_engine.companies.upsert(updated_company)
             updated_company["_id"] = str(
                 updated_company["_id"]
             )  # Convert ObjectId to string
             return updated_company
 
     # The update is empty, but we should still return the matching document:
-    if (company := db.UserRegistration.find_one({"_id": ObjectId(id)})) is not None:
+    if (
+        company := await db.UserRegistration.find_one({"_id": ObjectId(id)})
+    ) is not None:
         company["_id"] = str(company["_id"])  # Convert ObjectId to string
         return company
 
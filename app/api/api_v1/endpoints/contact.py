@@ -1,36 +1,59 @@
-from fastapi import APIRouter, Form, HTTPException, Depends
+from fastapi import APIRouter, Form, HTTPException, Depends, Request
 from app.db.engine import db
+from app.db.bulk import BufferFull, contact_writer
 from app.api.deps import get_current_user
+from app.api.streaming import ndjson_response, wants_ndjson
+from app.crud.pagination import PageParams, fetch_page
+from app.core.tracing import TracedRoute
 
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 
 @router.post("/submit")
 async def submit_contact_form(email: str = Form(...), message: str = Form(...)):
     print(f"Received contact form from: {email}, message: {message}")
     try:
-        result = db.contact.insert_one({"email": email, "message": message})
-        if result.inserted_id:
-            return {
-                "message": "Contact form submitted successfully",
-                "email_id": str(result.inserted_id),
-            }
-        else:
-            raise HTTPException(
-                status_code=500, detail="Contact form submission failed"
-            )
-    except Exception as e:
-        return {"error": str(e)}
+        # Batched with other submissions, see app/db/bulk.py
+        email_id = await contact_writer.submit({"email": email, "message": message})
+        return {
+            "message": "Contact form submitted successfully",
+            "email_id": str(email_id),
+        }
+    except BufferFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many submissions, please retry",
+            headers={"Retry-After": "1"},
+        )
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to submit contact form")
 
 
 @router.get("/list")
-async def list_contact_messages(current_user: dict = Depends(get_current_user)):
+async def list_contact_messages(
+    request: Request,
+    page: PageParams = Depends(),
+    current_user: dict = Depends(get_current_user),
+):
+    # Accept: application/x-ndjson streams every message, one per line
+    if wants_ndjson(request):
+        return ndjson_response(db.contact, {}, {"_id": 0, "email": 1, "message": 1})
     try:
-        waitlist_messages = list(
-            db.contact.find({}, {"_id": 0, "email": 1, "message": 1})
+        messages, next_cursor = await fetch_page(
+            db.contact,
+            {},
+            {"email": 1, "message": 1},
+            limit=page.limit,
+            after=page.after,
         )
-        return {"waitlist_messages": waitlist_messages}
+        waitlist_messages = [
+            {"email": message.get("email"), "message": message.get("message")}
+            for message in messages
+        ]
+        return {"waitlist_messages": waitlist_messages, "next_cursor": next_cursor}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error listing contact messages: {str(e)}"
@@ -3,15 +3,39 @@ developers.py
 
 This module contains the routes for handling operations related to developers.
 """
-from fastapi import APIRouter, HTTPException, Body, Depends
-from fastapi.responses import JSONResponse
-from app.schemas.developer import DeveloperProfile, UpdateDeveloperModel
+from fastapi import APIRouter, HTTPException, Body, Depends, Request
+from typing import List, Optional
+from app.schemas.developer import (
+    DeveloperProfile,
+    DeveloperRole,
+    UpdateDeveloperModel,
+)
 from app.db.engine import db
+from app.api.conditional import cached_profile_response, invalidate_profile
+from app.api.query_cache import query_cache
+from app.api.streaming import NDJSON_MEDIA_TYPE, ndjson_response, wants_ndjson
+from app.crud.bulk_import import BulkImporter, import_format
+from app.crud.projection import Fieldset, FieldsParam
+from app.crud.pagination import PageParams, fetch_page, parse_sort
+from app.schemas.pagination import Page
+from app.search import engine as search_engine
+from app.search.engine import search_page
+from app.search.filters import (
+    DEVELOPER_FILTERS,
+    compile_filters,
+    hide_shadow_fields,
+    reject_unknown_params,
+    shadow_fields,
+)
+from app.core.tracing import TracedRoute
 from fastapi import Query
 from bson import ObjectId
 from pymongo import ReturnDocument
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
+
+DEVELOPER_PROJECTION = {"password": 0, **hide_shadow_fields(DEVELOPER_FILTERS)}
+DEVELOPER_FIELDS = FieldsParam(DeveloperProfile, DEVELOPER_PROJECTION)
 
 
 @router.get(
@@ -22,32 +46,74 @@ router = APIRouter()
     responses={
         404: {"description": "No developers found"},
         401: {"description": "Unauthorized"},
-        200: {"description": "Successful Response"},
+        200: {
+            "description": "Successful Response",
+            "content": {NDJSON_MEDIA_TYPE: {}},
+        },
     },
 )
-async def retrieve_developer_list():
+async def retrieve_developer_list(
+    request: Request,
+    page: PageParams = Depends(),
+    fieldset: Fieldset = Depends(DEVELOPER_FIELDS),
+    sort: str = Query(
+        default=None,
+        description="Sort key, prefix with `-` for descending: name, location",
+    ),
+):
     """
-    Retrieve the list of developers from the collection.
+    Retrieve a page of developers from the collection.
+
+    With `Accept: application/x-ndjson` every developer is streamed instead,
+    one JSON document per line, and the pagination parameters are ignored.
+
+    Parameters:
+    - limit (int): The page size.
+    - after (str): The `next_cursor` of the previous page.
+    - fields (list[str]): Fields to return, all but the password by default.
+    - sort (str): Optional sort key, e.g. `name` or `-name`.
 
     Returns:
-    - dict: A dictionary containing the list of developers.
+    - dict: A dictionary containing the page of developers and `next_cursor`.
 
     Raises:
     - HTTPException: If there is an error while retrieving the developer list.
     """
+    if wants_ndjson(request):
+        return ndjson_response(
+            db.UserRegistration, {"role": "developer"}, fieldset.projection
+        )
     try:
-        # Fetch all developers from the collection
-        developers = db.UserRegistration.find({"role": "developer"}, {"password": 0})
-        developer_list = [
-            {**developer, "_id": str(developer["_id"])} for developer in developers
-        ]
-        return JSONResponse(
-            status_code=200,
-            content={
+        order = parse_sort(sort, {"name", "location"})
+
+        async def compute():
+            developers, next_cursor = await fetch_page(
+                db.UserRegistration,
+                {"role": "developer"},
+                fieldset.projection,
+                limit=page.limit,
+                after=page.after,
+                sort=order,
+            )
+            return {
                 "status": "success",
-                "data": developer_list,
+                "data": developers,
+                "next_cursor": next_cursor,
+            }
+
+        return await query_cache.response(
+            "developers.list",
+            "UserRegistration",
+            {
+                "limit": page.limit,
+                "after": page.after,
+                "sort": order,
+                "fields": fieldset.names and sorted(fieldset.names),
             },
+            compute,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -61,46 +127,111 @@ async def retrieve_developer_list():
 @router.get(
     "/search",
     response_description="Search for developers based on criteria",
-    response_model=list[DeveloperProfile],
+    response_model=Page[DeveloperProfile],
     response_model_by_alias=False,
     responses={
         404: {"description": "No developers found"},
         401: {"description": "Unauthorized"},
+        422: {"description": "Unknown filter or no criteria given"},
         200: {"description": "Successful Response"},
     },
 )
 async def search_developers(
-    field: str = Query(..., description="The field to search by"),
-    value: str = Query(..., description="The value to search for"),
+    request: Request,
+    q: Optional[str] = Query(
+        default=None, description="Free text query, results ranked by relevance"
+    ),
+    skills: Optional[List[str]] = Query(
+        default=None, description="Skills the developer has, all of them"
+    ),
+    developer_role: Optional[DeveloperRole] = Query(default=None),
+    location: Optional[str] = Query(
+        default=None, description="Location prefix, case-insensitive"
+    ),
+    name: Optional[str] = Query(
+        default=None, description="Name prefix, case-insensitive"
+    ),
+    page: PageParams = Depends(),
+    fieldset: Fieldset = Depends(DEVELOPER_FIELDS),
 ):
     """
-    Search for companies based on a specific field and value.
+    Search for developers.
+
+    Filters are AND-ed together and each one is answered by an index; any
+    other query parameter is rejected. With `q`, the matching developers are
+    ranked by BM25 relevance over name, skills, experience and location.
 
     Parameters:
-    - field (str): The field to search by (e.g., "company_name", "industry", etc.).
-    - value (str): The value to search for in the specified field.
+    - q (str): Free text query.
+    - skills (list[str]): Required skills, repeated or comma separated.
+    - developer_role (DeveloperRole): Exact role.
+    - location (str): Location prefix.
+    - name (str): Name prefix.
+    - limit (int): The page size.
+    - after (str): The `next_cursor` of the previous page.
+    - fields (list[str]): Fields to return, all but the password by default.
 
     Returns:
-    - List[CompanyProfile]: A list of companies matching the search criteria.
+    - Page[DeveloperProfile]: A page of developers matching the search criteria.
 
     Raises:
-    - HTTPException: If there is an error during the search or no companies are found.
+    - HTTPException: If a filter is not allowed, there is an error during the
+      search or no developers are found.
     """
+    reject_unknown_params(request, DEVELOPER_FILTERS)
+    query = compile_filters(
+        DEVELOPER_FILTERS,
+        {
+            "skills": skills,
+            "developer_role": developer_role,
+            "location": location,
+            "name": name,
+        },
+    )
+    if not q and not query:
+        raise HTTPException(status_code=422, detail="Provide q or at least one filter")
     try:
-        # Create a dynamic query to find companies based on the provided field and value
-        search_query = {"role": "developer", field: {"$regex": value, "$options": "i"}}
-        print("search_query:", search_query)
-        developers = db.UserRegistration.find(search_query, {"password": 0})
-        # Convert ObjectId to string for each company in the result
-        developer_list = [
-            {**developer, "_id": str(developer["_id"])} for developer in developers
-        ]
-
-        print("developer_list", developer_list)
-        if not developer_list:
-            raise HTTPException(status_code=404, detail=f"No developers found")
-
-        return developer_list
+
+        async def compute():
+            if q:
+                developers, next_cursor = await search_page(
+                    search_engine.developers,
+                    q,
+                    fieldset.projection,
+                    limit=page.limit,
+                    after=page.after,
+                    query=query,
+                )
+            else:
+                developers, next_cursor = await fetch_page(
+                    db.UserRegistration,
+                    {"role": "developer", **query},
+                    fieldset.projection,
+                    limit=page.limit,
+                    after=page.after,
+                )
+
+            if not developers:
+                raise HTTPException(status_code=404, detail="No developers found")
+
+            return {"data": developers, "next_cursor": next_cursor}
+
+        return await query_cache.response(
+            "developers.search",
+            "UserRegistration",
+            {
+                "q": q.strip().lower() if q else None,
+                "query": query,
+                "limit": page.limit,
+                "after": page.after,
+                "fields": fieldset.names and sorted(fieldset.names),
+            },
+            compute,
+            DeveloperProfile,
+            include=fieldset.include_page(),
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -138,22 +269,86 @@ async def create_developer(developer: UpdateDeveloperModel):
     try:
         # Assuming db is your MongoDB connection object
         # and UserRegistration is your MongoDB collection for developers
-        result = db.UserRegistration.insert_one(developer.dict(by_alias=True))
-        created_developer = db.UserRegistration.find_one({"_id": result.inserted_id})
-
-        if created_developer:
-            created_developer["_id"] = str(
-                created_developer["_id"]
-            )  # Convert ObjectId to string
-            return created_developer
+        # Tag the profile with its role so it shows up in the developer
+        # listings and search index.
+        developer_dict = developer.dict(by_alias=True)
+        created_developer = {
+            **developer_dict,
+            **shadow_fields(DEVELOPER_FILTERS, developer_dict),
+            "role": "developer",
+        }
+        # insert_one sets the generated _id on the document, so it is echoed
+        # back as written instead of being read again.
+        await db.UserRegistration.insert_one(created_developer)
+        query_cache.bump("UserRegistration")
+        search_engine.developers.upsert(created_developer)
+        return {**created_developer, "_id": str(created_developer["_id"])}
 
+    except Exception as e:
         raise HTTPException(
-            status_code=500, detail="Failed to create developer profile"
+            status_code=500, detail=f"Failed to create developer profile: {str(e)}"
         )
 
+
+def _developers_imported(docs: list):
+    query_cache.bump("UserRegistration")
+    for doc in docs:
+        search_engine.developers.upsert(doc)
+        invalidate_profile(str(doc["_id"]))
+
+
+developer_importer = BulkImporter(
+    UpdateDeveloperModel, "developer", DEVELOPER_FILTERS, _developers_imported
+)
+
+
+@router.post(
+    "/import",
+    response_description="Import developer profiles from an NDJSON or CSV upload",
+    responses={
+        401: {"description": "Unauthorized"},
+        415: {"description": "Unsupported upload format"},
+        500: {"description": "Internal Server Error"},
+        200: {"description": "Import report"},
+    },
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}},
+                "text/csv": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def import_developers(request: Request):
+    """
+    Create or update developer profiles in bulk from a streamed upload.
+
+    The body is NDJSON (`Content-Type: application/x-ndjson`), one
+    `UpdateDeveloperModel` object per line, or CSV (`Content-Type: text/csv`) with a
+    header row of field names. Rows with an email update the developer profile
+    with that email, or create it. See `app/crud/bulk_import.py`.
+
+    Parameters:
+    - request (Request): The upload, read as a stream.
+
+    Returns:
+    - dict: Rows read, inserted, updated and failed, and the row numbers and
+      reasons of the failed rows.
+
+    Raises:
+    - HTTPException: If the upload format is not supported or the import
+      fails.
+    """
+    fmt = import_format(request)
+    try:
+        return await developer_importer.run(request.stream(), fmt)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
-            status_code=500, detail=f"Failed to create developer profile: {str(e)}"
+            status_code=500, detail=f"Failed to import developer profiles: {str(e)}"
         )
 
 
@@ -165,15 +360,22 @@ async def create_developer(developer: UpdateDeveloperModel):
     responses={
         404: {"description": "Developer not found"},
         401: {"description": "Unauthorized"},
+        304: {"description": "Not Modified, the `If-None-Match` ETag is current"},
         200: {"description": "Successful Response"},
     },
 )
-async def get_developer(id: str):
+async def get_developer(
+    request: Request, id: str, fieldset: Fieldset = Depends(DEVELOPER_FIELDS)
+):
     """
     Get the record for a specific developer, looked up by `id`.
 
     Parameters:
     - id (str): The ID of the developer to retrieve.
+    - fields (list[str]): Fields to return, all but the password by default.
+
+    The response carries an ETag; a request whose `If-None-Match` names the
+    current one gets 304, usually answered from the profile cache alone.
 
     Returns:
     - dict: The developer profile.
@@ -186,10 +388,23 @@ async def get_developer(id: str):
     except Exception:
         raise HTTPException(status_code=404, detail=f"Invalid ObjectId: {id}")
 
-    if (developer := db.UserRegistration.find_one({"_id": object_id})) is not None:
-        developer["_id"] = str(developer["_id"])  # Convert ObjectId to string
+    async def load():
+        developer = await db.UserRegistration.find_one(
+            {"_id": object_id}, fieldset.projection
+        )
         return developer
 
+    response = await cached_profile_response(
+        request,
+        "developer",
+        str(object_id),
+        load,
+        DeveloperProfile,
+        include=fieldset.include(),
+    )
+    if response is not None:
+        return response
+
     raise HTTPException(status_code=404, detail=f"Developer {id} not found")
 
 
@@ -219,21 +434,27 @@ async def update_developer(id: str, developer: UpdateDeveloperModel = Body(...))
     developer_dict = developer.dict(by_alias=True)
     developer_updates = {k: v for k, v in developer_dict.items() if v is not None}
     if developer_updates:
-        updated_developer = db.UserRegistration.find_one_and_update(
+        developer_updates.update(shadow_fields(DEVELOPER_FILTERS, developer_updates))
+        updated_developer = await db.UserRegistration.find_one_and_update(
             {"_id": ObjectId(id)},
             {"$set": developer_updates},
             return_document=ReturnDocument.AFTER,
             upsert=True,
         )
+        invalidate_profile(str(ObjectId(id)))
+        query_cache.bump("UserRegistration")
 
         if updated_developer:
+            search_engine.developers.upsert(updated_developer)
             updated_developer["_id"] = str(
                 updated_developer["_id"]
             )  # Convert ObjectId to string
             return updated_developer
 
     # The update is empty, but we should still return the matching document:
-    if (developer := db.UserRegistration.find_one({"_id": ObjectId(id)})) is not None:
+    if (
+        developer := await db.UserRegistration.find_one({"_id": ObjectId(id)})
+    ) is not None:
         developer["_id"] = str(developer["_id"])  # Convert ObjectId to string
         return developer
 
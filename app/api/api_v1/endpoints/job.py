@@ -1,41 +1,102 @@
 from fastapi import APIRouter, Query
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, HTTPException, Body, Depends, Request
 from fastapi.responses import JSONResponse
 from app.schemas.company import (
     CompanyProfile,
     UpdateCompanyProfileModel,
+    BulkJobRequest,
     Opening,
     OpeningUpdate,
     OpeningOut,
+    OpeningStatus,
+)
+from app.schemas.pagination import Page
+from app.api.query_cache import query_cache
+from app.api.streaming import NDJSON_MEDIA_TYPE, ndjson_response, wants_ndjson
+from app.crud.bulk_jobs import run_job_operations
+from app.crud.projection import Fieldset, FieldsParam
+from app.crud.pagination import PageParams, fetch_page, parse_sort
+from app.search import engine as search_engine
+from app.search.engine import search_page
+from app.search.matching import normalize_skills
+from app.search.filters import (
+    DEVELOPER_FILTERS,
+    JOB_FILTERS,
+    compile_filters,
+    hide_shadow_fields,
+    reject_unknown_params,
+    shadow_fields,
 )
 from app.db.engine import db
+from app.core.config import settings
+from app.core.tracing import TracedRoute
 from bson import ObjectId
 from pymongo import ReturnDocument
-from typing import List
+from typing import List, Optional
+
+router = APIRouter(route_class=TracedRoute)
 
-router = APIRouter()
+JOB_PROJECTION = hide_shadow_fields(JOB_FILTERS)
+JOB_FIELDS = FieldsParam(OpeningOut, JOB_PROJECTION)
+MATCH_PROJECTION = {"password": 0, **hide_shadow_fields(DEVELOPER_FILTERS)}
 
 
 @router.get(
     "/list",
-    response_description="Get a list of all job postings",
-    response_model=List[OpeningOut],
+    response_description="Get a page of job postings",
+    response_model=Page[OpeningOut],
     response_model_by_alias=False,
     responses={
         401: {"description": "Unauthorized"},
-        200: {"description": "Successful Response"},
+        200: {
+            "description": "Successful Response",
+            "content": {NDJSON_MEDIA_TYPE: {}},
+        },
     },
 )
-async def get_job_list():
+async def get_job_list(
+    request: Request,
+    page: PageParams = Depends(),
+    fieldset: Fieldset = Depends(JOB_FIELDS),
+    sort: str = Query(
+        default=None,
+        description="Sort key, prefix with `-` for descending: job_role, "
+        "no_of_openings",
+    ),
+):
+    # Accept: application/x-ndjson streams every opening, one per line
+    if wants_ndjson(request):
+        return ndjson_response(db.Opening, {}, fieldset.projection)
     try:
-        # Assuming db is your MongoDB connection object
-        # and Opening is your MongoDB collection
-        job_list = list(db.Opening.find())
+        order = parse_sort(sort, {"job_role", "no_of_openings"})
 
-        # Convert ObjectId to string for each job in the result
-        job_list = [{**job, "_id": str(job["_id"])} for job in job_list]
+        async def compute():
+            job_list, next_cursor = await fetch_page(
+                db.Opening,
+                {},
+                fieldset.projection,
+                limit=page.limit,
+                after=page.after,
+                sort=order,
+            )
 
-        return job_list
+            return {"data": job_list, "next_cursor": next_cursor}
+
+        return await query_cache.response(
+            "job.list",
+            "Opening",
+            {
+                "limit": page.limit,
+                "after": page.after,
+                "sort": order,
+                "fields": fieldset.names and sorted(fieldset.names),
+            },
+            compute,
+            OpeningOut,
+            include=fieldset.include_page(),
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Failed to retrieve job list: {str(e)}"
@@ -57,13 +118,15 @@ async def post_job(job: Opening):
     try:
         # Assuming db is your MongoDB connection object
         # and Opening is your MongoDB collection
-        new_job = db.Opening.insert_one(job.model_dump(by_alias=True))
-
-        # You can get the inserted document from the database
-        # using the inserted_id and return it in the response
-        inserted_job = db.Opening.find_one({"_id": new_job.inserted_id})
+        job_dict = job.model_dump(by_alias=True)
+        new_job = {**job_dict, **shadow_fields(JOB_FILTERS, job_dict)}
+        # insert_one sets the generated _id on the document, so the response
+        # is built from it instead of reading the job back.
+        await db.Opening.insert_one(new_job)
+        query_cache.bump("Opening")
+        search_engine.jobs.upsert(new_job)
         # Convert ObjectId to string for serialization
-        inserted_job["_id"] = str(inserted_job["_id"])
+        inserted_job = {**job_dict, "_id": str(new_job["_id"])}
         return {"message": "Job posting created successfully", "job": inserted_job}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create job: {str(e)}")
@@ -71,45 +134,103 @@ async def post_job(job: Opening):
 
 @router.get(
     "/search",
-    response_description="Search for developers based on criteria",
-    response_model=list[OpeningOut],
+    response_description="Search for openings based on criteria",
+    response_model=Page[OpeningOut],
     response_model_by_alias=False,
     responses={
         404: {"description": "No openings found"},
         401: {"description": "Unauthorized"},
+        422: {"description": "Unknown filter or no criteria given"},
         200: {"description": "Successful Response"},
     },
 )
 async def search_jobs(
-    field: str = Query(..., description="The field to search by"),
-    value: str = Query(..., description="The value to search for"),
+    request: Request,
+    q: Optional[str] = Query(
+        default=None, description="Free text query, results ranked by relevance"
+    ),
+    skills_needed: Optional[List[str]] = Query(
+        default=None, description="Skills the opening asks for, all of them"
+    ),
+    status: Optional[OpeningStatus] = Query(default=None),
+    job_role: Optional[str] = Query(
+        default=None, description="Job role prefix, case-insensitive"
+    ),
+    page: PageParams = Depends(),
+    fieldset: Fieldset = Depends(JOB_FIELDS),
 ):
     """
-    Search for companies based on a specific field and value.
+    Search for openings.
+
+    Filters are AND-ed together and each one is answered by an index; any
+    other query parameter is rejected. With `q`, the matching openings are
+    ranked by BM25 relevance over job role, skills needed and description.
 
     Parameters:
-    - field (str): The field to search by (e.g., "company_name", "industry", etc.).
-    - value (str): The value to search for in the specified field.
+    - q (str): Free text query.
+    - skills_needed (list[str]): Required skills, repeated or comma separated.
+    - status (OpeningStatus): Exact status.
+    - job_role (str): Job role prefix.
+    - limit (int): The page size.
+    - after (str): The `next_cursor` of the previous page.
+    - fields (list[str]): Fields to return, every job field by default.
 
     Returns:
-    - List[CompanyProfile]: A list of companies matching the search criteria.
+    - Page[OpeningOut]: A page of openings matching the search criteria.
 
     Raises:
-    - HTTPException: If there is an error during the search or no companies are found.
+    - HTTPException: If a filter is not allowed, there is an error during the
+      search or no openings are found.
     """
+    reject_unknown_params(request, JOB_FILTERS)
+    query = compile_filters(
+        JOB_FILTERS,
+        {"skills_needed": skills_needed, "status": status, "job_role": job_role},
+    )
+    if not q and not query:
+        raise HTTPException(status_code=422, detail="Provide q or at least one filter")
     try:
-        # Create a dynamic query to find companies based on the provided field and value
-        search_query = {field: {"$regex": value, "$options": "i"}}
-        print("search_query:", search_query)
-        openings = db.Opening.find(search_query)
-        # Convert ObjectId to string for each company in the result
-        opening_list = [{**opening, "_id": str(opening["_id"])} for opening in openings]
-
-        print("opening_list", opening_list)
-        if not opening_list:
-            raise HTTPException(status_code=404, detail=f"No developers found")
-
-        return opening_list
+
+        async def compute():
+            if q:
+                openings, next_cursor = await search_page(
+                    search_engine.jobs,
+                    q,
+                    fieldset.projection,
+                    limit=page.limit,
+                    after=page.after,
+                    query=query,
+                )
+            else:
+                openings, next_cursor = await fetch_page(
+                    db.Opening,
+                    {**query},
+                    fieldset.projection,
+                    limit=page.limit,
+                    after=page.after,
+                )
+
+            if not openings:
+                raise HTTPException(status_code=404, detail="No openings found")
+
+            return {"data": openings, "next_cursor": next_cursor}
+
+        return await query_cache.response(
+            "job.search",
+            "Opening",
+            {
+                "q": q.strip().lower() if q else None,
+                "query": query,
+                "limit": page.limit,
+                "after": page.after,
+                "fields": fieldset.names and sorted(fieldset.names),
+            },
+            compute,
+            OpeningOut,
+            include=fieldset.include_page(),
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -120,6 +241,83 @@ async def search_jobs(
         )
 
 
+@router.get(
+    "/{job_id}/matches",
+    response_description="Rank developers by the skills a job posting needs",
+    responses={
+        401: {"description": "Unauthorized"},
+        404: {"description": "Job not found"},
+        500: {"description": "Internal Server Error"},
+        200: {"description": "Successful Response"},
+    },
+)
+async def match_developers(
+    job_id: str,
+    limit: int = Query(default=20, ge=1, le=100, description="Number of matches"),
+):
+    """
+    Find the developers whose skills best cover a job posting's
+    `skills_needed`.
+
+    Developers are ranked in memory by the per-worker skill index (see
+    `app/search/matching.py`); only the profiles of the top matches are read
+    from MongoDB.
+
+    Parameters:
+    - job_id (str): The ID of the job posting.
+    - limit (int): Number of matches to return.
+
+    Returns:
+    - dict: The matches, best first, each with the developer profile, the
+      `score` (the fraction of the needed skills the developer has) and the
+      `matched_skills` and `missing_skills`, and the total number of
+      developers having any of the skills.
+
+    Raises:
+    - HTTPException: If the job posting is not found or the matching fails.
+    """
+    try:
+        try:
+            job_object_id = ObjectId(job_id)
+        except Exception:
+            raise HTTPException(status_code=404, detail="Job not found")
+        job = await db.Opening.find_one(
+            {"_id": job_object_id}, projection={"skills_needed": 1}
+        )
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+
+        needed = normalize_skills(job.get("skills_needed"))
+        ranked, total = search_engine.developers.matcher.match(needed, limit)
+        docs = await db.UserRegistration.find(
+            {"_id": {"$in": [ObjectId(doc_id) for doc_id, _, _ in ranked]}},
+            MATCH_PROJECTION,
+        ).to_list(length=len(ranked))
+        by_id = {}
+        for doc in docs:
+            doc["_id"] = str(doc["_id"])  # Convert ObjectId to string
+            by_id[doc["_id"]] = doc
+
+        matches = [
+            {
+                "developer": by_id[doc_id],
+                "score": round(score, 4),
+                "matched_skills": matched,
+                "missing_skills": [skill for skill in needed if skill not in matched],
+            }
+            for doc_id, score, matched in ranked
+            # Profiles deleted by another worker since its last reindex
+            if doc_id in by_id
+        ]
+        return {"status": "success", "data": matches, "total": total}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to match developers: {str(e)}"
+        )
+
+
 @router.put(
     "/update",
     response_description="Update a job posting",
@@ -136,25 +334,20 @@ async def update_job(job_id: str, updated_job: Opening):
     try:
         # Convert job_id to ObjectId
         job_object_id = ObjectId(job_id)
-        print(job_object_id)
-        # Check if the job exists
-        existing_job = db.Opening.find_one({"_id": job_object_id})
-        print("existing_job:", existing_job, updated_job.model_dump())
-        if not existing_job:
-            raise HTTPException(status_code=404, detail="Job not found")
-
-        updated_job = db.Opening.find_one_and_update(
+        job_updates = updated_job.model_dump()
+        # A missing job comes back as None, so no lookup is needed first
+        updated_job = await db.Opening.find_one_and_update(
             {"_id": job_object_id},
-            {"$set": updated_job.model_dump()},
+            {"$set": {**job_updates, **shadow_fields(JOB_FILTERS, job_updates)}},
             return_document=ReturnDocument.AFTER,
         )
+        if not updated_job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        query_cache.bump("Opening")
 
-        print("updated_job---------------------", updated_job)
-        # Return the updated job
-        # updated_job_dict = {**existing_job, **updated_job.model_dump()}
-        if updated_job:
-            updated_job["_id"] = str(updated_job["_id"])  # Convert ObjectId to string
-            return updated_job
+        search_engine.jobs.upsert(updated_job)
+        updated_job["_id"] = str(updated_job["_id"])  # Convert ObjectId to string
+        return updated_job
 
     except HTTPException:
         # Re-raise HTTPException to keep the status code and detail intact
@@ -181,11 +374,73 @@ async def delete_job(job_id: str):
             job_object_id = ObjectId(job_id)
         except Exception:
             raise HTTPException(status_code=404, detail=f"Invalid ObjectId: {id}")
-        deleted_job = db.Opening.find_one_and_delete({"_id": job_object_id})
+        deleted_job = await db.Opening.find_one_and_delete(
+            {"_id": job_object_id}, projection=JOB_PROJECTION
+        )
         if deleted_job:
+            query_cache.bump("Opening")
+            search_engine.jobs.remove(str(deleted_job["_id"]))
             deleted_job["_id"] = str(deleted_job["_id"])
             return {"message": "Job posting deleted successfully", "job": deleted_job}
         else:
             raise HTTPException(status_code=404, detail="Job not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete job: {str(e)}")
+
+
+@router.post(
+    "/bulk",
+    response_description="Create, update and delete job postings in one batch",
+    responses={
+        401: {"description": "Unauthorized"},
+        422: {"description": "Invalid operation or too many operations"},
+        500: {"description": "Internal Server Error"},
+        200: {"description": "Result of every operation"},
+    },
+)
+async def bulk_jobs(batch: BulkJobRequest):
+    """
+    Apply a batch of job posting operations with a single `bulk_write`.
+
+    Each operation has an `op`: `create` takes a `job` (an `Opening`),
+    `update` a `job_id` and the `job` fields to change (an `OpeningChanges`:
+    fields may be left out but not set to null), `status` a `job_id` and the
+    new `status`, and `delete` a `job_id`. The operations are independent:
+    one failing does not stop the others. Successive updates and status
+    changes of one job are merged into one write; a job that is deleted may
+    be the target of no other operation. See `app/crud/bulk_jobs.py`.
+
+    Parameters:
+    - batch (BulkJobRequest): The operations, at most
+      `JOB_BULK_MAX_OPERATIONS`.
+
+    Returns:
+    - dict: The counts of created, updated, deleted and failed jobs, and per
+      operation, in request order, its `job_id` and `status` (`created`,
+      `updated`, `unchanged`, `deleted`, `not_found` or `error`, with a
+      `detail`).
+
+    Raises:
+    - HTTPException: If the batch is too large or cannot be written.
+    """
+    if len(batch.operations) > settings.JOB_BULK_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.JOB_BULK_MAX_OPERATIONS} operations "
+            "per request",
+        )
+    try:
+        report, written, removed = await run_job_operations(batch.operations)
+        if written or removed:
+            query_cache.bump("Opening")
+        for doc in written:
+            search_engine.jobs.upsert(doc)
+        for job_id in removed:
+            search_engine.jobs.remove(job_id)
+        return report
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to apply job operations: {str(e)}"
+        )
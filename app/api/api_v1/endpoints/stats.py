@@ -0,0 +1,165 @@
+"""
+stats.py
+
+This module contains the routes exposing runtime statistics of a worker,
+used to size and tune it under load.
+"""
+from fastapi import APIRouter
+from app.api.conditional import profile_cache
+from app.api.query_cache import query_cache
+from app.db.bulk import contact_writer, waitlist_writer
+from app.core.security import password_hasher, verified_tokens
+from app.db.monitoring import pool_stats
+from app.db.slow_queries import slow_queries
+from app.core.tracing import TracedRoute
+
+
+router = APIRouter(route_class=TracedRoute)
+
+
+@router.get(
+    "/pool",
+    response_description="MongoDB connection pool statistics for this worker",
+    responses={
+        401: {"description": "Unauthorized"},
+        200: {"description": "Successful Response"},
+    },
+)
+async def get_pool_stats():
+    """
+    Report connection pool usage of the worker that serves the request.
+
+    `waiting` and `wait_time_*` show whether requests queue for a connection;
+    `max_checked_out` against `max_pool_size` shows how much of the pool is
+    actually used at peak.
+
+    Returns:
+    - dict: The pool counters and gauges.
+    """
+    return pool_stats.snapshot()
+
+
+@router.get(
+    "/auth-cache",
+    response_description="Verified token cache statistics for this worker",
+    responses={
+        401: {"description": "Unauthorized"},
+        200: {"description": "Successful Response"},
+    },
+)
+async def get_auth_cache_stats():
+    """
+    Report how often `get_current_user` found a bearer token already verified.
+
+    Returns:
+    - dict: Entry count, hits, misses, hit ratio and evictions.
+    """
+    return verified_tokens.stats()
+
+
+@router.get(
+    "/password-hashing",
+    response_description="Password hashing pool statistics for this worker",
+    responses={
+        401: {"description": "Unauthorized"},
+        200: {"description": "Successful Response"},
+    },
+)
+async def get_password_hashing_stats():
+    """
+    Report queue depth and latency of the bcrypt pool used by register/login.
+
+    `rejected` counts calls answered with 503 because the queue was full;
+    `queue_wait_avg_ms` growing towards `run_time_avg_ms` means the pool is
+    undersized for the login rate.
+
+    Returns:
+    - dict: The pool counters and gauges.
+    """
+    return password_hasher.stats()
+
+
+@router.get(
+    "/profile-cache",
+    response_description="Profile response cache statistics",
+    responses={
+        401: {"description": "Unauthorized"},
+        200: {"description": "Successful Response"},
+    },
+)
+async def get_profile_cache_stats():
+    """
+    Report how often single profile GETs were answered from the ETag cache.
+
+    Hits and misses are counted per worker; with the shared SQLite backend the
+    entry count and size are those of the shared file.
+
+    Returns:
+    - dict: Backend, entry count, size, hits, misses, hit ratio and evictions.
+    """
+    return profile_cache.stats()
+
+
+@router.get(
+    "/query-cache",
+    response_description="List and search response cache statistics",
+    responses={
+        401: {"description": "Unauthorized"},
+        200: {"description": "Successful Response"},
+    },
+)
+async def get_query_cache_stats():
+    """
+    Report the read-through cache of the list and search routes.
+
+    Returns:
+    - dict: The store's counters, the current collection generations and the
+      hits, misses and hit ratio of each route.
+    """
+    return query_cache.stats()
+
+
+@router.get(
+    "/bulk-writes",
+    response_description="Buffered submission writer statistics for this worker",
+    responses={
+        401: {"description": "Unauthorized"},
+        200: {"description": "Successful Response"},
+    },
+)
+async def get_bulk_write_stats():
+    """
+    Report how the waitlist and contact submissions of this worker are batched.
+
+    Returns:
+    - dict: Per collection, the buffer depth, batch counts and sizes, failures
+      and flush latency.
+    """
+    return {
+        "waitlist": waitlist_writer.stats(),
+        "contact": contact_writer.stats(),
+    }
+
+
+@router.get(
+    "/slow-queries",
+    response_description="Slow MongoDB commands seen by this worker",
+    responses={
+        401: {"description": "Unauthorized"},
+        200: {"description": "Successful Response"},
+    },
+)
+async def get_slow_queries():
+    """
+    Report the MongoDB commands slower than SLOW_QUERY_THRESHOLD_MS.
+
+    Filters are shown with their values redacted. Shapes that were slow
+    repeatedly carry an `explain` summary: the winning plan and the documents
+    examined per document returned, where a high ratio or a COLLSCAN points
+    at a missing index.
+
+    Returns:
+    - dict: The most recent slow commands, newest first, and the slow filter
+      shapes ordered by total time.
+    """
+    return slow_queries.snapshot()
@@ -2,17 +2,21 @@ from fastapi import APIRouter, Form, HTTPException, Depends
 from fastapi.responses import JSONResponse
 from fastapi.routing import APIRouter
 from app.core.security import (
-    pwd_context,
+    get_password_hash,
+    verify_password,
     create_access_token,
     blacklist_token,
     verify_refresh_token,
 )
 from app.api.deps import oauth2_scheme
+from app.api.query_cache import query_cache
 from app.db.engine import db
+from app.core.tracing import TracedRoute
+from pymongo.errors import DuplicateKeyError
 
 
-router = APIRouter()
-token_router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
+token_router = APIRouter(route_class=TracedRoute)
 
 
 @router.post(
@@ -29,6 +33,14 @@ token_router = APIRouter()
                 }
             },
         },
+        503: {
+            "description": "Password hashing pool is saturated",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Server is busy, please retry"}
+                }
+            },
+        },
         500: {
             "description": "Failed to register user",
             "content": {
@@ -65,19 +77,24 @@ async def register_user(
     print("role----", role)
     if role not in ["company", "developer"]:
         raise HTTPException(status_code=422, detail="Invalid role")
-    existing_user = db.UserRegistration.find_one(
-        {"$or": [{"username": username}, {"email": email}]}
-    )
-    if existing_user:
-        raise HTTPException(status_code=400, detail="Username or email already exists")
     user_dict = {
         "username": username,
         "email": email,
         "password": password,
         "role": role,
     }
-    user_dict["password"] = pwd_context.hash(user_dict["password"])
-    result = db.UserRegistration.insert_one(user_dict)
+    # A taken name is only detected by the insert, after hashing: registering
+    # it costs one wasted hash, where a lookup first would cost a round trip
+    # on every successful registration.
+    user_dict["password"] = await get_password_hash(user_dict["password"])
+    try:
+        # The unique indexes on username and email reject a taken name; the
+        # worker does not start without them, see check_required_indexes.
+        result = await db.UserRegistration.insert_one(user_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Username or email already exists")
+    # The new user shows up in the developer or company listings
+    query_cache.bump("UserRegistration")
     if result.acknowledged:
         return JSONResponse(
             status_code=200,
@@ -105,6 +122,14 @@ async def register_user(
                 }
             },
         },
+        503: {
+            "description": "Password hashing pool is saturated",
+            "content": {
+                "application/json": {
+                    "example": {"detail": "Server is busy, please retry"}
+                }
+            },
+        },
         400: {
             "description": "Invalid credentials",
             "content": {
@@ -128,10 +153,12 @@ async def login(username: str = Form(...), password: str = Form(...)) -> JSONRes
     Raises:
         HTTPException: If the provided credentials are invalid.
     """
-    user = db.UserRegistration.find_one(
-        {"$or": [{"username": username}, {"email": username}]}
+    # Only account documents hold a password; profiles may share the email.
+    account = {"password": {"$exists": True}}
+    user = await db.UserRegistration.find_one(
+        {"$or": [{"username": username, **account}, {"email": username, **account}]}
     )
-    if user and pwd_context.verify(password, user["password"]):
+    if user and await verify_password(password, user["password"]):
         token_data = {
             "sub": str(user["_id"]),
             "username": user["username"],
@@ -160,7 +187,7 @@ async def logout(token: str = Depends(oauth2_scheme)):
 
     TODO: Implement logout logic.
     """
-    blacklist_token(token)
+    await blacklist_token(token)
     return JSONResponse(
         status_code=200,
         content={
@@ -212,7 +239,7 @@ async def refresh_token(
     """
     user_id = verify_refresh_token(refresh_token)
     if user_id:
-        user = db.UserRegistration.find_one({"_id": user_id})
+        user = await db.UserRegistration.find_one({"_id": user_id})
         if user:
             token_data = {
                 "sub": str(user["_id"]),
@@ -1,33 +1,59 @@
-from fastapi import APIRouter, Form, HTTPException, Depends
+from fastapi import APIRouter, Form, HTTPException, Depends, Request
 from app.db.engine import db
+from app.db.bulk import BufferFull, waitlist_writer
 from app.api.deps import get_current_user
+from app.api.streaming import ndjson_response, wants_ndjson
+from app.crud.pagination import PageParams, fetch_page
+from app.core.tracing import TracedRoute
+from pymongo.errors import DuplicateKeyError
 
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 
 @router.post("/submit")
 async def submit_waitlist_email(email: str = Form(...)):
     print(f"Received waitlist email: {email}")
     try:
-        result = db.waitlist.insert_one({"email": email})
-        if result.inserted_id:
-            return {
-                "message": "Waitlist email submitted successfully",
-                "email_id": str(result.inserted_id),
-            }
-        else:
-            raise HTTPException(
-                status_code=500, detail="Waitlist email submission failed"
-            )
-    except Exception as e:
-        return {"error": str(e)}
+        # Batched with other submissions, see app/db/bulk.py
+        email_id = await waitlist_writer.submit({"email": email})
+        return {
+            "message": "Waitlist email submitted successfully",
+            "email_id": str(email_id),
+        }
+    except DuplicateKeyError:
+        # The email is already on the waitlist: submitting it again succeeds
+        existing = await db.waitlist.find_one({"email": email}, {"_id": 1})
+        return {
+            "message": "Waitlist email submitted successfully",
+            "email_id": str(existing["_id"]) if existing else None,
+        }
+    except BufferFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many submissions, please retry",
+            headers={"Retry-After": "1"},
+        )
+    except Exception:
+        raise HTTPException(status_code=500, detail="Failed to submit waitlist email")
 
 
 @router.get("/list")
-async def list_waitlist_emails(current_user: dict = Depends(get_current_user)):
+async def list_waitlist_emails(
+    request: Request,
+    page: PageParams = Depends(),
+    current_user: dict = Depends(get_current_user),
+):
+    # Accept: application/x-ndjson streams every entry, one per line
+    if wants_ndjson(request):
+        return ndjson_response(db.waitlist, {}, {"_id": 0, "email": 1})
     try:
-        waitlist_emails = list(db.waitlist.find({}, {"_id": 0, "email": 1}))
-        return {"waitlist_emails": waitlist_emails}
+        entries, next_cursor = await fetch_page(
+            db.waitlist, {}, {"email": 1}, limit=page.limit, after=page.after
+        )
+        waitlist_emails = [{"email": entry.get("email")} for entry in entries]
+        return {"waitlist_emails": waitlist_emails, "next_cursor": next_cursor}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error listing waitlist emails: {str(e)}"
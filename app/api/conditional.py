@@ -0,0 +1,114 @@
+"""
+conditional.py
+
+This module contains the ETag response cache behind the single profile
+routes, answering conditional GETs without touching the database.
+
+A cached entry is the rendered JSON body of a profile; its ETag is a digest
+of that body, so the same profile gets the same ETag on every worker and
+across cache misses. Entries are dropped when the profile is written and
+expire after `PROFILE_CACHE_TTL_SECONDS`, which bounds how stale a worker
+can be when the cache is per process. With `PROFILE_CACHE_PATH` set, the
+workers of a host share the entries through a SQLite file instead, so an
+update is seen by all of them at once.
+"""
+import hashlib
+import time
+from typing import Awaitable, Callable, Optional, Type
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+from app.api.responses import render_document
+from app.core.cache import LRUCache, SQLiteCache
+from app.core.config import settings
+
+PROFILE_KINDS = ("developer", "company")
+
+
+def _make_cache():
+    if settings.PROFILE_CACHE_PATH:
+        return SQLiteCache(
+            settings.PROFILE_CACHE_PATH,
+            settings.PROFILE_CACHE_MAX_ENTRIES,
+            settings.PROFILE_CACHE_MAX_BYTES,
+        )
+    return LRUCache(
+        settings.PROFILE_CACHE_MAX_ENTRIES, settings.PROFILE_CACHE_MAX_BYTES
+    )
+
+
+profile_cache = _make_cache()
+
+
+def etag_for(body: bytes) -> str:
+    return '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Tell whether the request's `If-None-Match` names `etag`, using the weak
+    comparison GET requires.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def invalidate_profile(id: str):
+    """
+    Drop the cached profile responses of `id`. A document is served by both
+    the developer and the company route, so both entries go.
+    """
+    for kind in PROFILE_KINDS:
+        profile_cache.pop(f"{kind}:{id}")
+
+
+async def cached_profile_response(
+    request: Request,
+    kind: str,
+    id: str,
+    load: Callable[[], Awaitable[Optional[dict]]],
+    model: Type[BaseModel],
+    include: Optional[set] = None,
+) -> Optional[Response]:
+    """
+    Answer a profile GET from the cache, loading and caching it on a miss.
+
+    Parameters:
+    - kind (str): One of `PROFILE_KINDS`.
+    - id (str): The profile ID.
+    - load (callable): Fetches the profile document, None if it is missing.
+    - model (BaseModel): The response model the document is rendered with.
+    - include (set): The fields of a sparse fieldset request. Such responses
+      still get an ETag but are not cached, so the cache holds one entry per
+      profile that an update can drop.
+
+    Returns:
+    - Response: 304 when `If-None-Match` matches, the JSON body otherwise;
+      None if `load` found no document.
+    """
+    key = f"{kind}:{id}"
+    body = profile_cache.get(key) if include is None else None
+    if body is None:
+        document = await load()
+        if document is None:
+            return None
+        body = render_document(model, document, include)
+        if include is None:
+            profile_cache.set(
+                key,
+                body,
+                expires_at=time.time() + settings.PROFILE_CACHE_TTL_SECONDS,
+                size=len(body),
+            )
+
+    etag = etag_for(body)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
@@ -1,13 +1,15 @@
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException
-from app.core.config import settings
-from jose import jwt, JWTError
+from jose import JWTError
 from app.db.engine import db
+from app.core.revocation import revoked_tokens
+from app.core.security import decode_access_token
+from app.core.tracing import span
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/user/token")
 
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+async def get_current_user(token: str = Depends(oauth2_scheme)):
     """
     Retrieves the current user based on the provided token.
 
@@ -20,23 +22,26 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
     Raises:
     - HTTPException: If the credentials cannot be validated.
     """
-    if db.blocklist.find_one({"token": token}):
-        raise HTTPException(
+    with span("auth"):
+        # The per-worker filter rules out almost every token without a query;
+        # only possible revocations are confirmed against the blocklist.
+        if revoked_tokens.might_be_revoked(token) and await db.blocklist.find_one(
+            {"token": token}
+        ):
+            raise HTTPException(
+                status_code=401,
+                detail="Token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        credentials_exception = HTTPException(
             status_code=401,
-            detail="Token has been revoked",
+            detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    credentials_exception = HTTPException(
-        status_code=401,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        return payload
+        try:
+            payload = decode_access_token(token)
+            return payload
 
-    except JWTError as e:
-        print(e)
-        raise credentials_exception
+        except JWTError as e:
+            print(e)
+            raise credentials_exception
@@ -0,0 +1,142 @@
+"""
+query_cache.py
+
+This module contains the read-through cache of the list and search routes.
+
+A result is cached as its rendered JSON body under the route, the normalized
+request parameters and the generation of the collection it was read from.
+Write paths bump that generation, which makes every result computed before
+the write unreachable immediately; the stale entries are never served again
+and age out of the LRU.
+
+With `QUERY_CACHE_PATH` set, the workers of a host share the entries and the
+generations through that SQLite file, so a write served by one worker
+invalidates the pages of all of them. Without it, entries and generations are
+per worker: a worker does not see the writes served by the others, so with
+`WEB_CONCURRENCY` above 1 entries are kept at most
+`QUERY_CACHE_UNSHARED_TTL_SECONDS`. `QUERY_CACHE_TTL_SECONDS` bounds how long
+a result can be served after a write made elsewhere, e.g. by another host.
+"""
+import json
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Optional, Type
+
+from fastapi import Response
+from pydantic import BaseModel
+from app.api.responses import dumps, render_page
+from app.core.cache import Generations, LRUCache, SQLiteCache, SQLiteGenerations
+from app.core.config import settings
+from app.core.tracing import span
+
+
+class QueryCache:
+    """
+    Read-through cache of rendered responses, invalidated per collection.
+
+    Parameters:
+    - store: An `LRUCache` or `SQLiteCache` holding the bodies.
+    - generations: The matching `Generations` or `SQLiteGenerations`.
+    - ttl (int): Seconds an entry is served at most.
+    """
+
+    def __init__(self, store, generations, ttl: int):
+        self.store = store
+        self.generations = generations
+        self.ttl = ttl
+        # route -> [hits, misses]
+        self._routes = defaultdict(lambda: [0, 0])
+
+    def bump(self, collection: str):
+        """Invalidate every cached result read from `collection`."""
+        self.generations.bump(collection)
+
+    async def response(
+        self,
+        route: str,
+        collection: str,
+        params: dict,
+        compute: Callable[[], Awaitable[Any]],
+        model: Optional[Type[BaseModel]] = None,
+        include: Optional[dict] = None,
+    ) -> Response:
+        """
+        Return the cached response of `route` for `params`, computing and
+        caching it on a miss.
+
+        Parameters:
+        - route (str): The name the hit ratio is reported under.
+        - collection (str): The collection the result is read from.
+        - params (dict): Every input the result depends on, already
+          normalized; JSON-encoded into the key.
+        - compute (callable): Produces the response content, which may hold
+          documents as read from MongoDB. An exception, e.g. a 404,
+          propagates and nothing is cached.
+        - model (BaseModel): Optional response model of the items; the
+          content is then rendered as `Page[model]`, like the route's
+          `response_model` would.
+        - include (dict): Restricts the fields of the rendered page.
+
+        Returns:
+        - Response: The JSON response.
+        """
+        generation = self.generations.get(collection)
+        key = "%s:%d:%s" % (
+            route,
+            generation,
+            json.dumps(params, sort_keys=True, default=str),
+        )
+        counters = self._routes[route]
+        body = self.store.get(key) if generation >= 0 else None
+        if body is not None:
+            counters[0] += 1
+            return Response(body, media_type="application/json")
+
+        counters[1] += 1
+        content = await compute()
+        if model is not None:
+            body = render_page(model, content, include)
+        else:
+            with span("serialize"):
+                body = dumps(content)
+        if generation >= 0:
+            self.store.set(key, body, expires_at=time.time() + self.ttl, size=len(body))
+        return Response(body, media_type="application/json")
+
+    def stats(self) -> dict:
+        routes = {}
+        for route, (hits, misses) in sorted(self._routes.items()):
+            lookups = hits + misses
+            routes[route] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": hits / lookups if lookups else None,
+            }
+        return {
+            "store": self.store.stats(),
+            "generations": self.generations.stats(),
+            "routes": routes,
+        }
+
+
+def _make_cache() -> QueryCache:
+    ttl = settings.QUERY_CACHE_TTL_SECONDS
+    if settings.QUERY_CACHE_PATH:
+        store = SQLiteCache(
+            settings.QUERY_CACHE_PATH,
+            settings.QUERY_CACHE_MAX_ENTRIES,
+            settings.QUERY_CACHE_MAX_BYTES,
+            table="query_cache",
+        )
+        generations = SQLiteGenerations(settings.QUERY_CACHE_PATH)
+    else:
+        store = LRUCache(
+            settings.QUERY_CACHE_MAX_ENTRIES, settings.QUERY_CACHE_MAX_BYTES
+        )
+        generations = Generations()
+        if settings.WEB_CONCURRENCY > 1:
+            ttl = min(ttl, settings.QUERY_CACHE_UNSHARED_TTL_SECONDS)
+    return QueryCache(store, generations, ttl)
+
+
+query_cache = _make_cache()
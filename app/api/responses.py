@@ -0,0 +1,98 @@
+"""
+responses.py
+
+This module contains the fast JSON serialization path of the API.
+
+Documents read from MongoDB are trusted output: they are encoded straight to
+JSON with orjson, which handles `ObjectId` and `datetime` values without a
+copy of every document. Where a route still wants its response model
+applied (field filtering, aliases, defaults), the documents are wrapped in
+unvalidated model instances and serialized by a pydantic `TypeAdapter` built
+once per model, entirely in pydantic-core. Validating them again, as a
+`response_model` does, costs several times more than the serialization,
+and the documents written through the API were validated on the way in.
+"""
+from functools import lru_cache
+from typing import Any, Optional, Type
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+from app.core.tracing import span
+from app.schemas.pagination import Page
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode `content` to JSON, with ObjectIds as their hex strings."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """`JSONResponse` rendered with orjson; used as the app's default."""
+
+    def render(self, content: Any) -> bytes:
+        with span("serialize"):
+            return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp: Any) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+
+def _dump_json(tp: Any, value: Any, include: Optional[Any]) -> bytes:
+    # Values were not validated, so type mismatches (an ObjectId in a `str`
+    # field) are expected: no warnings, and ObjectIds fall back to strings.
+    with span("serialize"):
+        return type_adapter(tp).dump_json(
+            value, by_alias=False, include=include, warnings=False, fallback=_default
+        )
+
+
+def render_document(
+    model: Type[BaseModel], doc: dict, include: Optional[set] = None
+) -> bytes:
+    """
+    Render a trusted document as the JSON of response model `model`.
+
+    The model instance is built with `model_construct`, so field aliases and
+    defaults apply and unknown keys are dropped, but nothing is validated.
+
+    Parameters:
+    - model (BaseModel): The response model.
+    - doc (dict): The document as read from MongoDB.
+    - include (set): Restricts the serialized fields, as in `model_dump`.
+
+    Returns:
+    - bytes: The JSON body.
+    """
+    return _dump_json(model, model.model_construct(**doc), include)
+
+
+def render_page(
+    model: Type[BaseModel], content: dict, include: Optional[dict] = None
+) -> bytes:
+    """
+    Render `content`, the fields of a `Page` holding trusted documents, as the
+    JSON of `Page[model]`.
+
+    Parameters:
+    - model (BaseModel): The response model of the items.
+    - content (dict): `data` and `next_cursor` of the page.
+    - include (dict): Restricts the serialized fields, as in `model_dump`.
+
+    Returns:
+    - bytes: The JSON body.
+    """
+    page_type = Page[model]
+    page = page_type.model_construct(
+        **{**content, "data": [model.model_construct(**doc) for doc in content["data"]]}
+    )
+    return _dump_json(page_type, page, include)
@@ -0,0 +1,70 @@
+"""
+streaming.py
+
+This module contains the helpers for the streaming NDJSON export mode of the
+list endpoints.
+
+When a client sends `Accept: application/x-ndjson`, the list endpoints skip
+pagination and stream every matching document, one JSON object per line, as
+the MongoDB cursor yields them. Only one cursor batch and one output chunk are
+held in memory at a time, whatever the size of the collection.
+"""
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from app.api.responses import dumps
+from app.core.config import settings
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Encoded lines are coalesced up to this size before being written, so a
+# collection of small documents is not sent as one tiny chunk per document.
+_CHUNK_BYTES = 64 * 1024
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_response(
+    collection,
+    query: dict,
+    projection: Optional[dict] = None,
+) -> StreamingResponse:
+    """
+    Stream the documents matching `query` as newline-delimited JSON.
+
+    Parameters:
+    - collection: The Motor collection to read from.
+    - query (dict): The filter for the documents.
+    - projection (dict): The projection to apply.
+
+    Returns:
+    - StreamingResponse: The NDJSON response, ordered by `_id`.
+    """
+    cursor = (
+        collection.find(query, projection)
+        .sort("_id", 1)
+        .batch_size(settings.EXPORT_BATCH_SIZE)
+    )
+
+    async def lines():
+        chunk = []
+        size = 0
+        try:
+            async for doc in cursor:
+                line = dumps(doc) + b"\n"
+                chunk.append(line)
+                size += len(line)
+                if size >= _CHUNK_BYTES:
+                    yield b"".join(chunk)
+                    chunk = []
+                    size = 0
+            if chunk:
+                yield b"".join(chunk)
+        finally:
+            # Release the server-side cursor if the client goes away early.
+            await cursor.close()
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,367 @@
+"""
+cache.py
+
+This module contains the LRU caches used by the request-path caches
+(verified tokens, responses).
+
+Entries can carry an absolute expiry time and a size; the cache is bounded
+both by entry count and, optionally, by the total size of its entries.
+`LRUCache` lives in the worker process and is meant to be used from the event
+loop thread only, so it does no locking. `SQLiteCache` has the same interface
+but keeps `bytes` values in a SQLite file, so every worker on the host shares
+the entries. `Generations` and `SQLiteGenerations` are the matching
+per-process and shared counters used to invalidate cached results by
+versioning their keys.
+"""
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=1.0, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class LRUCache:
+    """
+    Least-recently-used cache with optional per-entry expiry.
+
+    Parameters:
+    - maxsize (int): Maximum number of entries.
+    - max_bytes (int): Optional bound on the summed `size` of the entries.
+    """
+
+    def __init__(self, maxsize: int, max_bytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        # key -> (value, expires_at, size)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        value, expires_at, _ = entry
+        if expires_at is not None and expires_at <= time.time():
+            self.pop(key)
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        expires_at: Optional[float] = None,
+        size: int = 0,
+    ):
+        """
+        Store `value` under `key`, evicting least recently used entries as
+        needed.
+
+        Parameters:
+        - expires_at (float): Unix time after which the entry is a miss.
+        - size (int): The weight of the entry against `max_bytes`.
+        """
+        if self.maxsize <= 0 or (self.max_bytes is not None and size > self.max_bytes):
+            return
+        self.pop(key)
+        self._entries[key] = (value, expires_at, size)
+        self._bytes += size
+        while len(self._entries) > self.maxsize or (
+            self.max_bytes is not None and self._bytes > self.max_bytes
+        ):
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return default
+        self._bytes -= entry[2]
+        return entry[0]
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "maxsize": self.maxsize,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+        }
+
+
+class SQLiteCache:
+    """
+    LRU cache of `bytes` values stored in a SQLite file shared by the workers
+    of a host.
+
+    Lookups and writes are single-row statements on a local WAL-mode database,
+    cheap enough to run on the event loop. A failing statement is logged and
+    treated as a miss, so a broken cache file never fails a request. Hit and
+    miss counters are per worker.
+
+    Parameters:
+    - path (str): The database file, created if missing.
+    - maxsize (int): Maximum number of entries.
+    - max_bytes (int): Optional bound on the summed `size` of the entries.
+    - table (str): The table holding the entries, so several caches can share
+      one file.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        maxsize: int,
+        max_bytes: Optional[int] = None,
+        table: str = "cache",
+    ):
+        self.path = path
+        self.table = table
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so each worker opens its own.
+        if self._conn is None or self._pid != os.getpid():
+            conn = _connect(self.path)
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                " key TEXT PRIMARY KEY,"
+                " value BLOB NOT NULL,"
+                " expires_at REAL,"
+                " size INTEGER NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_accessed_at"
+                f" ON {self.table} (accessed_at)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def __len__(self) -> int:
+        try:
+            return (
+                self._connection()
+                .execute(f"SELECT COUNT(*) FROM {self.table}")
+                .fetchone()[0]
+            )
+        except sqlite3.Error:
+            logger.exception("Shared cache %s is unavailable", self.path)
+            return 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            now = time.time()
+            if row is not None and row[1] is not None and row[1] <= now:
+                conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return default
+            conn.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        except sqlite3.Error:
+            logger.exception("Shared cache %s is unavailable", self.path)
+            self.misses += 1
+            return default
+        self.hits += 1
+        return bytes(row[0])
+
+    def set(
+        self,
+        key: str,
+        value: bytes,
+        expires_at: Optional[float] = None,
+        size: int = 0,
+    ):
+        """
+        Store `value` under `key`, evicting least recently used entries as
+        needed.
+
+        Parameters:
+        - expires_at (float): Unix time after which the entry is a miss.
+        - size (int): The weight of the entry against `max_bytes`.
+        """
+        if self.maxsize <= 0 or (self.max_bytes is not None and size > self.max_bytes):
+            return
+        try:
+            conn = self._connection()
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?, ?, ?, ?)",
+                (key, value, expires_at, size, time.time()),
+            )
+            while True:
+                count, total = conn.execute(
+                    f"SELECT COUNT(*), TOTAL(size) FROM {self.table}"
+                ).fetchone()
+                excess = count - self.maxsize
+                if self.max_bytes is not None and total > self.max_bytes:
+                    excess = max(excess, 1)
+                if excess <= 0:
+                    break
+                deleted = conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN "
+                    f"(SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)",
+                    (excess,),
+                ).rowcount
+                self.evictions += deleted
+        except sqlite3.Error:
+            logger.exception("Shared cache %s is unavailable", self.path)
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                f"SELECT value FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        except sqlite3.Error:
+            logger.exception("Shared cache %s is unavailable", self.path)
+            return default
+        return default if row is None else bytes(row[0])
+
+    def clear(self):
+        try:
+            self._connection().execute(f"DELETE FROM {self.table}")
+        except sqlite3.Error:
+            logger.exception("Shared cache %s is unavailable", self.path)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        try:
+            entries, total = (
+                self._connection()
+                .execute(f"SELECT COUNT(*), TOTAL(size) FROM {self.table}")
+                .fetchone()
+            )
+        except sqlite3.Error:
+            entries, total = None, None
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "entries": entries,
+            "maxsize": self.maxsize,
+            "bytes": int(total) if total is not None else None,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+        }
+
+
+class Generations:
+    """
+    Per-name generation counters kept in the worker process.
+
+    Caches put the generation of the data a result was computed from into its
+    key; bumping the generation on a write makes every older result
+    unreachable at once.
+    """
+
+    def __init__(self):
+        self._values = {}
+
+    def get(self, name: str) -> int:
+        return self._values.get(name, 0)
+
+    def bump(self, name: str):
+        self._values[name] = self._values.get(name, 0) + 1
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "generations": dict(self._values)}
+
+
+class SQLiteGenerations:
+    """
+    Generation counters stored in a SQLite file, so a write on any worker of
+    the host is seen by all of them. Counters live in their own table and are
+    never evicted. If the file is unavailable the counter reads as -1, a
+    generation no entry is ever stored under.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            conn = _connect(self.path)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS generations ("
+                " name TEXT PRIMARY KEY,"
+                " value INTEGER NOT NULL)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, name: str) -> int:
+        try:
+            row = (
+                self._connection()
+                .execute("SELECT value FROM generations WHERE name = ?", (name,))
+                .fetchone()
+            )
+        except sqlite3.Error:
+            logger.exception("Shared generations %s are unavailable", self.path)
+            return -1
+        return 0 if row is None else row[0]
+
+    def bump(self, name: str):
+        try:
+            self._connection().execute(
+                "INSERT INTO generations VALUES (?, 1)"
+                " ON CONFLICT (name) DO UPDATE SET value = value + 1",
+                (name,),
+            )
+        except sqlite3.Error:
+            logger.exception("Shared generations %s are unavailable", self.path)
+
+    def stats(self) -> dict:
+        try:
+            rows = self._connection().execute("SELECT name, value FROM generations")
+            values = dict(rows.fetchall())
+        except sqlite3.Error:
+            values = None
+        return {"backend": "sqlite", "path": self.path, "generations": values}
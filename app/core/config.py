@@ -6,7 +6,7 @@ This module contains the configuration settings for the application, including A
 """
 import os
 from dotenv import load_dotenv
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Literal, Optional, Union
 
 from pydantic import AnyHttpUrl, EmailStr, HttpUrl, PostgresDsn, validator
 from pydantic_settings import BaseSettings
@@ -38,9 +38,109 @@ class Settings(BaseSettings):
             return v
         raise ValueError(v)
 
+    # Keyset pagination for list endpoints
+    PAGE_SIZE_DEFAULT: int = 20
+    PAGE_SIZE_MAX: int = 100
+    # Documents fetched per getMore when streaming an NDJSON export
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # In-process BM25 search over developers, companies and openings.
+    # Each worker rebuilds its index on this interval to pick up writes
+    # served by other workers; 0 disables the periodic rebuild.
+    SEARCH_INDEX_ENABLED: bool = True
+    SEARCH_REINDEX_INTERVAL_SECONDS: int = 300
+
+    # Verified JWT claims cached per worker, keyed by token digest; 0 disables
+    TOKEN_CACHE_SIZE: int = 10_000
+
+    # Rendered single developer/company profiles with their ETags, see
+    # app/api/conditional.py; 0 entries disables. With a path, the workers of
+    # a host share one SQLite cache file instead of one cache each.
+    PROFILE_CACHE_MAX_ENTRIES: int = 10_000
+    PROFILE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    PROFILE_CACHE_TTL_SECONDS: int = 60
+    PROFILE_CACHE_PATH: Optional[str] = None
+
+    # Rendered list and search pages, see app/api/query_cache.py; 0 entries
+    # disables. A path shares entries and generations between the workers of a
+    # host; it may be the same file as PROFILE_CACHE_PATH. Without one, each
+    # worker caches on its own and misses the writes served by the others, so
+    # with several workers a page is kept at most the unshared TTL.
+    QUERY_CACHE_MAX_ENTRIES: int = 2_000
+    QUERY_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    QUERY_CACHE_TTL_SECONDS: int = 300
+    QUERY_CACHE_UNSHARED_TTL_SECONDS: int = 5
+    QUERY_CACHE_PATH: Optional[str] = None
+
+    # Worker processes per host; uvicorn and gunicorn start this many by
+    # default.
+    WEB_CONCURRENCY: int = 1
+
+    # Waitlist and contact submissions are batched into insert_many calls,
+    # see app/db/bulk.py. "flushed" answers once the batch is written,
+    # "buffered" as soon as the submission is queued.
+    BULK_WRITE_MAX_BATCH: int = 500
+    BULK_WRITE_MAX_DELAY_MS: int = 50
+    BULK_WRITE_MAX_BUFFER: int = 10_000
+    BULK_WRITE_DURABILITY: Literal["flushed", "buffered"] = "flushed"
+
+    # Profiles uploaded to the /import routes are validated and written in
+    # chunks of this many rows; the report lists at most this many failures.
+    # A longer record (an NDJSON line or CSV row, in characters) fails its row.
+    BULK_IMPORT_CHUNK_SIZE: int = 500
+    BULK_IMPORT_MAX_ERRORS: int = 1_000
+    BULK_IMPORT_MAX_RECORD_SIZE: int = 64 * 1024
+
+    # Most operations accepted by one /job/bulk request, all written with a
+    # single bulk_write.
+    JOB_BULK_MAX_OPERATIONS: int = 1_000
+
+    # bcrypt runs on a per-worker thread pool; once every thread is busy and
+    # the queue is full, register/login answer 503 with this Retry-After.
+    PASSWORD_HASH_WORKERS: int = min(4, os.cpu_count() or 1)
+    PASSWORD_HASH_QUEUE_SIZE: int = 64
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
+
+    # Per-worker Bloom filter of revoked tokens, see app/core/revocation.py
+    REVOCATION_FILTER_ENABLED: bool = True
+    REVOCATION_FILTER_CAPACITY: int = 100_000
+    REVOCATION_FILTER_ERROR_RATE: float = 0.001
+    REVOCATION_LOG_SIZE_BYTES: int = 1024 * 1024
+
+    # Fraction of requests answered with a Server-Timing breakdown (auth, db,
+    # validate, serialize), see app/core/tracing.py; optionally logged too.
+    TRACE_SAMPLE_RATE: float = 0.01
+    TRACE_LOG_ENABLED: bool = False
+    # Record request metrics for the Prometheus scrape endpoint at /metrics
+    METRICS_ENABLED: bool = True
+
     # MongoDB
     MONGODB_URI: str = os.environ.get("MONGODB_URI")
     MONGODB_NAME: str = os.environ.get("MONGODB_NAME")
+    # Connection pool sizing is per worker process, so the total number of
+    # connections the deployment opens is MONGODB_MAX_POOL_SIZE * workers.
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 0
+    # How long a request may wait for a free connection before failing.
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: Optional[int] = 5000
+    # Idle connections are closed after this long; None keeps them forever.
+    MONGODB_MAX_IDLE_TIME_MS: Optional[int] = None
+    # Create missing indexes from app/db/indexes.py when a worker starts. When
+    # off, they must be created beforehand: a worker does not start without
+    # the unique indexes on usernames and emails.
+    MONGODB_ENSURE_INDEXES: bool = True
+    # Commands slower than the threshold are kept in a ring read through
+    # /stats/slow-queries, see app/db/slow_queries.py; 0 disables. A filter
+    # shape slow this many times is explained once; 0 disables explains.
+    SLOW_QUERY_THRESHOLD_MS: float = 100
+    SLOW_QUERY_LOG_SIZE: int = 500
+    SLOW_QUERY_EXPLAIN_AFTER: int = 3
+    # Background database probe behind /healthz, /readyz and /, see
+    # app/db/health.py. A replication lag above the limit marks the worker
+    # not ready; None only reports it.
+    HEALTH_CHECK_INTERVAL_SECONDS: float = 5
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 2
+    HEALTH_MAX_REPLICATION_LAG_SECONDS: Optional[float] = None
 
     class Config:
         case_sensitive = True
@@ -0,0 +1,111 @@
+"""
+hashing.py
+
+This module contains the bounded executor that runs password hashing and
+verification off the event loop.
+
+bcrypt is deliberately slow CPU work and releases the GIL while it runs, so a
+small thread pool gives real parallelism without blocking the loop. Admission
+is bounded: once every worker is busy and `queue_size` more calls are waiting,
+further calls are refused straight away instead of piling up behind a burst.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when a call is refused because the executor queue is full."""
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a bounded queue and latency counters.
+
+    The counters are only updated from the event loop thread, so they need no
+    locking.
+
+    Parameters:
+    - name (str): Prefix of the worker thread names.
+    - max_workers (int): Number of worker threads.
+    - queue_size (int): Calls allowed to wait for a free worker.
+    """
+
+    def __init__(self, name: str, max_workers: int, queue_size: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.pending = 0
+        self.max_pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_time_total_ms = 0.0
+        self.run_time_total_ms = 0.0
+        self.run_time_max_ms = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix=self.name
+            )
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Run `fn(*args)` on a worker thread and return its result.
+
+        Raises:
+        - ExecutorSaturated: If all workers are busy and the queue is full.
+        """
+        if self.pending >= self.max_workers + self.queue_size:
+            self.rejected += 1
+            raise ExecutorSaturated(f"{self.name} executor is saturated")
+
+        def timed():
+            started = time.perf_counter()
+            result = fn(*args)
+            return result, started, time.perf_counter()
+
+        self.pending += 1
+        self.max_pending = max(self.max_pending, self.pending)
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started, finished = await loop.run_in_executor(
+                self._get_executor(), timed
+            )
+        finally:
+            self.pending -= 1
+
+        run_ms = (finished - started) * 1000
+        self.completed += 1
+        self.wait_time_total_ms += (started - submitted) * 1000
+        self.run_time_total_ms += run_ms
+        self.run_time_max_ms = max(self.run_time_max_ms, run_ms)
+        return result
+
+    def stats(self) -> dict:
+        completed = self.completed
+        return {
+            "max_workers": self.max_workers,
+            "queue_size": self.queue_size,
+            "in_flight": min(self.pending, self.max_workers),
+            "queued": max(self.pending - self.max_workers, 0),
+            "max_pending": self.max_pending,
+            "completed": completed,
+            "rejected": self.rejected,
+            "queue_wait_avg_ms": (
+                self.wait_time_total_ms / completed if completed else 0.0
+            ),
+            "run_time_avg_ms": (
+                self.run_time_total_ms / completed if completed else 0.0
+            ),
+            "run_time_max_ms": self.run_time_max_ms,
+        }
@@ -0,0 +1,135 @@
+"""
+metrics.py
+
+This module contains the Prometheus metrics of the API and the ASGI
+middleware that records the HTTP ones.
+
+Requests are labelled by route template (e.g. `/api/v1/developers/{id}`),
+never by raw path, so the number of series stays bounded; requests that
+match no route share the `unmatched` label. MongoDB command timings are
+recorded by `app.db.monitoring.CommandMetricsListener`.
+
+Each worker process keeps its own metrics. When the API runs with several
+workers, set PROMETHEUS_MULTIPROC_DIR to a directory shared by the workers
+(and emptied before they start) so `/metrics` aggregates all of them.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.multiprocess import MultiProcessCollector
+
+registry = CollectorRegistry()
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests served.",
+    ["method", "route", "status"],
+    registry=registry,
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving an HTTP request to sending the end of its response.",
+    ["method", "route", "status"],
+    registry=registry,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests being served.",
+    ["method"],
+    registry=registry,
+    multiprocess_mode="livesum",
+)
+MONGODB_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command round trip time, as reported by the driver.",
+    ["collection", "command", "outcome"],
+    registry=registry,
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "bcrypt time per operation, excluding the wait for a hashing thread.",
+    ["operation"],
+    registry=registry,
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 2, 5),
+)
+JWT_DURATION = Histogram(
+    "jwt_duration_seconds",
+    "Time to sign or verify a JWT; cached verifications are not counted.",
+    ["operation"],
+    registry=registry,
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005),
+)
+
+
+@contextmanager
+def timed(histogram: Histogram, **labels):
+    """Observe the time spent in the block, also when it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(**labels).observe(time.perf_counter() - started)
+
+
+def render_metrics() -> tuple:
+    """
+    Render the metrics in the Prometheus text format.
+
+    Returns:
+    - tuple: The body and its content type.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        aggregated = CollectorRegistry()
+        MultiProcessCollector(aggregated)
+        return generate_latest(aggregated), CONTENT_TYPE_LATEST
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request counts, latencies and in-flight
+    requests.
+
+    A plain ASGI middleware rather than a `BaseHTTPMiddleware`, so streamed
+    responses are not buffered and the duration covers the whole body.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            # FastAPI stores the matched route in the scope during routing
+            route = scope.get("route")
+            labels = (method, getattr(route, "path", "unmatched"), str(status))
+            HTTP_REQUESTS.labels(*labels).inc()
+            HTTP_REQUEST_DURATION.labels(*labels).observe(time.perf_counter() - started)
@@ -0,0 +1,178 @@
+"""
+revocation.py
+
+This module contains the per-worker filter of revoked access tokens, which
+lets `get_current_user` skip the blocklist query for the vast majority of
+requests.
+
+Revoked tokens are added to a Bloom filter. A token the filter has never
+seen is certainly not revoked and is accepted without a database round trip;
+a "maybe" is confirmed against the `blocklist` collection, so false positives
+only cost the query we used to run on every request.
+
+Each worker loads the filter from `blocklist` at startup and then tails the
+capped `revocation_log` collection, to which `blacklist_token` appends every
+revocation, so logouts served by other workers reach it within about a
+second. Whenever the filter may be behind (not loaded yet, or the tail is
+broken) every token is treated as "maybe" and checked in the database.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+from app.core.config import settings
+from app.db.engine import db
+
+logger = logging.getLogger(__name__)
+
+LOG_COLLECTION = "revocation_log"
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over 32-byte digests.
+
+    Parameters:
+    - capacity (int): Number of items the filter is sized for.
+    - error_rate (float): False positive rate at `capacity` items.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, digest: bytes):
+        # Double hashing: k positions derived from two 64-bit halves.
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:16], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, digest: bytes):
+        for position in self._positions(digest):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, digest: bytes) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(digest)
+        )
+
+
+class RevokedTokenFilter:
+    def __init__(self):
+        self._bloom = self._new_bloom()
+        self._synced = False
+
+    @staticmethod
+    def _new_bloom() -> BloomFilter:
+        return BloomFilter(
+            settings.REVOCATION_FILTER_CAPACITY, settings.REVOCATION_FILTER_ERROR_RATE
+        )
+
+    def might_be_revoked(self, token: str) -> bool:
+        """
+        Return False only when `token` is certainly not revoked.
+        """
+        if not self._synced:
+            return True
+        return token_digest(token) in self._bloom
+
+    def add(self, token: str):
+        self._bloom.add(token_digest(token))
+
+    async def _ensure_log(self):
+        try:
+            await db.create_collection(
+                LOG_COLLECTION, capped=True, size=settings.REVOCATION_LOG_SIZE_BYTES
+            )
+        except CollectionInvalid:
+            pass
+
+    async def load(self):
+        """
+        Rebuild the filter from the blocklist.
+
+        Returns:
+        - ObjectId: The newest revocation log entry at load time, where
+          tailing resumes; None if the log is empty.
+        """
+        self._synced = False
+        await self._ensure_log()
+        # Read the log position before the blocklist, so a revocation landing
+        # in between is replayed by the tail rather than missed.
+        newest = await db[LOG_COLLECTION].find_one(
+            {}, {"_id": 1}, sort=[("$natural", -1)]
+        )
+        bloom = self._new_bloom()
+        async for entry in db.blocklist.find({}, {"token": 1, "_id": 0}).batch_size(
+            5000
+        ):
+            if entry.get("token"):
+                bloom.add(token_digest(entry["token"]))
+        self._bloom = bloom
+        self._synced = True
+        return newest["_id"] if newest else None
+
+    async def follow(self):
+        """
+        Load the filter and keep it in sync with the revocation log; run as a
+        background task for the lifetime of the worker.
+        """
+        last_id = None
+        loaded = False
+        while True:
+            try:
+                if (
+                    not loaded
+                    or self._bloom.count > settings.REVOCATION_FILTER_CAPACITY
+                ):
+                    last_id = await self.load()
+                    loaded = True
+                query = {"_id": {"$gt": last_id}} if last_id else {}
+                cursor = db[LOG_COLLECTION].find(
+                    query, cursor_type=CursorType.TAILABLE_AWAIT
+                )
+                try:
+                    while cursor.alive:
+                        async for entry in cursor:
+                            self._bloom.add(bytes.fromhex(entry["digest"]))
+                            last_id = entry["_id"]
+                        self._synced = True
+                        if self._bloom.count > settings.REVOCATION_FILTER_CAPACITY:
+                            # Expired tokens are never removed from a Bloom
+                            # filter; rebuild before the error rate degrades.
+                            break
+                finally:
+                    # Free the server-side cursor before another is opened
+                    await cursor.close()
+                # A tailable cursor dies at once on an empty capped collection.
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError:
+                logger.exception("Revocation log tail failed, checking every token")
+                self._synced = False
+                loaded = False
+                await asyncio.sleep(5)
+
+    async def record(self, token: str):
+        """
+        Publish a revocation to the other workers and apply it locally.
+        """
+        self.add(token)
+        await db[LOG_COLLECTION].insert_one({"digest": token_digest(token).hex()})
+
+
+revoked_tokens = RevokedTokenFilter()
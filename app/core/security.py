@@ -4,10 +4,14 @@ from datetime import datetime, timedelta
 from jose import jwt
 from passlib.context import CryptContext
 
-from fastapi import BackgroundTasks
+from fastapi import BackgroundTasks, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from app.core.config import settings
 from app.db.engine import db
+from app.core.cache import LRUCache
+from app.core.hashing import BoundedExecutor, ExecutorSaturated
+from app.core.metrics import JWT_DURATION, PASSWORD_HASH_DURATION, timed
+from app.core.revocation import revoked_tokens, token_digest
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
@@ -16,6 +20,17 @@ ALGORITHM = settings.ALGORITHM
 ACESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 SECRET_KEY = settings.SECRET_KEY
 
+# Claims of recently verified access tokens, so a token presented again skips
+# the signature check and JSON parsing. Entries expire with the token.
+verified_tokens = LRUCache(settings.TOKEN_CACHE_SIZE)
+
+# bcrypt runs here rather than on the event loop; see app/core/hashing.py
+password_hasher = BoundedExecutor(
+    "password-hash",
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+)
+
 
 def create_access_token(data: dict):
     """
@@ -30,10 +45,34 @@ def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    with timed(JWT_DURATION, operation="encode"):
+        encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> dict:
+    """
+    Verify an access token and return its claims, using the verified token
+    cache when possible.
+
+    Args:
+        token (str): The encoded access token.
+
+    Returns:
+        dict: The claims of the token.
+
+    Raises:
+        JWTError: If the token is invalid or expired.
+    """
+    key = token_digest(token)
+    claims = verified_tokens.get(key)
+    if claims is None:
+        with timed(JWT_DURATION, operation="decode"):
+            claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        verified_tokens.set(key, claims, expires_at=claims.get("exp"))
+    return dict(claims)
+
+
 def verify_refresh_token(refresh_token: str):
     try:
         payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
@@ -42,24 +81,61 @@ def verify_refresh_token(refresh_token: str):
         return None
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def _run_password_op(fn, *args):
+    try:
+        return await password_hasher.run(fn, *args)
+    except ExecutorSaturated:
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy, please retry",
+            headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+        )
+
+
+def _timed_verify(plain_password: str, hashed_password: str) -> bool:
+    with timed(PASSWORD_HASH_DURATION, operation="verify"):
+        return pwd_context.verify(plain_password, hashed_password)
+
+
+def _timed_hash(password: str) -> str:
+    with timed(PASSWORD_HASH_DURATION, operation="hash"):
+        return pwd_context.hash(password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Check a password against its bcrypt hash on the password hashing pool.
+
+    Raises:
+        HTTPException: 503 if the pool's queue is full.
+    """
+    return await _run_password_op(_timed_verify, plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    """
+    Hash a password with bcrypt on the password hashing pool.
+
+    Raises:
+        HTTPException: 503 if the pool's queue is full.
+    """
+    return await _run_password_op(_timed_hash, password)
 
 
-def delete_blacklisted_tokens():
+async def delete_blacklisted_tokens():
     current_time = datetime.utcnow()
-    db.blocklist.delete_many({"expire": {"$lt": current_time}})
+    await db.blocklist.delete_many({"expire": {"$lt": current_time}})
 
 
-def blacklist_token(token: str, background_tasks: BackgroundTasks = None):
+async def blacklist_token(token: str, background_tasks: BackgroundTasks = None):
     # Decode the token and get the expiry time
     payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    expire = payload.get("exp")
-    db.blocklist.insert_one({"token": token, "expire": expire})
+    # Stored as a date so the TTL index on `expire` can drop the entry once
+    # the token could no longer be used anyway.
+    expire = datetime.utcfromtimestamp(payload.get("exp"))
+    await db.blocklist.insert_one({"token": token, "expire": expire})
+    await revoked_tokens.record(token)
+    verified_tokens.pop(token_digest(token))
 
     if background_tasks is not None:
         background_tasks.add_task(delete_blacklisted_tokens)
@@ -0,0 +1,238 @@
+"""
+tracing.py
+
+This module contains the per-request phase breakdown sent back in the
+`Server-Timing` header.
+
+A sampled request gets a `Trace` in a context variable; code on its path adds
+time to named phases with `span` or `record`, and the middleware reports the
+totals when the response starts:
+
+- auth: `get_current_user`, including its blocklist lookup
+- db: every MongoDB command, recorded by the command listener in
+  `app.db.monitoring`; Motor copies the context to its executor threads, so
+  the listener sees the request's trace. Overlaps the other phases.
+- validate: what `TracedRoute` does before calling the endpoint, i.e.
+  parsing and validating the request parameters and body, and the route's
+  dependencies other than auth
+- serialize: what `TracedRoute` does after the endpoint returns, i.e.
+  validating the return value against the response model and encoding it
+
+Requests that are not sampled carry no trace, and every span reduces to a
+context variable lookup.
+"""
+import asyncio
+import functools
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+import orjson
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger("app.trace")
+
+
+class Trace:
+    """Phase totals of one request."""
+
+    __slots__ = ("started", "spans", "counts", "_lock")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = {}
+        self.counts = {}
+        # db time is added from Motor's executor threads
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        with self._lock:
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def total(self, name: str) -> float:
+        with self._lock:
+            return self.spans.get(name, 0.0)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def header(self) -> str:
+        """The `Server-Timing` value, durations in milliseconds."""
+        with self._lock:
+            parts = [
+                f'{name};dur={seconds * 1000:.2f};desc="{self.counts[name]}x"'
+                for name, seconds in self.spans.items()
+            ]
+        parts.append(f"total;dur={self.elapsed() * 1000:.2f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+
+
+def record(name: str, seconds: float):
+    """Add `seconds` to phase `name` of the current request, if sampled."""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+
+@contextmanager
+def span(name: str):
+    """Add the time spent in the block to phase `name`, if sampled."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, time.perf_counter() - started)
+
+
+class _RouteTiming:
+    """Marks of one traced request between `TracedRoute` and its endpoint."""
+
+    __slots__ = ("trace", "started", "auth", "returned")
+
+    def __init__(self, trace: Trace):
+        self.trace = trace
+        self.started = time.perf_counter()
+        self.auth = trace.total("auth")
+        self.returned = None
+
+    def entered(self):
+        # Time before the endpoint, less the auth dependency traced apart
+        auth = self.trace.total("auth") - self.auth
+        self.trace.add("validate", time.perf_counter() - self.started - auth)
+
+
+_route_timing: ContextVar[Optional[_RouteTiming]] = ContextVar(
+    "route_timing", default=None
+)
+
+
+def _timed_endpoint(endpoint):
+    # Keeps the endpoint sync or async, since FastAPI calls them differently
+    if asyncio.iscoroutinefunction(endpoint):
+
+        @functools.wraps(endpoint)
+        async def timed(*args, **kwargs):
+            timing = _route_timing.get()
+            if timing is None:
+                return await endpoint(*args, **kwargs)
+            timing.entered()
+            result = await endpoint(*args, **kwargs)
+            timing.returned = time.perf_counter()
+            return result
+
+    else:
+
+        @functools.wraps(endpoint)
+        def timed(*args, **kwargs):
+            timing = _route_timing.get()
+            if timing is None:
+                return endpoint(*args, **kwargs)
+            timing.entered()
+            result = endpoint(*args, **kwargs)
+            timing.returned = time.perf_counter()
+            return result
+
+    timed.traced = True
+    return timed
+
+
+class TracedRoute(APIRoute):
+    """
+    `APIRoute` timing the pydantic work FastAPI does for the route: the time
+    spent before its endpoint is called (validation of its parameters and
+    body) and after it returns (validation and serialization of its response
+    model). Only public `APIRoute` hooks are used.
+    """
+
+    def get_route_handler(self):
+        # The dependant was built from the endpoint's signature already
+        if not getattr(self.dependant.call, "traced", False):
+            self.dependant.call = _timed_endpoint(self.dependant.call)
+        handler = super().get_route_handler()
+
+        async def traced_handler(request):
+            trace = _current.get()
+            if trace is None:
+                return await handler(request)
+            timing = _RouteTiming(trace)
+            token = _route_timing.set(timing)
+            try:
+                response = await handler(request)
+            finally:
+                _route_timing.reset(token)
+            if timing.returned is not None:
+                trace.add("serialize", time.perf_counter() - timing.returned)
+            return response
+
+        return traced_handler
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware tracing a sample of the requests.
+
+    Parameters:
+    - sample_rate (float): Fraction of requests traced, from 0 to 1.
+    - log (bool): Also log each trace as a JSON record on the `app.trace`
+      logger, once the response has been sent.
+    """
+
+    def __init__(self, app, sample_rate: float, log: bool = False):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.log = log
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", trace.header())
+            await send(message)
+
+        token = _current.set(trace)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            if self.log:
+                self._log(scope, status, trace)
+
+    @staticmethod
+    def _log(scope, status: int, trace: Trace):
+        route = scope.get("route")
+        logger.info(
+            orjson.dumps(
+                {
+                    "method": scope["method"],
+                    "route": getattr(route, "path", "unmatched"),
+                    "path": scope["path"],
+                    "status": status,
+                    "duration_ms": trace.elapsed() * 1000,
+                    "spans_ms": {
+                        name: seconds * 1000 for name, seconds in trace.spans.items()
+                    },
+                    "counts": trace.counts,
+                }
+            ).decode()
+        )
@@ -0,0 +1,370 @@
+"""
+bulk_import.py
+
+This module contains the streaming bulk import of developer and company
+profiles, behind the `/import` routes.
+
+The upload is read with `request.stream()` and parsed as it arrives, as
+NDJSON (one JSON object per line) or CSV (a header row, then one profile
+per row). Rows are validated against the route's update model and written in
+chunks of `BULK_IMPORT_CHUNK_SIZE` with one unordered `bulk_write`: a row
+with an email is upserted on that email, so importing a file twice updates
+the profiles instead of duplicating them, and a row without one is
+inserted. Accounts (the documents holding a password) are never matched by
+the upsert. Only one chunk of rows is held in memory at a time, and a record
+longer than `BULK_IMPORT_MAX_RECORD_SIZE` characters fails its row without
+being read whole: reading resumes at the next line, or past the end of the
+quoted CSV cell the limit was reached in.
+
+In CSV, list fields (e.g. `skills`) are split on ";" and a column named
+`socials.LinkedIn` fills the `LinkedIn` key of the `socials` object. Empty
+cells are treated as absent.
+
+The response reports the number of rows read, inserted, updated and failed,
+with the row number (counted from 1, not counting the CSV header or blank
+lines) and the reasons of each failed row, up to `BULK_IMPORT_MAX_ERRORS`.
+"""
+import codecs
+import csv
+import typing
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple, Type
+
+import orjson
+from bson import ObjectId
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.core.config import settings
+from app.db.engine import db
+from app.search.filters import shadow_fields
+
+NDJSON = "ndjson"
+CSV = "csv"
+
+FORMATS = {
+    "application/x-ndjson": NDJSON,
+    "application/jsonl": NDJSON,
+    "application/json-lines": NDJSON,
+    "text/csv": CSV,
+}
+
+# Profiles share the collection with the accounts, which hold the password
+PROFILE = {"password": {"$exists": False}}
+
+# (row number, parsed row, or None and the reason it could not be parsed)
+Row = Tuple[int, Optional[dict], Optional[str]]
+
+
+def import_format(request: Request) -> str:
+    """
+    The upload format named by the request's Content-Type.
+
+    Raises:
+    - HTTPException: 415 if the content type is not NDJSON or CSV.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type not in FORMATS:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Upload NDJSON or CSV, one of: {', '.join(FORMATS)}",
+        )
+    return FORMATS[content_type]
+
+
+async def _text(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    async for chunk in chunks:
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+async def _lines(
+    chunks: AsyncIterator[bytes], max_size: int
+) -> AsyncIterator[Optional[str]]:
+    # Yields None for a line longer than max_size, whose rest is skipped
+    parts, size, skipping = [], 0, False
+    async for text in _text(chunks):
+        start = 0
+        while True:
+            end = text.find("\n", start)
+            piece = text[start:] if end < 0 else text[start:end]
+            if not skipping:
+                size += len(piece)
+                skipping = size > max_size
+                if skipping:
+                    parts = []
+                else:
+                    parts.append(piece)
+            if end < 0:
+                break
+            yield None if skipping else "".join(parts)
+            parts, size, skipping = [], 0, False
+            start = end + 1
+    if skipping:
+        yield None
+    elif size:
+        yield "".join(parts)
+
+
+async def ndjson_rows(
+    chunks: AsyncIterator[bytes], max_size: int
+) -> AsyncIterator[Row]:
+    number = 0
+    async for line in _lines(chunks, max_size):
+        if line is None:
+            number += 1
+            yield number, None, f"Line is longer than {max_size} characters"
+            continue
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = orjson.loads(line)
+        except orjson.JSONDecodeError as e:
+            yield number, None, f"Invalid JSON: {e}"
+            continue
+        if isinstance(row, dict):
+            yield number, row, None
+        else:
+            yield number, None, "Each line must be a JSON object"
+
+
+def _list_fields(model: Type[BaseModel]) -> set:
+    def is_list(annotation) -> bool:
+        if typing.get_origin(annotation) in (list, List):
+            return True
+        return any(is_list(arg) for arg in typing.get_args(annotation))
+
+    return {
+        field.alias or name
+        for name, field in model.model_fields.items()
+        if is_list(field.annotation)
+    }
+
+
+async def csv_rows(
+    chunks: AsyncIterator[bytes], model: Type[BaseModel], max_size: int
+) -> AsyncIterator[Row]:
+    list_fields = _list_fields(model)
+    header = None
+    number = 0
+    record, size, quotes, skipping = [], 0, 0, False
+    async for line in _lines(chunks, max_size):
+        if skipping:
+            # The rest of an overlong record, up to the end of its quoted cell
+            quotes += line.count('"') if line is not None else 0
+            if not quotes % 2:
+                skipping, quotes = False, 0
+            continue
+        # A quoted cell may hold newlines; a record is complete once its
+        # quotes are balanced.
+        if line is not None:
+            size += len(line) + bool(record)
+            record.append(line)
+            quotes += line.count('"')
+        if line is None or size > max_size:
+            if header is None:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"The CSV header is longer than {max_size} characters",
+                )
+            number += 1
+            yield number, None, f"Record is longer than {max_size} characters"
+            skipping = line is not None and quotes % 2 == 1
+            record, size = [], 0
+            if not skipping:
+                quotes = 0
+            continue
+        if quotes % 2:
+            continue
+        text = "\n".join(record).rstrip("\r")
+        record, size, quotes = [], 0, 0
+        if not text.strip():
+            continue
+        cells = next(csv.reader([text]))
+        if header is None:
+            header = [cell.strip() for cell in cells]
+            continue
+        number += 1
+        if len(cells) > len(header):
+            yield number, None, f"Expected {len(header)} cells, got {len(cells)}"
+            continue
+        row = {}
+        for column, cell in zip(header, cells):
+            if cell == "":
+                continue
+            key, _, subkey = column.partition(".")
+            if subkey:
+                row.setdefault(key, {})[subkey] = cell
+            elif key in list_fields:
+                row[key] = [item.strip() for item in cell.split(";") if item.strip()]
+            else:
+                row[key] = cell
+        yield number, row, None
+    if record:
+        number += 1
+        yield number, None, "Unterminated quoted cell"
+
+
+def _write_error(error: dict) -> str:
+    # The unique index may be on the email or on another field (username)
+    key = error.get("keyValue")
+    if error.get("code") == 11000 and key:
+        values = ", ".join(f"{field} {value!r}" for field, value in key.items())
+        return f"{values} is already used by another account"
+    return error.get("errmsg", "Write failed")
+
+
+class ImportReport:
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def fail(self, row: int, errors: List[str]):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "errors": errors})
+
+    def as_dict(self) -> dict:
+        return {
+            "status": "success" if not self.failed else "partial",
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+class BulkImporter:
+    """
+    Imports profiles of one role from a streamed upload.
+
+    Parameters:
+    - model (BaseModel): The model each row is validated against.
+    - role (str): The `role` written on every profile.
+    - filters (dict): The search filters of the role, whose shadow fields
+      are written next to the values.
+    - on_written (callable): Called with the documents of each written
+      chunk, to invalidate caches and update the search index.
+    """
+
+    collection = "UserRegistration"
+
+    def __init__(
+        self,
+        model: Type[BaseModel],
+        role: str,
+        filters: Dict[str, str],
+        on_written: Callable[[List[dict]], None],
+    ):
+        self.model = model
+        self.role = role
+        self.filters = filters
+        self.on_written = on_written
+
+    async def run(self, chunks: AsyncIterator[bytes], fmt: str) -> dict:
+        """
+        Import every row of the upload.
+
+        Parameters:
+        - chunks: The request body, e.g. `request.stream()`.
+        - fmt (str): NDJSON or CSV.
+
+        Returns:
+        - dict: The import report.
+        """
+        report = ImportReport(settings.BULK_IMPORT_MAX_ERRORS)
+        max_size = settings.BULK_IMPORT_MAX_RECORD_SIZE
+        rows = (
+            ndjson_rows(chunks, max_size)
+            if fmt == NDJSON
+            else csv_rows(chunks, self.model, max_size)
+        )
+        batch = []
+        async for number, row, error in rows:
+            report.rows += 1
+            if error is not None:
+                report.fail(number, [error])
+                continue
+            try:
+                profile = self.model.model_validate(row)
+            except ValidationError as e:
+                report.fail(
+                    number,
+                    [
+                        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+                        for err in e.errors()
+                    ],
+                )
+                continue
+            fields = profile.model_dump(by_alias=True, exclude_unset=True)
+            doc = {
+                **fields,
+                **shadow_fields(self.filters, fields),
+                "role": self.role,
+            }
+            batch.append((number, doc))
+            if len(batch) >= settings.BULK_IMPORT_CHUNK_SIZE:
+                await self._write(batch, report)
+                batch = []
+        if batch:
+            await self._write(batch, report)
+        return report.as_dict()
+
+    async def _write(self, batch: List[tuple], report: ImportReport):
+        operations = []
+        for _, doc in batch:
+            if doc.get("email"):
+                operations.append(
+                    UpdateOne(
+                        {"email": doc["email"], "role": self.role, **PROFILE},
+                        {"$set": doc},
+                        upsert=True,
+                    )
+                )
+            else:
+                doc["_id"] = ObjectId()
+                operations.append(InsertOne(doc))
+
+        try:
+            result = await db[self.collection].bulk_write(operations, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+
+        failed = {}
+        for error in details.get("writeErrors", []):
+            failed[error["index"]] = _write_error(error)
+        for index, message in sorted(failed.items()):
+            report.fail(batch[index][0], [message])
+
+        upserted = {item["index"]: item["_id"] for item in details.get("upserted", [])}
+        report.inserted += details.get("nInserted", 0) + len(upserted)
+        report.updated += details.get("nMatched", 0)
+
+        written, matched_emails = [], []
+        for index, (_, doc) in enumerate(batch):
+            if index in failed:
+                continue
+            if "_id" in doc:
+                written.append(doc)
+            elif index in upserted:
+                written.append({**doc, "_id": upserted[index]})
+            else:
+                matched_emails.append(doc["email"])
+        if matched_emails:
+            # Updated profiles are read back whole for the search index
+            written.extend(
+                await db[self.collection]
+                .find({"email": {"$in": matched_emails}, "role": self.role, **PROFILE})
+                .to_list(length=None)
+            )
+        if written:
+            self.on_written(written)
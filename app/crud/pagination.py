@@ -0,0 +1,214 @@
+"""
+pagination.py
+
+This module contains the helpers for keyset (cursor) pagination over MongoDB
+collections.
+
+Pages are walked with a range filter on the sort key and `_id` instead of
+`skip()`, so fetching page 1000 costs the same as fetching page 1. The cursor
+handed to clients is an opaque, URL-safe token holding the position of the
+last document returned.
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from bson import ObjectId, json_util
+from fastapi import HTTPException, Query
+from pymongo import ASCENDING, DESCENDING
+from app.core.config import settings
+
+
+class PageParams:
+    """
+    Query parameters shared by every paginated list endpoint.
+    """
+
+    def __init__(
+        self,
+        limit: int = Query(
+            default=settings.PAGE_SIZE_DEFAULT,
+            ge=1,
+            le=settings.PAGE_SIZE_MAX,
+            description="Maximum number of items to return",
+        ),
+        after: Optional[str] = Query(
+            default=None,
+            description="The `next_cursor` returned by the previous page",
+        ),
+    ):
+        self.limit = limit
+        self.after = after
+
+
+# Types a sort key value may have in a cursor. The value lands in an equality
+# clause, where a document is read as query operators (e.g. {"$ne": null})
+# and a regex (json_util decodes {"$regex": ...} to one) as a pattern.
+SORT_VALUE_TYPES = (str, int, float, bool, datetime, ObjectId, type(None))
+
+
+# The fields of a `fetch_page` cursor, each with the check its value passes
+PAGE_CURSOR: Dict[str, Callable[[Any], bool]] = {
+    "k": lambda key: key is None or isinstance(key, str),
+    "d": lambda direction: type(direction) is int
+    and direction in (ASCENDING, DESCENDING),
+    "v": lambda value: isinstance(value, SORT_VALUE_TYPES),
+    "id": lambda doc_id: isinstance(doc_id, ObjectId),
+}
+
+
+def encode_cursor(state: dict) -> str:
+    raw = json_util.dumps(state).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(
+    cursor: str, fields: Dict[str, Callable[[Any], bool]] = PAGE_CURSOR
+) -> dict:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Parameters:
+    - cursor (str): The cursor sent by the client.
+    - fields (dict): The fields the cursor must hold, each with a check its
+      value must pass; `PAGE_CURSOR` by default.
+
+    Raises:
+    - HTTPException: If the cursor is malformed, holds other fields, or a
+      value fails its check.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if (
+        not isinstance(state, dict)
+        or state.keys() != fields.keys()
+        or not all(check(state[name]) for name, check in fields.items())
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return state
+
+
+def parse_sort(sort: Optional[str], allowed: set) -> Optional[Tuple[str, int]]:
+    """
+    Parse a `sort` query parameter such as `name` or `-name`.
+
+    Parameters:
+    - sort (str): The requested sort key, prefixed with `-` for descending.
+    - allowed (set): The keys the endpoint allows sorting by.
+
+    Returns:
+    - tuple: `(key, direction)`, or None to sort by `_id` only.
+
+    Raises:
+    - HTTPException: If the key is not allowed.
+    """
+    if not sort:
+        return None
+    key = sort.lstrip("-")
+    if key not in allowed:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Cannot sort by '{key}', allowed: {', '.join(sorted(allowed))}",
+        )
+    return key, DESCENDING if sort.startswith("-") else ASCENDING
+
+
+def _after_clause(key: Optional[str], direction: int, value, last_id) -> dict:
+    id_op = "$gt" if direction == ASCENDING else "$lt"
+    if key is None:
+        return {"_id": {id_op: last_id}}
+
+    # MongoDB sorts null/missing values first, so they need their own branch:
+    # ascending pages leave the nulls behind once a value is seen, descending
+    # pages only reach them after every non-null value.
+    if value is None:
+        if direction == ASCENDING:
+            return {"$or": [{key: {"$ne": None}}, {key: None, "_id": {id_op: last_id}}]}
+        return {key: None, "_id": {id_op: last_id}}
+
+    value_op = "$gt" if direction == ASCENDING else "$lt"
+    clauses = [{key: {value_op: value}}, {key: value, "_id": {id_op: last_id}}]
+    if direction == DESCENDING:
+        clauses.append({key: None})
+    return {"$or": clauses}
+
+
+async def fetch_page(
+    collection,
+    query: dict,
+    projection: Optional[dict] = None,
+    *,
+    limit: int,
+    after: Optional[str] = None,
+    sort: Optional[Tuple[str, int]] = None,
+) -> Tuple[list, Optional[str]]:
+    """
+    Fetch one page of documents ordered by `sort` and then `_id`.
+
+    The next cursor is built from `_id` and the sort key. An inclusion
+    projection that leaves the sort key out gets it added for the query, and
+    the key is removed from the returned documents again.
+
+    Parameters:
+    - collection: The Motor collection to read from.
+    - query (dict): The filter for the documents.
+    - projection (dict): The projection to apply.
+    - limit (int): The page size, capped at `PAGE_SIZE_MAX`.
+    - after (str): The cursor of the previous page, if any.
+    - sort (tuple): `(key, direction)` as returned by `parse_sort`.
+
+    Returns:
+    - tuple: The documents of the page and the cursor of the next page, which
+      is None on the last page.
+
+    Raises:
+    - HTTPException: If the cursor is invalid or was issued for another sort.
+    """
+    limit = min(limit, settings.PAGE_SIZE_MAX)
+    key, direction = sort or (None, ASCENDING)
+
+    if after:
+        state = decode_cursor(after)
+        if state["k"] != key or state["d"] != direction:
+            raise HTTPException(
+                status_code=400, detail="Cursor does not match the requested sort"
+            )
+        query = {
+            "$and": [query, _after_clause(key, direction, state["v"], state["id"])]
+        }
+
+    sort_spec = [("_id", direction)]
+    strip_key = False
+    if key is not None:
+        sort_spec.insert(0, (key, direction))
+        if projection and key not in projection and 1 in projection.values():
+            projection = {**projection, key: 1}
+            strip_key = True
+
+    docs = (
+        await collection.find(query, projection)
+        .sort(sort_spec)
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(
+            {
+                "k": key,
+                "d": direction,
+                "v": last.get(key) if key else None,
+                "id": last["_id"],
+            }
+        )
+    if strip_key:
+        for doc in docs:
+            doc.pop(key, None)
+    return docs, next_cursor
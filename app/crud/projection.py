@@ -0,0 +1,91 @@
+"""
+projection.py
+
+This module contains the `fields=` (sparse fieldset) query parameter of the
+read endpoints.
+
+The requested names are validated against the route's response model in
+`app/schemas/` and turned into a MongoDB inclusion projection, so only those
+fields are read, sent over the wire and decoded. Without `fields=`, the
+route's default projection applies. Defaults exclude `password`, and since
+no response model has a `password` field it can never be requested.
+"""
+from dataclasses import dataclass
+from typing import FrozenSet, List, Optional, Type
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+
+
+@dataclass(frozen=True)
+class Fieldset:
+    """
+    The fields a request asked for.
+
+    `names` holds the response model's field names, or is None when the
+    request did not use `fields=` and the default projection applies.
+    """
+
+    projection: dict
+    names: Optional[FrozenSet[str]] = None
+
+    def include(self) -> Optional[set]:
+        """The `include` argument for dumping one response model."""
+        return None if self.names is None else set(self.names)
+
+    def include_page(self) -> Optional[dict]:
+        """The `include` argument for dumping a `Page` of response models."""
+        if self.names is None:
+            return None
+        return {
+            "status": True,
+            "next_cursor": True,
+            "data": {"__all__": set(self.names)},
+        }
+
+
+class FieldsParam:
+    """
+    Dependency parsing `fields=` for one response model.
+
+    Parameters:
+    - model (BaseModel): The response model the names are checked against.
+    - default (dict): The projection used when `fields=` is not given; it
+      must exclude `password`.
+    """
+
+    def __init__(self, model: Type[BaseModel], default: dict):
+        self.model = model
+        self.default = default
+        # field name -> document key; `id` is stored as `_id`
+        self.allowed = {
+            name: field.alias or name for name, field in model.model_fields.items()
+        }
+
+    def __call__(
+        self,
+        fields: Optional[List[str]] = Query(
+            default=None,
+            description="Fields to return, repeated or comma separated, "
+            "e.g. `name,skills`",
+        ),
+    ) -> Fieldset:
+        if not fields:
+            return Fieldset(self.default)
+        names = {name.strip() for value in fields for name in value.split(",")}
+        names.discard("")
+        # `_id` is accepted as a spelling of `id`
+        if "_id" in names:
+            names.discard("_id")
+            names.add("id")
+        unknown = sorted(names - set(self.allowed))
+        if unknown or not names:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Unknown fields: {', '.join(unknown) or '(none given)'}, "
+                f"allowed: {', '.join(sorted(self.allowed))}",
+            )
+        projection = {self.allowed[name]: 1 for name in names if name != "id"}
+        # `_id` always comes back; it is also needed for the page cursor
+        projection.setdefault("_id", 1)
+        return Fieldset(projection, frozenset(names))
@@ -0,0 +1,249 @@
+"""
+bulk.py
+
+This module contains the buffered writer that batches the inserts of the
+public submission routes (waitlist, contact) into `insert_many` calls.
+
+Documents get their `_id` on the client, so a caller knows the ID before the
+document is written. A background task flushes the buffer once it holds
+`max_batch` documents or its oldest document has waited `max_delay` seconds,
+and the buffer is flushed once more when the worker shuts down.
+
+Two durability modes are supported:
+
+- `flushed`: `submit` returns once the batch holding the document has been
+  written, and raises if that document failed.
+- `buffered`: `submit` returns as soon as the document is buffered. Failed
+  writes are only logged, and documents still buffered are lost if the
+  worker dies without a clean shutdown.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+from app.core.config import settings
+from app.db.engine import db
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_MODES = ("flushed", "buffered")
+
+
+class BufferFull(RuntimeError):
+    """Raised when a document is refused because the buffer is full."""
+
+
+class BufferedWriter:
+    """
+    Batches inserts into one collection.
+
+    Parameters:
+    - collection (str): The collection name.
+    - max_batch (int): Documents per `insert_many`.
+    - max_delay (float): Seconds a document waits at most before a flush.
+    - max_buffer (int): Documents buffered at most, including the batch being
+      written; beyond it `submit` raises BufferFull.
+    - durability (str): One of DURABILITY_MODES.
+    - dedupe_key (str): Optional field; a document whose value is already
+      buffered is merged into the buffered one instead of being written.
+    """
+
+    def __init__(
+        self,
+        collection: str,
+        *,
+        max_batch: int,
+        max_delay: float,
+        max_buffer: int,
+        durability: str,
+        dedupe_key: Optional[str] = None,
+    ):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {durability}")
+        self.collection = collection
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_buffer = max_buffer
+        self.durability = durability
+        self.dedupe_key = dedupe_key
+        self._docs = []
+        self._futures = []
+        # dedupe value -> (_id, future) of the buffered document
+        self._keys = {}
+        self._writing = 0
+        self._pending = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.submitted = 0
+        self.merged = 0
+        self.rejected = 0
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+        self.flush_time_total_ms = 0.0
+        self.flush_time_max_ms = 0.0
+
+    def start(self):
+        """Start the background flusher on the running loop."""
+        if self._task is None:
+            self._closing = False
+            # Events created before the loop started are rebound here.
+            self._pending = asyncio.Event()
+            self._full = asyncio.Event()
+            if self._docs:
+                self._pending.set()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Stop the flusher and write whatever is still buffered."""
+        if self._task is not None:
+            # Woken rather than cancelled, so a batch being written is never
+            # abandoned with its submitters still waiting.
+            self._closing = True
+            self._pending.set()
+            self._full.set()
+            await self._task
+            self._task = None
+        while self._docs:
+            await self.flush()
+
+    async def submit(self, doc: dict) -> ObjectId:
+        """
+        Buffer `doc` for insertion and return its `_id`.
+
+        Raises:
+        - BufferFull: If `max_buffer` documents are already waiting.
+        - PyMongoError: In `flushed` mode, if the document was not written.
+        """
+        future = None
+        key = doc.get(self.dedupe_key) if self.dedupe_key else None
+        if key is not None and key in self._keys:
+            self.merged += 1
+            doc_id, future = self._keys[key]
+        else:
+            if len(self._docs) + self._writing >= self.max_buffer:
+                self.rejected += 1
+                raise BufferFull(f"{self.collection} write buffer is full")
+            doc_id = doc.setdefault("_id", ObjectId())
+            if self.durability == "flushed":
+                future = asyncio.get_running_loop().create_future()
+            self._docs.append(doc)
+            self._futures.append(future)
+            if key is not None:
+                self._keys[key] = (doc_id, future)
+            self.submitted += 1
+            self._pending.set()
+            if len(self._docs) >= self.max_batch:
+                self._full.set()
+
+        if self._task is None:
+            # No flusher running (e.g. a script without the app lifespan)
+            await self.flush()
+        if future is not None:
+            await asyncio.shield(future)
+        return doc_id
+
+    async def flush(self):
+        """Write the buffered documents in one unordered `insert_many`."""
+        docs, futures = self._docs, self._futures
+        self._docs, self._futures, self._keys = [], [], {}
+        self._pending.clear()
+        self._full.clear()
+        if not docs:
+            return
+
+        errors = {}
+        started = time.perf_counter()
+        self._writing += len(docs)
+        try:
+            await db[self.collection].insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                errors[error["index"]] = (
+                    DuplicateKeyError(error.get("errmsg"), error.get("code"))
+                    if error.get("code") == 11000
+                    else PyMongoError(error.get("errmsg"))
+                )
+        except Exception as e:
+            errors = dict.fromkeys(range(len(docs)), e)
+        finally:
+            self._writing -= len(docs)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.batches += 1
+        self.written += len(docs) - len(errors)
+        self.failed += len(errors)
+        self.flush_time_total_ms += elapsed_ms
+        self.flush_time_max_ms = max(self.flush_time_max_ms, elapsed_ms)
+        # A duplicate of a unique key is already stored, so it is not lost
+        lost = [e for e in errors.values() if not isinstance(e, DuplicateKeyError)]
+        if lost and self.durability == "buffered":
+            logger.error(
+                "Lost %d of %d buffered %s documents: %s",
+                len(lost),
+                len(docs),
+                self.collection,
+                lost[0],
+            )
+
+        for index, future in enumerate(futures):
+            if future is None or future.done():
+                continue
+            if index in errors:
+                future.set_exception(errors[index])
+            else:
+                future.set_result(None)
+
+    async def _run(self):
+        while not self._closing:
+            await self._pending.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), self.max_delay)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Flushing the %s buffer failed", self.collection)
+
+    def stats(self) -> dict:
+        batches = self.batches
+        return {
+            "durability": self.durability,
+            "buffered": len(self._docs),
+            "writing": self._writing,
+            "max_batch": self.max_batch,
+            "max_buffer": self.max_buffer,
+            "submitted": self.submitted,
+            "merged_duplicates": self.merged,
+            "rejected": self.rejected,
+            "batches": batches,
+            "written": self.written,
+            "failed": self.failed,
+            "avg_batch_size": (
+                (self.written + self.failed) / batches if batches else 0.0
+            ),
+            "flush_time_avg_ms": (
+                self.flush_time_total_ms / batches if batches else 0.0
+            ),
+            "flush_time_max_ms": self.flush_time_max_ms,
+        }
+
+
+def _make_writer(collection: str, dedupe_key: Optional[str] = None):
+    return BufferedWriter(
+        collection,
+        max_batch=settings.BULK_WRITE_MAX_BATCH,
+        max_delay=settings.BULK_WRITE_MAX_DELAY_MS / 1000,
+        max_buffer=settings.BULK_WRITE_MAX_BUFFER,
+        durability=settings.BULK_WRITE_DURABILITY,
+        dedupe_key=dedupe_key,
+    )
+
+
+waitlist_writer = _make_writer("waitlist", dedupe_key="email")
+contact_writer = _make_writer("contact")
@@ -1,21 +1,67 @@
-from pymongo import MongoClient
-from pymongo.errors import ServerSelectionTimeoutError
+from motor.motor_asyncio import AsyncIOMotorClient
 from app.core.config import settings
+from app.db.monitoring import command_metrics, pool_stats
+from app.db.slow_queries import slow_queries
 
 
 class Database:
-    def __init__(self, uri: str, db_name: str):
-        self.client = MongoClient(uri)
-        self.db = self.client[db_name]
+    """
+    Process-wide handle to the MongoDB database.
 
+    The client is opened and closed by the application lifespan (see
+    `app.main.create_app`); collections are reached as attributes, e.g.
+    `db.UserRegistration`, once it is connected.
+    """
 
-db = Database(settings.MONGODB_URI, settings.MONGODB_NAME).db
+    def __init__(self):
+        self.client = None
+        self._db = None
 
+    def connect(self, uri: str, db_name: str):
+        options = {
+            "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+            "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+            "waitQueueTimeoutMS": settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+            "maxIdleTimeMS": settings.MONGODB_MAX_IDLE_TIME_MS,
+        }
+        # Motor runs every pymongo call on a thread pool and hands back an
+        # awaitable, so route handlers no longer block the event loop.
+        self.client = AsyncIOMotorClient(
+            uri,
+            event_listeners=[pool_stats, command_metrics, slow_queries],
+            **{k: v for k, v in options.items() if v is not None},
+        )
+        self._db = self.client[db_name]
 
-def check_db_connection():
-    try:
-        # The ismaster command is cheap and does not require auth.
-        db.command("ismaster")
-        return {"status": "Database is connected"}
-    except ServerSelectionTimeoutError as e:
-        return {"status": "Database connection failed", "exception": str(e)}
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+        self.client = None
+        self._db = None
+
+    async def command(self, *args, **kwargs):
+        return await self._get_db().command(*args, **kwargs)
+
+    async def admin_command(self, *args, **kwargs):
+        if self.client is None:
+            raise RuntimeError("Database is not connected")
+        return await self.client.admin.command(*args, **kwargs)
+
+    async def create_collection(self, name: str, **kwargs):
+        return await self._get_db().create_collection(name, **kwargs)
+
+    def _get_db(self):
+        if self._db is None:
+            raise RuntimeError("Database is not connected")
+        return self._db
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self._get_db()[name]
+
+    def __getitem__(self, name: str):
+        return self._get_db()[name]
+
+
+db = Database()
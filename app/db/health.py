@@ -0,0 +1,191 @@
+"""
+health.py
+
+This module contains the background health monitor of a worker.
+
+The monitor pings MongoDB on an interval and keeps the outcome in memory,
+together with the connection pool saturation and, on a replica set, the
+replication lag. The liveness, readiness and root routes answer from that
+state, so a load balancer probing them costs no database round trip, and an
+unreachable database never holds a probe for the server selection timeout.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from pymongo.errors import PyMongoError
+from app.core.config import settings
+from app.db.engine import db
+from app.db.monitoring import pool_stats
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """
+    Periodically probes the database and caches the result.
+
+    Parameters:
+    - interval (float): Seconds between probes.
+    - timeout (float): Seconds a probe may take before the database counts as
+      unreachable.
+    - max_replication_lag (float): Lag, in seconds, beyond which the worker
+      reports not ready; None only reports the lag.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        timeout: float,
+        max_replication_lag: Optional[float] = None,
+    ):
+        self.interval = interval
+        self.timeout = timeout
+        self.max_replication_lag = max_replication_lag
+        self.started_at = time.monotonic()
+        self.checked_at: Optional[float] = None
+        self.checked_at_wall: Optional[datetime] = None
+        self.reachable = False
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.consecutive_failures = 0
+        self.replication: Optional[dict] = None
+
+    async def probe(self):
+        """Ping the database once and record the outcome."""
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(db.command("ping"), self.timeout)
+        except (asyncio.TimeoutError, PyMongoError, RuntimeError) as e:
+            if self.reachable or self.checked_at is None:
+                logger.warning("Database health probe failed: %r", e)
+            self._failed(e)
+            return
+        self.reachable = True
+        self.latency_ms = (time.perf_counter() - started) * 1000
+        self.error = None
+        self.consecutive_failures = 0
+        self.replication = await self._replication()
+        self._checked()
+
+    def _failed(self, error: BaseException):
+        self.reachable = False
+        self.latency_ms = None
+        self.error = repr(error)
+        self.consecutive_failures += 1
+        self._checked()
+
+    def _checked(self):
+        self.checked_at = time.monotonic()
+        self.checked_at_wall = datetime.now(timezone.utc)
+
+    async def _replication(self) -> Optional[dict]:
+        # Lag is the distance of the slowest secondary from the primary's
+        # last applied operation; standalone servers report none.
+        try:
+            hello = await asyncio.wait_for(db.admin_command("hello"), self.timeout)
+            if "setName" not in hello:
+                return None
+            status = await asyncio.wait_for(
+                db.admin_command("replSetGetStatus"), self.timeout
+            )
+        except Exception as e:
+            # e.g. the user lacks the clusterMonitor role; the lag is only
+            # reported, so this never fails the probe
+            return {"set_name": None, "lag_seconds": None, "error": repr(e)}
+
+        members = status.get("members", [])
+        primary = [m["optimeDate"] for m in members if m.get("stateStr") == "PRIMARY"]
+        secondaries = [
+            m["optimeDate"] for m in members if m.get("stateStr") == "SECONDARY"
+        ]
+        lag = None
+        if primary and secondaries:
+            lag = max((primary[0] - optime).total_seconds() for optime in secondaries)
+        return {
+            "set_name": status.get("set"),
+            "members": len(members),
+            "secondaries": len(secondaries),
+            "lag_seconds": lag,
+            "error": None,
+        }
+
+    async def run(self):
+        """Probe forever; started by the application lifespan."""
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:
+                # An unexpected error fails this check, not the monitor
+                logger.exception("Database health probe raised")
+                self._failed(e)
+            await asyncio.sleep(self.interval)
+
+    def is_stale(self) -> bool:
+        return (
+            self.checked_at is None
+            or time.monotonic() - self.checked_at > 3 * self.interval + self.timeout
+        )
+
+    def snapshot(self) -> dict:
+        """
+        The cached health of the worker.
+
+        `ready` is false until the first probe succeeds, when the last probe
+        failed or is older than three intervals, and when the replication lag
+        exceeds `max_replication_lag`.
+        """
+        pool = pool_stats.snapshot()
+        lag = (self.replication or {}).get("lag_seconds")
+        lagging = (
+            self.max_replication_lag is not None
+            and lag is not None
+            and lag > self.max_replication_lag
+        )
+        # Requests queue for a connection once every pooled one is in use
+        saturated = pool["waiting"] > 0 or (pool["utilization"] or 0) >= 1
+        ready = self.reachable and not self.is_stale() and not lagging
+
+        if self.checked_at is None:
+            status = "starting"
+        elif not ready:
+            status = "unavailable"
+        elif saturated:
+            status = "degraded"
+        else:
+            status = "ok"
+        return {
+            "status": status,
+            "ready": ready,
+            "checked_at": (
+                self.checked_at_wall.isoformat() if self.checked_at_wall else None
+            ),
+            "check_age_seconds": (
+                time.monotonic() - self.checked_at if self.checked_at else None
+            ),
+            "database": {
+                "reachable": self.reachable,
+                "latency_ms": self.latency_ms,
+                "consecutive_failures": self.consecutive_failures,
+                "error": self.error,
+            },
+            "pool": {
+                "utilization": pool["utilization"],
+                "checked_out": pool["checked_out"],
+                "waiting": pool["waiting"],
+                "checkout_timeouts": pool["checkout_timeouts"],
+            },
+            "replication": self.replication,
+        }
+
+    def uptime(self) -> float:
+        return time.monotonic() - self.started_at
+
+
+health_monitor = HealthMonitor(
+    settings.HEALTH_CHECK_INTERVAL_SECONDS,
+    settings.HEALTH_CHECK_TIMEOUT_SECONDS,
+    settings.HEALTH_MAX_REPLICATION_LAG_SECONDS,
+)
@@ -0,0 +1,269 @@
+"""
+indexes.py
+
+This module contains the declarative registry of the MongoDB indexes the
+application relies on, and the code that applies it.
+
+`ensure_indexes` is idempotent: it creates the declared indexes that are
+missing and reports, without touching them, indexes whose definition drifted
+from the registry and indexes that exist but are not declared here. It runs
+at startup when `MONGODB_ENSURE_INDEXES` is set, and from the command line:
+
+    python -m app.db.indexes           # create missing indexes, report drift
+    python -m app.db.indexes --check   # report only, exit 1 on any difference
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+from app.core.config import settings
+from app.db.engine import db
+
+logger = logging.getLogger(__name__)
+
+# Options compared when looking for drift between the registry and the server.
+_MANAGED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+# Profiles are stored next to the accounts in UserRegistration, often with
+# the email their owner registered with, so only account documents (the ones
+# holding a password hash) are unique on username and email. Lookups must
+# repeat the filter (`_ACCOUNT`) for the planner to use these partial indexes.
+_NON_EMPTY_STRING = {"$gt": ""}
+_ACCOUNT = {"password": {"$exists": True}}
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: List[Tuple[str, int]]
+    name: str
+    options: dict = field(default_factory=dict)
+    # The app relies on the index for correctness, not only speed: a worker
+    # refuses to start without it, see `check_required_indexes`.
+    required: bool = False
+
+
+INDEXES = [
+    # register_user / login look accounts up by username or email, and
+    # register_user relies on these to reject taken names.
+    IndexSpec(
+        "UserRegistration",
+        [("username", ASCENDING)],
+        "username_unique",
+        {
+            "unique": True,
+            "partialFilterExpression": {"username": _NON_EMPTY_STRING, **_ACCOUNT},
+        },
+        required=True,
+    ),
+    IndexSpec(
+        "UserRegistration",
+        [("email", ASCENDING)],
+        "email_unique",
+        {
+            "unique": True,
+            "partialFilterExpression": {"email": _NON_EMPTY_STRING, **_ACCOUNT},
+        },
+        required=True,
+    ),
+    # Developer and company listings filter on role and page by _id or by
+    # one of the allowed sort keys.
+    IndexSpec("UserRegistration", [("role", ASCENDING), ("_id", ASCENDING)], "role_id"),
+    IndexSpec(
+        "UserRegistration",
+        [("role", ASCENDING), ("name", ASCENDING), ("_id", ASCENDING)],
+        "role_name_id",
+    ),
+    IndexSpec(
+        "UserRegistration",
+        [("role", ASCENDING), ("location", ASCENDING), ("_id", ASCENDING)],
+        "developer_location_id",
+        {"partialFilterExpression": {"role": "developer"}},
+    ),
+    IndexSpec(
+        "UserRegistration",
+        [("role", ASCENDING), ("industry", ASCENDING), ("_id", ASCENDING)],
+        "company_industry_id",
+        {"partialFilterExpression": {"role": "company"}},
+    ),
+    # Structured search filters, see app/search/filters.py. Array filters use
+    # multikey indexes; prefix filters run as range scans on the `_lc` copies.
+    IndexSpec(
+        "UserRegistration",
+        [("role", ASCENDING), ("skills_lc", ASCENDING)],
+        "role_skills",
+    ),
+    IndexSpec(
+        "UserRegistration",
+        [("role", ASCENDING), ("developer_role", ASCENDING), ("_id", ASCENDING)],
+        "role_developer_role_id",
+    ),
+    IndexSpec(
+        "UserRegistration",
+        [("role", ASCENDING), ("location_lc", ASCENDING), ("_id", ASCENDING)],
+        "role_location_lc_id",
+    ),
+    IndexSpec(
+        "UserRegistration",
+        [("role", ASCENDING), ("name_lc", ASCENDING), ("_id", ASCENDING)],
+        "role_name_lc_id",
+    ),
+    IndexSpec(
+        "UserRegistration",
+        [("role", ASCENDING), ("industry_lc", ASCENDING), ("_id", ASCENDING)],
+        "role_industry_lc_id",
+    ),
+    # get_current_user checks every bearer token against the blocklist, and
+    # entries are dropped by the server once the token has expired.
+    IndexSpec("blocklist", [("token", ASCENDING)], "token"),
+    IndexSpec(
+        "blocklist", [("expire", ASCENDING)], "expire_ttl", {"expireAfterSeconds": 0}
+    ),
+    # Common Opening filters and the job list sort keys.
+    IndexSpec("Opening", [("status", ASCENDING), ("_id", ASCENDING)], "status_id"),
+    IndexSpec("Opening", [("skills_needed_lc", ASCENDING)], "skills_needed_lc"),
+    IndexSpec("Opening", [("job_role", ASCENDING), ("_id", ASCENDING)], "job_role_id"),
+    IndexSpec(
+        "Opening", [("job_role_lc", ASCENDING), ("_id", ASCENDING)], "job_role_lc_id"
+    ),
+    IndexSpec(
+        "Opening",
+        [("no_of_openings", ASCENDING), ("_id", ASCENDING)],
+        "no_of_openings_id",
+    ),
+    IndexSpec("waitlist", [("email", ASCENDING)], "email_unique", {"unique": True}),
+    IndexSpec("contact", [("email", ASCENDING)], "email"),
+]
+
+
+def _normalize(value):
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _describe(keys, options: dict) -> dict:
+    described = {"key": _normalize(list(keys))}
+    for option in _MANAGED_OPTIONS:
+        if options.get(option) is not None:
+            described[option] = _normalize(options[option])
+    return described
+
+
+async def ensure_indexes(apply: bool = True) -> dict:
+    """
+    Compare the registry with the server and create what is missing.
+
+    Parameters:
+    - apply (bool): Create missing indexes; when False only report.
+
+    Returns:
+    - dict: Index names per collection under `created`, `missing`, `drifted`,
+      `unmanaged` and `failed`.
+    """
+    report = {
+        "created": [],
+        "missing": [],
+        "drifted": [],
+        "unmanaged": [],
+        "failed": [],
+    }
+    collections = sorted({spec.collection for spec in INDEXES})
+
+    for collection_name in collections:
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        declared = [spec for spec in INDEXES if spec.collection == collection_name]
+
+        for spec in declared:
+            qualified = f"{collection_name}.{spec.name}"
+            current = existing.get(spec.name)
+            if current is not None:
+                if _describe(current["key"], current) != _describe(
+                    spec.keys, spec.options
+                ):
+                    report["drifted"].append(qualified)
+                continue
+            if not apply:
+                report["missing"].append(qualified)
+                continue
+            try:
+                await collection.create_index(spec.keys, name=spec.name, **spec.options)
+                report["created"].append(qualified)
+            except OperationFailure as e:
+                # e.g. duplicate values blocking a unique index, or an index
+                # with the same keys under another name.
+                logger.error("Could not create index %s: %s", qualified, e)
+                report["failed"].append(qualified)
+
+        declared_names = {spec.name for spec in declared}
+        report["unmanaged"].extend(
+            f"{collection_name}.{name}"
+            for name in existing
+            if name != "_id_" and name not in declared_names
+        )
+
+    for kind in ("drifted", "unmanaged", "failed"):
+        if report[kind]:
+            logger.warning("Indexes %s: %s", kind, ", ".join(report[kind]))
+    return report
+
+
+async def check_required_indexes():
+    """
+    Make sure every index marked `required` exists with its unique option.
+
+    Raises:
+    - RuntimeError: Naming the required indexes that are missing, e.g. because
+      `MONGODB_ENSURE_INDEXES` is off or building them failed.
+    """
+    missing = []
+    for collection_name in sorted({spec.collection for spec in INDEXES}):
+        existing = await db[collection_name].index_information()
+        for spec in INDEXES:
+            if not spec.required or spec.collection != collection_name:
+                continue
+            current = existing.get(spec.name)
+            if current is None or bool(current.get("unique")) != bool(
+                spec.options.get("unique")
+            ):
+                missing.append(f"{collection_name}.{spec.name}")
+    if missing:
+        raise RuntimeError(
+            f"Required indexes are missing: {', '.join(missing)}. "
+            "Run `python -m app.db.indexes` to create them."
+        )
+
+
+async def _main(check: bool) -> int:
+    db.connect(settings.MONGODB_URI, settings.MONGODB_NAME)
+    try:
+        report = await ensure_indexes(apply=not check)
+    finally:
+        db.close()
+
+    for kind, names in report.items():
+        for name in names:
+            print(f"{kind:<10} {name}")
+    differences = report["missing"] + report["drifted"] + report["failed"]
+    return 1 if differences else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply the MongoDB index registry")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="only report missing and drifted indexes, exit 1 if any",
+    )
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_main(args.check)))
@@ -0,0 +1,159 @@
+"""
+monitoring.py
+
+This module contains the pymongo event listeners used to observe the MongoDB
+connection pool, so the pool can be sized per worker from real numbers, and
+the commands sent to the server, whose timings are exported as Prometheus
+metrics.
+"""
+import threading
+import time
+
+from pymongo import monitoring
+from pymongo.monitoring import ConnectionCheckOutFailedReason
+from app.core import tracing
+from app.core.metrics import MONGODB_COMMAND_DURATION
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """
+    Aggregates connection pool events into counters and gauges.
+
+    pymongo fires these events on the thread that performs the checkout (one
+    of Motor's executor threads), so the wait start time is kept in a
+    thread-local and all shared counters are guarded by a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.max_pool_size = None
+        self.open_connections = 0
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_failures = 0
+        self.wait_time_total_ms = 0.0
+        self.wait_time_max_ms = 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            checkouts = self.checkouts
+            return {
+                "max_pool_size": self.max_pool_size,
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "utilization": (
+                    self.checked_out / self.max_pool_size
+                    if self.max_pool_size
+                    else None
+                ),
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "checkouts": checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_failures": self.checkout_failures,
+                "wait_time_avg_ms": (
+                    self.wait_time_total_ms / checkouts if checkouts else 0.0
+                ),
+                "wait_time_max_ms": self.wait_time_max_ms,
+            }
+
+    def pool_created(self, event):
+        with self._lock:
+            self.max_pool_size = event.options.get("maxPoolSize")
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.checkout_failures += 1
+            if event.reason == ConnectionCheckOutFailedReason.TIMEOUT:
+                self.checkout_timeouts += 1
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        waited_ms = (time.perf_counter() - started) * 1000 if started else 0.0
+        with self._lock:
+            self.waiting -= 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+            self.checkouts += 1
+            self.wait_time_total_ms += waited_ms
+            self.wait_time_max_ms = max(self.wait_time_max_ms, waited_ms)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+
+pool_stats = PoolStatsListener()
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """
+    Records the duration of every MongoDB command per collection and command
+    name in `MONGODB_COMMAND_DURATION`, and in the `db` phase of the current
+    request's trace.
+
+    The collection is only known from the started event, so it is kept by
+    request ID until the command succeeds or fails.
+    """
+
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        if event.command_name == "getMore":
+            collection = event.command.get("collection")
+        else:
+            collection = event.command.get(event.command_name)
+        self._collections[event.request_id] = (
+            collection if isinstance(collection, str) else ""
+        )
+
+    def succeeded(self, event):
+        self._observe(event, "success")
+
+    def failed(self, event):
+        self._observe(event, "failure")
+
+    def _observe(self, event, outcome: str):
+        collection = self._collections.pop(event.request_id, "")
+        seconds = event.duration_micros / 1_000_000
+        MONGODB_COMMAND_DURATION.labels(
+            collection, event.command_name, outcome
+        ).observe(seconds)
+        tracing.record("db", seconds)
+
+
+command_metrics = CommandMetricsListener()
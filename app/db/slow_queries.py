@@ -0,0 +1,297 @@
+"""
+slow_queries.py
+
+This module contains the slow query log: a pymongo CommandListener that
+records every command slower than SLOW_QUERY_THRESHOLD_MS in a bounded
+in-memory ring, read through `/stats/slow-queries`.
+
+Commands are recorded with the shape of their filter: field names and
+operators are kept, values are replaced by "?", so the log can be shown
+without exposing user data. Commands without a filter (inserts, getMore)
+are recorded too, with a null shape; inserts also note their number of
+documents, so slow `insert_many` flushes show up. Once the same shape has been slow
+SLOW_QUERY_EXPLAIN_AFTER times, the command is run again once with
+`explain` at `executionStats` verbosity, in the background, to capture the
+winning plan and the documents examined against the documents returned.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Optional
+
+from bson import json_util
+from pymongo import monitoring
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Reads that explain can run without side effects; writes and getMore are
+# logged but never explained.
+EXPLAINABLE = {"find", "aggregate", "count", "distinct"}
+
+# Keys added by the driver that explain does not accept
+DRIVER_FIELDS = {
+    "$db",
+    "lsid",
+    "$clusterTime",
+    "txnNumber",
+    "$readPreference",
+    "readConcern",
+    "cursor",
+}
+
+
+def redact(value):
+    """Replace every value in a filter with "?", keeping keys and operators."""
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        # The shape of a list does not depend on its length
+        return [redact(value[0])] if value else []
+    return "?"
+
+
+def command_shape(command_name: str, command: dict) -> Optional[dict]:
+    """The redacted filter (and sort) of a command, or None if it has none."""
+    if command_name == "find":
+        shape = {"filter": redact(command.get("filter", {}))}
+        if command.get("sort"):
+            shape["sort"] = dict(command["sort"])
+        return shape
+    if command_name == "aggregate":
+        return {"pipeline": redact(command.get("pipeline", []))}
+    if command_name in ("count", "distinct", "findAndModify"):
+        return {"filter": redact(command.get("query", {}))}
+    if command_name in ("update", "delete"):
+        statements = command.get("updates") or command.get("deletes") or []
+        return {"filter": redact([s.get("q", {}) for s in statements])}
+    return None
+
+
+def command_collection(command_name: str, command: dict) -> Optional[str]:
+    # getMore names its cursor first and its collection in "collection"
+    collection = command.get(
+        "collection" if command_name == "getMore" else command_name
+    )
+    return collection if isinstance(collection, str) else None
+
+
+def _winning_stages(plan: dict) -> list:
+    stages = []
+    while plan:
+        stage = plan.get("stage")
+        if stage == "IXSCAN":
+            stage = f"IXSCAN {plan.get('indexName')}"
+        stages.append(stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return stages
+
+
+def summarize_explain(result: dict) -> dict:
+    """Reduce an `executionStats` explain result to its key numbers."""
+    if "executionStats" not in result and result.get("stages"):
+        # aggregate: the query part of the pipeline runs in its $cursor stage
+        result = result["stages"][0].get("$cursor", {})
+    stats = result.get("executionStats", {})
+    planner = result.get("queryPlanner", {})
+    returned = stats.get("nReturned", 0)
+    examined = stats.get("totalDocsExamined", 0)
+    return {
+        "plan": _winning_stages(planner.get("winningPlan", {})),
+        "docs_examined": examined,
+        "keys_examined": stats.get("totalKeysExamined", 0),
+        "docs_returned": returned,
+        "examined_per_returned": examined / returned if returned else None,
+        "execution_time_ms": stats.get("executionTimeMillis"),
+    }
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    """
+    Records commands slower than a threshold.
+
+    pymongo calls the listener on Motor's executor threads, so the shared
+    state is guarded by a lock and explains are handed to the event loop
+    captured by `start`.
+
+    Parameters:
+    - threshold_ms (float): Commands at least this slow are recorded; 0
+      disables the log.
+    - size (int): Slow commands kept in the ring.
+    - explain_after (int): Slow occurrences of a shape before it is
+      explained; 0 disables explains.
+    - max_shapes (int): Distinct shapes tracked; the least recently slow ones
+      are forgotten first.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float,
+        size: int,
+        explain_after: int,
+        max_shapes: int = 1_000,
+    ):
+        self.threshold_ms = threshold_ms
+        self.explain_after = explain_after
+        self.max_shapes = max_shapes
+        self._lock = threading.Lock()
+        self._started = {}
+        self._ring = deque(maxlen=size)
+        self._shapes = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._explain = None
+
+    def start(self, explain):
+        """
+        Enable explain capture on the running loop.
+
+        Args:
+            explain: Coroutine function running a command document against
+                the application database.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._explain = explain
+
+    def stop(self):
+        self._loop = None
+        self._explain = None
+
+    def started(self, event):
+        if not self.threshold_ms or event.command_name == "explain":
+            return
+        command = event.command
+        # Only explainable reads are kept whole; inserts keep their count, so
+        # no write payload stays referenced while the command runs.
+        self._started[event.request_id] = (
+            command_collection(event.command_name, command),
+            command_shape(event.command_name, command),
+            command if event.command_name in EXPLAINABLE else None,
+            (
+                len(command.get("documents", []))
+                if event.command_name == "insert"
+                else None
+            ),
+        )
+
+    def succeeded(self, event):
+        self._finish(event, None)
+
+    def failed(self, event):
+        self._finish(event, event.failure)
+
+    def _finish(self, event, failure):
+        started = self._started.pop(event.request_id, None)
+        duration_ms = event.duration_micros / 1000
+        if started is None or duration_ms < self.threshold_ms:
+            return
+        collection, shape, command, documents = started
+        shape_json = json_util.dumps(shape, sort_keys=True)
+        key = (collection, event.command_name, shape_json)
+        now = datetime.now(timezone.utc)
+        entry = {
+            "at": now.isoformat(),
+            "collection": collection,
+            "command": event.command_name,
+            "duration_ms": duration_ms,
+            "shape": shape,
+            "failed": failure is not None,
+        }
+        if documents is not None:
+            entry["documents"] = documents
+        if failure is None and event.command_name == "find":
+            entry["docs_returned"] = len(
+                (event.reply.get("cursor") or {}).get("firstBatch", [])
+            )
+
+        with self._lock:
+            self._ring.append(entry)
+            offender = self._shapes.pop(key, None)
+            if offender is None:
+                offender = {
+                    "collection": collection,
+                    "command": event.command_name,
+                    "shape": shape,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "explain": None,
+                }
+            offender["count"] += 1
+            offender["total_ms"] += duration_ms
+            offender["max_ms"] = max(offender["max_ms"], duration_ms)
+            offender["last_seen"] = entry["at"]
+            self._shapes[key] = offender
+            while len(self._shapes) > self.max_shapes:
+                self._shapes.popitem(last=False)
+            explain_now = (
+                self.explain_after
+                and offender["count"] == self.explain_after
+                and command is not None
+                and shape is not None
+                and self._loop is not None
+                and not self._writes(command)
+            )
+
+        logger.warning(
+            "Slow %s on %s: %.1fms %s",
+            event.command_name,
+            collection,
+            duration_ms,
+            shape_json,
+        )
+        if explain_now:
+            self._loop.call_soon_threadsafe(
+                lambda: asyncio.ensure_future(self._capture(key, command))
+            )
+
+    @staticmethod
+    def _writes(command: dict) -> bool:
+        stages = command.get("pipeline") or []
+        return any("$out" in stage or "$merge" in stage for stage in stages)
+
+    async def _capture(self, key: tuple, command: dict):
+        explain = self._explain
+        if explain is None:
+            return
+        query = {k: v for k, v in command.items() if k not in DRIVER_FIELDS}
+        started = time.perf_counter()
+        try:
+            result = await explain({"explain": query, "verbosity": "executionStats"})
+            summary = summarize_explain(result)
+        except Exception as e:
+            summary = {"error": repr(e)}
+        summary["captured_at"] = datetime.now(timezone.utc).isoformat()
+        summary["explain_ms"] = (time.perf_counter() - started) * 1000
+        with self._lock:
+            if key in self._shapes:
+                self._shapes[key]["explain"] = summary
+        logger.warning("Explained slow %s on %s: %s", key[1], key[0], summary)
+
+    def snapshot(self) -> dict:
+        """
+        The recorded slow commands.
+
+        Returns:
+        - dict: The threshold, the ring newest first, and the tracked shapes
+          ordered by the time they spent being slow.
+        """
+        with self._lock:
+            recent = list(reversed(self._ring))
+            shapes = [dict(offender) for offender in self._shapes.values()]
+        shapes.sort(key=lambda offender: offender["total_ms"], reverse=True)
+        return {
+            "threshold_ms": self.threshold_ms,
+            "explain_after": self.explain_after,
+            "recent": recent,
+            "shapes": shapes,
+        }
+
+
+slow_queries = SlowQueryLog(
+    settings.SLOW_QUERY_THRESHOLD_MS,
+    settings.SLOW_QUERY_LOG_SIZE,
+    settings.SLOW_QUERY_EXPLAIN_AFTER,
+)
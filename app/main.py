@@ -1,41 +1,164 @@
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import HTMLResponse, Response
 from starlette.middleware.cors import CORSMiddleware
-from pymongo.errors import ServerSelectionTimeoutError
-from functools import lru_cache
 from app.core.config import settings
-from app.db.engine import check_db_connection
+from app.db.engine import db
+from app.db.health import health_monitor
+from app.db.slow_queries import slow_queries
+from app.db.indexes import check_required_indexes, ensure_indexes
+from app.search import engine as search_engine
+from app.core.revocation import revoked_tokens
+from app.core.security import password_hasher
+from app.db.bulk import contact_writer, waitlist_writer
 from app.api.api_v1.api import api_router
+from app.api.responses import FastJSONResponse
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.tracing import TracedRoute, TracingMiddleware
 
 
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json",
-)
-
-# Set all CORS enabled origins
-if settings.BACKEND_CORS_ORIGINS:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
+root_router = APIRouter(route_class=TracedRoute)
 
 
-@app.get(
+@root_router.get(
     "/",
     response_class=HTMLResponse,
     responses={404: {"description": "Not found"}, 200: {"description": "OK"}},
     tags=["root"],
 )
-def read_root():
-    db_status = check_db_connection()
+async def read_root():
+    # Answered from the background probe, never from a database round trip
+    connected = health_monitor.snapshot()["database"]["reachable"]
+    db_status = "Database is connected" if connected else "Database connection failed"
     return f"""<h1>Kerala Devs</h1>
     <p>API is working fine</p>
-    <p>Database status: {db_status["status"]}</p>
+    <p>Database status: {db_status}</p>
 """
 
 
-app.include_router(api_router, prefix=settings.API_V1_STR)
+@root_router.get("/healthz", tags=["root"])
+async def liveness():
+    """
+    Liveness probe: the worker is up and its event loop is serving requests.
+
+    Returns:
+    - dict: The status and the worker uptime; never touches the database.
+    """
+    return {"status": "alive", "uptime_seconds": health_monitor.uptime()}
+
+
+@root_router.get(
+    "/readyz",
+    tags=["root"],
+    responses={503: {"description": "Not ready to serve traffic"}},
+)
+async def readiness():
+    """
+    Readiness probe, answered from the last background database probe.
+
+    Returns:
+    - JSONResponse: The cached health snapshot (database reachability and
+      latency, pool saturation, replication lag), with status 200 when the
+      worker is ready and 503 otherwise.
+    """
+    health = health_monitor.snapshot()
+    return FastJSONResponse(health, status_code=200 if health["ready"] else 503)
+
+
+@root_router.get("/metrics", tags=["root"], include_in_schema=False)
+async def metrics():
+    """
+    Prometheus scrape endpoint.
+
+    Returns:
+    - Response: The metrics of this worker, or of all workers when
+      PROMETHEUS_MULTIPROC_DIR is set, in the Prometheus text format.
+    """
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open the MongoDB client when the worker starts and close it on shutdown.
+    """
+    db.connect(settings.MONGODB_URI, settings.MONGODB_NAME)
+    if settings.MONGODB_ENSURE_INDEXES:
+        await ensure_indexes()
+    # Registration relies on the unique indexes to reject taken names
+    await check_required_indexes()
+
+    slow_queries.start(db.command)
+    waitlist_writer.start()
+    contact_writer.start()
+    background = [asyncio.create_task(health_monitor.run())]
+    if settings.REVOCATION_FILTER_ENABLED:
+        background.append(asyncio.create_task(revoked_tokens.follow()))
+    if settings.SEARCH_INDEX_ENABLED:
+        await search_engine.rebuild_all()
+        if settings.SEARCH_REINDEX_INTERVAL_SECONDS > 0:
+            background.append(
+                asyncio.create_task(
+                    search_engine.refresh_periodically(
+                        settings.SEARCH_REINDEX_INTERVAL_SECONDS
+                    )
+                )
+            )
+    try:
+        yield
+    finally:
+        for task in background:
+            task.cancel()
+        # Let them unwind (and close their cursors) while the client is open
+        await asyncio.gather(*background, return_exceptions=True)
+        slow_queries.stop()
+        password_hasher.shutdown()
+        # Write the submissions still buffered before the client goes away
+        await waitlist_writer.close()
+        await contact_writer.close()
+        db.close()
+
+
+def create_app() -> FastAPI:
+    """
+    Build the FastAPI application.
+
+    Returns:
+    - FastAPI: The configured application, with the database lifecycle bound
+      to its lifespan.
+    """
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        openapi_url=f"{settings.API_V1_STR}/openapi.json",
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse,
+    )
+
+    # Set all CORS enabled origins
+    if settings.BACKEND_CORS_ORIGINS:
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+
+    if settings.TRACE_SAMPLE_RATE > 0:
+        app.add_middleware(
+            TracingMiddleware,
+            sample_rate=settings.TRACE_SAMPLE_RATE,
+            log=settings.TRACE_LOG_ENABLED,
+        )
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
+    app.include_router(root_router)
+    app.include_router(api_router, prefix=settings.API_V1_STR)
+    return app
+
+
+app = create_app()
@@ -4,8 +4,8 @@ company.py
 This module contains the data models for handling operations related to job openings in companies.
 
 """
-from typing import Optional, List, Annotated
-from pydantic import BaseModel, Field, EmailStr
+from typing import Optional, List, Annotated, Literal, Union
+from pydantic import BaseModel, BeforeValidator, Field, EmailStr, field_validator
 from enum import Enum
 from bson import ObjectId
 
@@ -16,7 +16,8 @@ class OpeningStatus(str, Enum):
     paused = "paused"
 
 
-PyObjectId = Annotated[str, Field(alias="_id", default=None)]
+# Accepts the ObjectId of a document as read from MongoDB
+PyObjectId = Annotated[str, BeforeValidator(str), Field(alias="_id", default=None)]
 
 
 class Opening(BaseModel):
@@ -69,6 +70,82 @@ class OpeningUpdate(BaseModel):
         arbitrary_types_allowed = True
 
 
+class CreateJobOperation(BaseModel):
+    op: Literal["create"]
+    job: Opening
+
+
+class OpeningChanges(BaseModel):
+    """The fields a bulk `update` changes, under the constraints of `Opening`."""
+
+    skills_needed: Optional[List[str]] = None
+    qualification_required: Optional[str] = None
+    job_role: Optional[str] = None
+    job_description: Optional[str] = None
+    no_of_openings: Optional[int] = Field(default=None, ge=1)
+    status: Optional[OpeningStatus] = None
+
+    @field_validator("*")
+    @classmethod
+    def not_null(cls, value):
+        # Defaults are not validated, so only an explicit null gets here
+        if value is None:
+            raise ValueError("may be left out, but not set to null")
+        return value
+
+
+class UpdateJobOperation(BaseModel):
+    op: Literal["update"]
+    job_id: str
+    job: OpeningChanges
+
+
+class JobStatusOperation(BaseModel):
+    op: Literal["status"]
+    job_id: str
+    status: OpeningStatus
+
+
+class DeleteJobOperation(BaseModel):
+    op: Literal["delete"]
+    job_id: str
+
+
+JobOperation = Annotated[
+    Union[
+        CreateJobOperation, UpdateJobOperation, JobStatusOperation, DeleteJobOperation
+    ],
+    Field(discriminator="op"),
+]
+
+
+class BulkJobRequest(BaseModel):
+    operations: List[JobOperation] = Field(..., min_length=1)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "operations": [
+                    {
+                        "op": "create",
+                        "job": Opening.Config.json_schema_extra["example"],
+                    },
+                    {
+                        "op": "update",
+                        "job_id": "65a1f0c2e4b0a1b2c3d4e5f6",
+                        "job": {"no_of_openings": 3},
+                    },
+                    {
+                        "op": "status",
+                        "job_id": "65a1f0c2e4b0a1b2c3d4e5f7",
+                        "status": "closed",
+                    },
+                    {"op": "delete", "job_id": "65a1f0c2e4b0a1b2c3d4e5f8"},
+                ]
+            }
+        }
+
+
 class CompanyProfile(BaseModel):
     id: Optional[PyObjectId] = Field(alias="_id", default=None)
     username: Optional[str] = Field(default=None)
@@ -4,12 +4,13 @@ developer.py
 This module contains the data models for handling operations related to developers.
 """
 from typing import Optional, List, Annotated
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, BeforeValidator, Field, EmailStr
 from enum import Enum
 from bson import ObjectId
 
 
-PyObjectId = Annotated[str, Field(alias="_id", default=None)]
+# Accepts the ObjectId of a document as read from MongoDB
+PyObjectId = Annotated[str, BeforeValidator(str), Field(alias="_id", default=None)]
 
 
 class DeveloperRole(str, Enum):
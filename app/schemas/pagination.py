@@ -0,0 +1,17 @@
+"""
+pagination.py
+
+This module contains the response model shared by paginated list endpoints.
+"""
+from typing import Generic, List, Optional, TypeVar
+from pydantic import BaseModel, Field
+
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    status: str = Field(default="success")
+    data: List[T] = Field(default=[])
+    next_cursor: Optional[str] = Field(
+        default=None, description="Pass as `after` to fetch the next page"
+    )
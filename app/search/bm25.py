@@ -0,0 +1,158 @@
+"""
+bm25.py
+
+This module contains a small in-memory inverted index with BM25 ranking.
+
+Documents are bags of weighted fields; each field is tokenized and its term
+frequencies are scaled by the field weight, so a match in a boosted field
+(e.g. skills) counts more than one in free text. Documents can be added,
+replaced and removed one at a time, which keeps the index in step with the
+write endpoints without rebuilding it.
+"""
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+
+# Kept short on purpose: job descriptions and intros are free text, but skill
+# names like "go" or "r" must stay searchable.
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or the to with".split()
+)
+
+
+def _rank_key(item: Tuple[str, float]) -> Tuple[float, str]:
+    # Best score first; equal scores by ID, the same on every worker
+    doc_id, score = item
+    return -score, doc_id
+
+
+def tokenize(text: Union[str, Iterable[str], None]) -> List[str]:
+    """
+    Split text (or a list of strings, such as skills) into lowercase terms.
+
+    Characters common in technology names are kept, so "C++", "C#" and
+    "Node.js" survive as single terms.
+    """
+    if text is None:
+        return []
+    if not isinstance(text, str):
+        text = " ".join(str(part) for part in text if part is not None)
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        token = token.rstrip(".")
+        if token and token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """
+    Inverted index over weighted document fields, ranked with Okapi BM25.
+
+    Parameters:
+    - fields (dict): Field name to weight, e.g. `{"skills": 2.0, "name": 1.0}`.
+    - k1 (float): Term frequency saturation.
+    - b (float): Document length normalization.
+    """
+
+    def __init__(self, fields: Dict[str, float], k1: float = 1.2, b: float = 0.75):
+        self.fields = fields
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._lengths: Dict[str, float] = {}
+        self._terms: Dict[str, List[str]] = {}
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._lengths
+
+    def add(self, doc_id: str, doc: dict):
+        """
+        Index `doc` under `doc_id`, replacing any previous version of it.
+        """
+        self.remove(doc_id)
+        frequencies = Counter()
+        for field_name, weight in self.fields.items():
+            for token in tokenize(doc.get(field_name)):
+                frequencies[token] += weight
+        if not frequencies:
+            return
+
+        for token, frequency in frequencies.items():
+            self._postings.setdefault(token, {})[doc_id] = frequency
+        length = sum(frequencies.values())
+        self._lengths[doc_id] = length
+        self._terms[doc_id] = list(frequencies)
+        self._total_length += length
+
+    def remove(self, doc_id: str):
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for token in self._terms.pop(doc_id):
+            postings = self._postings[token]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[token]
+
+    def search(
+        self, query: str, limit: int, after: Optional[Tuple[float, str]] = None
+    ) -> Tuple[List[Tuple[str, float]], int]:
+        """
+        Rank the documents matching any term of `query`, by score and then by
+        ID, so the order is total and a page can resume after a given hit.
+
+        Parameters:
+        - query (str): Free text query.
+        - limit (int): Number of top results to return.
+        - after (tuple): The `(score, doc_id)` of the last hit of the previous
+          page; only hits ranked after it are returned.
+
+        Returns:
+        - tuple: The `(doc_id, score)` pairs of the best `limit` matches, best
+          first, and the number of matching documents ranked after `after`.
+        """
+        count = len(self._lengths)
+        if not count:
+            return [], 0
+        average_length = self._total_length / count
+        lengths = self._lengths
+        # BM25 term weight: idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len / avg)),
+        # with the per-query constants hoisted out of the posting loop.
+        base = self.k1 * (1 - self.b)
+        per_length = self.k1 * self.b / average_length
+        scores: Dict[str, float] = {}
+
+        for token in set(tokenize(query)):
+            postings = self._postings.get(token)
+            if not postings:
+                continue
+            frequency = len(postings)
+            weight = math.log(1 + (count - frequency + 0.5) / (frequency + 0.5)) * (
+                self.k1 + 1
+            )
+            get = scores.get
+            for doc_id, tf in postings.items():
+                scores[doc_id] = get(doc_id, 0.0) + weight * tf / (
+                    tf + base + per_length * lengths[doc_id]
+                )
+
+        items = scores.items()
+        if after is not None:
+            last_score, last_id = after
+            items = [
+                (doc_id, score)
+                for doc_id, score in items
+                if score < last_score or (score == last_score and doc_id > last_id)
+            ]
+        ranked = heapq.nsmallest(limit, items, key=_rank_key)
+        return ranked, len(items)
@@ -0,0 +1,240 @@
+"""
+engine.py
+
+This module contains the per-worker search indexes over developers,
+companies and job openings.
+
+Each worker loads its indexes from MongoDB at startup and keeps them current
+by applying the writes it serves itself. Writes served by other workers are
+picked up by a periodic rebuild (`SEARCH_REINDEX_INTERVAL_SECONDS`).
+"""
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from bson import ObjectId
+from app.crud.pagination import decode_cursor, encode_cursor
+from app.db.engine import db
+from app.search.bm25 import BM25Index
+from app.search.matching import SkillIndex
+
+logger = logging.getLogger(__name__)
+
+# Documents read per batch while rebuilding; the loop is yielded between
+# batches so a rebuild does not hold up requests.
+_REBUILD_BATCH_SIZE = 1000
+# Round trips allowed to fill a ranked page when filters drop candidates.
+_MAX_FILL_ROUNDS = 5
+# A ranked page cursor: the score and ID of the last hit returned
+SEARCH_CURSOR = {
+    "s": lambda score: type(score) in (int, float),
+    "id": lambda doc_id: isinstance(doc_id, str),
+}
+
+
+class SearchCollection:
+    """
+    A BM25 index over the documents of a collection matching `query`.
+
+    Parameters:
+    - collection (str): The MongoDB collection name.
+    - query (dict): Equality filter selecting the indexed documents.
+    - fields (dict): Field name to weight, see `BM25Index`.
+    - skills (str): Field of the skills to keep a `SkillIndex` of, if any.
+    """
+
+    def __init__(
+        self, collection: str, query: dict, fields: dict, skills: Optional[str] = None
+    ):
+        self.collection = collection
+        self.query = query
+        self.fields = fields
+        self.skills = skills
+        self.index = BM25Index(fields)
+        self.matcher = SkillIndex(skills) if skills else None
+        self._pending: Optional[list] = None
+
+    def _matches(self, doc: dict) -> bool:
+        return all(doc.get(key) == value for key, value in self.query.items())
+
+    def upsert(self, doc: dict):
+        """
+        Index a created or updated document; documents no longer matching the
+        collection query are dropped from the index.
+        """
+        doc_id = str(doc["_id"])
+        if self._pending is not None:
+            self._pending.append((doc_id, doc))
+        if self._matches(doc):
+            self.index.add(doc_id, doc)
+            if self.matcher is not None:
+                self.matcher.add(doc_id, doc)
+        else:
+            self._unindex(doc_id)
+
+    def remove(self, doc_id: str):
+        if self._pending is not None:
+            self._pending.append((doc_id, None))
+        self._unindex(doc_id)
+
+    def _unindex(self, doc_id: str):
+        self.index.remove(doc_id)
+        if self.matcher is not None:
+            self.matcher.remove(doc_id)
+
+    async def rebuild(self):
+        """
+        Build a fresh index from the database and swap it in.
+
+        Writes applied while the rebuild is running are replayed on the new
+        index before the swap, so none of them are lost.
+        """
+        self._pending = []
+        try:
+            index = BM25Index(self.fields)
+            matcher = SkillIndex(self.skills) if self.skills else None
+            indexes = [index] if matcher is None else [index, matcher]
+            projection = {field: 1 for field in [*self.fields, *self.query]}
+            if self.skills:
+                projection[self.skills] = 1
+            cursor = (
+                db[self.collection]
+                .find(self.query, projection)
+                .batch_size(_REBUILD_BATCH_SIZE)
+            )
+            count = 0
+            async for doc in cursor:
+                for built in indexes:
+                    built.add(str(doc["_id"]), doc)
+                count += 1
+                if count % _REBUILD_BATCH_SIZE == 0:
+                    await asyncio.sleep(0)
+            for doc_id, doc in self._pending:
+                for built in indexes:
+                    if doc is not None and self._matches(doc):
+                        built.add(doc_id, doc)
+                    else:
+                        built.remove(doc_id)
+            self.index = index
+            self.matcher = matcher
+        finally:
+            self._pending = None
+
+    def search(
+        self, query: str, limit: int, after: Optional[Tuple[float, str]] = None
+    ) -> Tuple[List[Tuple[str, float]], int]:
+        """
+        Return the `(doc_id, score)` of the next `limit` ranked matches after
+        the hit `after`, and the number of matches ranked after it.
+        """
+        return self.index.search(query, limit, after)
+
+
+developers = SearchCollection(
+    "UserRegistration",
+    {"role": "developer"},
+    {"name": 1.5, "skills": 2.0, "experience": 1.0, "location": 1.0},
+    skills="skills",
+)
+companies = SearchCollection(
+    "UserRegistration",
+    {"role": "company"},
+    {
+        "name": 1.5,
+        "full_name": 1.5,
+        "industry": 2.0,
+        "detail_intro": 1.0,
+        "location": 1.0,
+    },
+)
+jobs = SearchCollection(
+    "Opening",
+    {},
+    {"job_role": 2.0, "skills_needed": 2.0, "job_description": 1.0},
+)
+
+
+async def rebuild_all():
+    for collection in (developers, companies, jobs):
+        await collection.rebuild()
+
+
+async def refresh_periodically(interval: float):
+    """
+    Rebuild the indexes every `interval` seconds; run as a background task.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await rebuild_all()
+        except Exception:
+            logger.exception("Search index refresh failed")
+
+
+async def search_page(
+    collection: SearchCollection,
+    q: str,
+    projection: Optional[dict] = None,
+    *,
+    limit: int,
+    after: Optional[str] = None,
+    query: Optional[dict] = None,
+) -> Tuple[list, Optional[str]]:
+    """
+    Fetch one page of BM25-ranked documents for the free text query `q`.
+
+    The ranking is computed in memory; only the candidates of the requested
+    page are read from MongoDB, with an `$in` query AND-ed with `query`.
+    When `query` filters candidates out, further ranked candidates are read
+    until the page is full, for at most `_MAX_FILL_ROUNDS` round trips.
+
+    Hits are ordered by score and then ID, and the cursor holds the score and
+    ID of the last hit: the next page resumes after that hit rather than at
+    an offset, so documents added or removed elsewhere in the ranking do not
+    shift the pages. Scores depend on the state of the index serving each
+    page, though, which differs between workers and changes with rebuilds
+    and writes; a hit whose score moves across the cursor between two pages
+    can still be skipped or repeated.
+
+    Returns:
+    - tuple: The documents of the page, best match first, and the cursor of
+      the next page, which is None on the last page.
+
+    Raises:
+    - HTTPException: If the cursor is invalid.
+    """
+    position = None
+    if after:
+        state = decode_cursor(after, SEARCH_CURSOR)
+        position = (float(state["s"]), state["id"])
+
+    page = []
+    more = False
+    for _ in range(_MAX_FILL_ROUNDS):
+        ranked, remaining = collection.search(q, limit, position)
+        if not ranked:
+            break
+        candidates = {"_id": {"$in": [ObjectId(doc_id) for doc_id, _ in ranked]}}
+        docs = (
+            await db[collection.collection]
+            .find({"$and": [candidates, query]} if query else candidates, projection)
+            .to_list(length=len(ranked))
+        )
+        by_id = {str(doc["_id"]): doc for doc in docs}
+
+        consumed = 0
+        for doc_id, score in ranked:
+            position = (score, doc_id)
+            consumed += 1
+            if doc_id in by_id:
+                page.append(by_id[doc_id])
+                if len(page) == limit:
+                    break
+        more = remaining > consumed
+        if len(page) == limit or not more:
+            break
+
+    next_cursor = None
+    if more:
+        next_cursor = encode_cursor({"s": position[0], "id": position[1]})
+    return page, next_cursor
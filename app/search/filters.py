@@ -0,0 +1,205 @@
+"""
+filters.py
+
+This module contains the structured filters accepted by the `/search`
+endpoints and their compilation to index-friendly MongoDB queries.
+
+Only whitelisted fields can be filtered on, and each kind of filter maps to
+a query shape that an index in `app/db/indexes.py` can answer:
+
+- `exact`: equality on the stored value (enums such as `developer_role`).
+- `all`: `$all` over a lowercase copy of an array field (skills).
+- `prefix`: anchored, case-sensitive `^prefix` regex over a lowercase copy of
+  a string field, which MongoDB runs as an index range scan.
+
+The lowercase copies ("shadow fields", suffixed `_lc`) are written next to
+the original values by the create/update endpoints. Documents written before
+they existed can be backfilled with:
+
+    python -m app.search.filters --backfill
+"""
+import argparse
+import asyncio
+import re
+from typing import Dict, Iterable, List
+
+from fastapi import HTTPException, Request
+from pymongo import UpdateOne
+from app.core.config import settings
+from app.db.engine import db
+
+EXACT = "exact"
+ALL = "all"
+PREFIX = "prefix"
+
+# Query parameters every search endpoint accepts besides its filters.
+COMMON_PARAMS = {"q", "limit", "after", "fields"}
+
+DEVELOPER_FILTERS = {
+    "skills": ALL,
+    "developer_role": EXACT,
+    "location": PREFIX,
+    "name": PREFIX,
+}
+COMPANY_FILTERS = {
+    "name": PREFIX,
+    "industry": PREFIX,
+    "location": PREFIX,
+}
+JOB_FILTERS = {
+    "skills_needed": ALL,
+    "status": EXACT,
+    "job_role": PREFIX,
+}
+
+
+def shadow_name(field: str) -> str:
+    return f"{field}_lc"
+
+
+def _normalize(value: str) -> str:
+    return " ".join(value.split()).lower()
+
+
+def _split(values: Iterable[str]) -> List[str]:
+    # Accept both `skills=go&skills=rust` and `skills=go,rust`.
+    return [
+        part
+        for value in values
+        for part in (p.strip() for p in value.split(","))
+        if part
+    ]
+
+
+def shadow_fields(filters: Dict[str, str], doc: dict) -> dict:
+    """
+    Compute the lowercase shadow fields for the filterable values in `doc`.
+
+    Only fields present in `doc` are returned, so the result can be merged
+    into a partial `$set` update as well as into a full document.
+    """
+    shadows = {}
+    for field, kind in filters.items():
+        if kind == EXACT or field not in doc:
+            continue
+        value = doc[field]
+        if kind == ALL:
+            shadows[shadow_name(field)] = [
+                _normalize(item) for item in value or [] if isinstance(item, str)
+            ]
+        else:
+            shadows[shadow_name(field)] = (
+                _normalize(value) if isinstance(value, str) else None
+            )
+    return shadows
+
+
+def hide_shadow_fields(filters: Dict[str, str]) -> dict:
+    """
+    Projection excluding the shadow fields, for responses that return raw
+    documents.
+    """
+    return {shadow_name(field): 0 for field, kind in filters.items() if kind != EXACT}
+
+
+def reject_unknown_params(request: Request, filters: Dict[str, str]):
+    """
+    Reject query parameters that are neither a whitelisted filter nor one of
+    the common search parameters.
+
+    Raises:
+    - HTTPException: If an unknown parameter is present.
+    """
+    allowed = COMMON_PARAMS | set(filters)
+    unknown = sorted(set(request.query_params) - allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Cannot filter by {', '.join(unknown)}; "
+            f"allowed: {', '.join(sorted(allowed))}",
+        )
+
+
+def compile_filters(filters: Dict[str, str], values: dict) -> dict:
+    """
+    Build the MongoDB query AND-ing every provided filter.
+
+    Parameters:
+    - filters (dict): The whitelist of the endpoint, field to filter kind.
+    - values (dict): Field to requested value; None means not filtered.
+      `all` filters take a list of values.
+
+    Returns:
+    - dict: The query, empty if no filter was given.
+    """
+    query = {}
+    for field, kind in filters.items():
+        value = values.get(field)
+        if value is None:
+            continue
+        if kind == EXACT:
+            query[field] = getattr(value, "value", value)
+        elif kind == ALL:
+            terms = [_normalize(term) for term in _split(value)]
+            if terms:
+                query[shadow_name(field)] = {"$all": terms}
+        else:
+            prefix = _normalize(value)
+            if prefix:
+                query[shadow_name(field)] = {"$regex": f"^{re.escape(prefix)}"}
+    return query
+
+
+async def backfill(collection: str, query: dict, filters: Dict[str, str]) -> int:
+    """
+    Write the shadow fields of every document of `collection` matching
+    `query`.
+
+    Returns:
+    - int: The number of documents updated.
+    """
+    projection = {field: 1 for field in filters}
+    updated = 0
+    batch: List[UpdateOne] = []
+    async for doc in db[collection].find(query, projection).batch_size(1000):
+        shadows = shadow_fields(filters, doc)
+        if shadows:
+            batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": shadows}))
+        if len(batch) >= 1000:
+            updated += (
+                await db[collection].bulk_write(batch, ordered=False)
+            ).modified_count
+            batch = []
+    if batch:
+        updated += (
+            await db[collection].bulk_write(batch, ordered=False)
+        ).modified_count
+    return updated
+
+
+async def _backfill_all():
+    db.connect(settings.MONGODB_URI, settings.MONGODB_NAME)
+    try:
+        for collection, query, filters in (
+            ("UserRegistration", {"role": "developer"}, DEVELOPER_FILTERS),
+            ("UserRegistration", {"role": "company"}, COMPANY_FILTERS),
+            ("Opening", {}, JOB_FILTERS),
+        ):
+            updated = await backfill(collection, query, filters)
+            print(f"{collection} {query}: {updated} documents updated")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search filter maintenance")
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="write the lowercase shadow fields on existing documents",
+    )
+    args = parser.parse_args()
+    if args.backfill:
+        asyncio.run(_backfill_all())
+    else:
+        parser.print_help()
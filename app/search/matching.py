@@ -0,0 +1,207 @@
+"""
+matching.py
+
+This module contains the skill matching index, which ranks developers for a
+job opening by how many of its `skills_needed` they have.
+
+Skills are mapped to a normalized vocabulary (case, spacing and a few common
+aliases, so "ReactJS" and "react" are one skill) and every skill gets a bit.
+Each developer is a row of a NumPy `uint64` matrix holding the bitset of
+their skills. Scoring an opening ANDs the columns its skills fall in with
+the opening's bitset and counts the set bits of every row at once, then
+picks the top-k with `partition`, so a query costs a few vectorized
+passes over the matrix instead of a Python loop over profiles.
+
+The score of a developer is the fraction of the opening's skills they have.
+Rows are added, replaced and removed one at a time, like `BM25Index`, so the
+index follows profile updates without a rebuild. The vocabulary only grows;
+skills no developer has any more are dropped on the next rebuild.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# Spellings of the same skill, after lowercasing, mapped to one name.
+ALIASES = {
+    "golang": "go",
+    "js": "javascript",
+    "ts": "typescript",
+    "node": "node.js",
+    "nodejs": "node.js",
+    "reactjs": "react",
+    "react.js": "react",
+    "vuejs": "vue",
+    "vue.js": "vue",
+    "postgres": "postgresql",
+    "mongo": "mongodb",
+    "k8s": "kubernetes",
+    "py": "python",
+    "python3": "python",
+}
+
+_INITIAL_ROWS = 1024
+_WORD_BITS = 64
+
+
+def normalize_skill(skill: str) -> str:
+    name = " ".join(skill.split()).lower().rstrip(".")
+    return ALIASES.get(name, name)
+
+
+def normalize_skills(skills: Optional[Iterable[str]]) -> List[str]:
+    """The distinct normalized names of `skills`, in order."""
+    names = {}
+    for skill in skills or []:
+        if isinstance(skill, str):
+            name = normalize_skill(skill)
+            if name:
+                names[name] = None
+    return list(names)
+
+
+class SkillIndex:
+    """
+    Bitset index over the skills of documents, ranked by skill coverage.
+
+    Parameters:
+    - field (str): The document field holding the list of skills.
+    """
+
+    def __init__(self, field: str):
+        self.field = field
+        self._vocabulary: Dict[str, int] = {}
+        self._skills: List[str] = []
+        self._bits = np.zeros((_INITIAL_ROWS, 1), dtype=np.uint64)
+        self._rows: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._rows
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._skills)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bits.nbytes
+
+    def _bit(self, name: str) -> int:
+        bit = self._vocabulary.get(name)
+        if bit is None:
+            bit = self._vocabulary[name] = len(self._skills)
+            self._skills.append(name)
+            words = self._bits.shape[1]
+            if bit >= words * _WORD_BITS:
+                grown = np.zeros((self._bits.shape[0], words * 2), dtype=np.uint64)
+                grown[:, :words] = self._bits
+                self._bits = grown
+        return bit
+
+    def _row(self, doc_id: str) -> int:
+        if self._free:
+            row = self._free.pop()
+            self._ids[row] = doc_id
+        else:
+            row = len(self._ids)
+            self._ids.append(doc_id)
+            if row == self._bits.shape[0]:
+                grown = np.zeros(
+                    (self._bits.shape[0] * 2, self._bits.shape[1]), dtype=np.uint64
+                )
+                grown[:row] = self._bits
+                self._bits = grown
+        self._rows[doc_id] = row
+        return row
+
+    def add(self, doc_id: str, doc: dict):
+        """
+        Index the skills of `doc` under `doc_id`, replacing any previous
+        version of it.
+        """
+        names = normalize_skills(doc.get(self.field))
+        if not names:
+            self.remove(doc_id)
+            return
+        bits = [self._bit(name) for name in names]
+        row = self._rows.get(doc_id)
+        if row is None:
+            row = self._row(doc_id)
+        words = np.zeros(self._bits.shape[1], dtype=np.uint64)
+        for bit in bits:
+            words[bit // _WORD_BITS] |= np.uint64(1 << (bit % _WORD_BITS))
+        self._bits[row] = words
+
+    def remove(self, doc_id: str):
+        row = self._rows.pop(doc_id, None)
+        if row is None:
+            return
+        self._bits[row] = 0
+        self._ids[row] = None
+        self._free.append(row)
+
+    def match(
+        self, skills: Iterable[str], limit: int
+    ) -> Tuple[List[Tuple[str, float, List[str]]], int]:
+        """
+        Rank the documents having any of `skills`.
+
+        Parameters:
+        - skills (list[str]): The skills asked for, e.g. `skills_needed`.
+        - limit (int): Number of top results to return.
+
+        Returns:
+        - tuple: The `(doc_id, score, matched skills)` of the best `limit`
+          matches, best first, and the total number of matching documents.
+          The score is the fraction of the distinct skills asked for that the
+          document has; skills no document has count as missing.
+        """
+        names = normalize_skills(skills)
+        known = [name for name in names if name in self._vocabulary]
+        if not known or not self._rows:
+            return [], 0
+
+        # Only the words holding one of the skills take part in the AND.
+        masks: Dict[int, int] = {}
+        for name in known:
+            bit = self._vocabulary[name]
+            word = bit // _WORD_BITS
+            masks[word] = masks.get(word, 0) | 1 << (bit % _WORD_BITS)
+        columns = list(masks)
+        query = np.array([masks[word] for word in columns], dtype=np.uint64)
+        used = self._bits[: len(self._ids)]
+        if len(columns) == 1:
+            overlap = np.bitwise_count(used[:, columns[0]] & query[0]).astype(np.int32)
+        else:
+            overlap = np.bitwise_count(used[:, columns] & query).sum(
+                axis=1, dtype=np.int32
+            )
+
+        candidates = np.flatnonzero(overlap)
+        total = len(candidates)
+        if total > limit:
+            # The limit-th best overlap; of the rows tied at it, the lowest
+            # are kept, so the cut agrees with the order below.
+            scores = overlap[candidates]
+            cut = np.partition(scores, total - limit)[total - limit]
+            above = candidates[scores > cut]
+            tied = candidates[scores == cut][: limit - len(above)]
+            candidates = np.concatenate((above, tied))
+        # Best coverage first, then lowest row for a stable order
+        candidates = candidates[np.lexsort((candidates, -overlap[candidates]))]
+
+        bits = [(name, self._vocabulary[name]) for name in known]
+        results = []
+        for row in candidates.tolist():
+            words = self._bits[row].tolist()
+            matched = [
+                name
+                for name, bit in bits
+                if words[bit // _WORD_BITS] >> (bit % _WORD_BITS) & 1
+            ]
+            results.append((self._ids[row], len(matched) / len(names), matched))
+        return results, total
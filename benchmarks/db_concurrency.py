@@ -0,0 +1,138 @@
+"""
+db_concurrency.py
+
+Compares request throughput of the old blocking pymongo data layer with the
+Motor based one when slow and fast queries are mixed on a single event loop.
+
+Each simulated request is an ``async def`` handler, the same shape as the
+routes in ``app/api/api_v1/endpoints``. A fraction of them run the unanchored
+case-insensitive regex used by ``search_developers``; the rest fetch a single
+document by ``_id``. With pymongo every query stalls the loop, so fast
+requests queue behind slow ones; with Motor they overlap.
+
+Usage (needs a reachable MongoDB, the benchmark uses its own collection):
+
+    MONGODB_URI=mongodb://localhost:27017 python -m benchmarks.db_concurrency \
+        --docs 50000 --concurrency 64 --requests 2000 --slow-ratio 0.1
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+
+COLLECTION = "bench_db_concurrency"
+SKILLS = ["python", "fastapi", "django", "react", "go", "rust", "aws", "docker"]
+
+
+def seed(client: MongoClient, db_name: str, docs: int) -> list:
+    collection = client[db_name][COLLECTION]
+    collection.drop()
+    rng = random.Random(42)
+    batch = [
+        {
+            "role": "developer",
+            "name": f"developer {i}",
+            "skills": rng.sample(SKILLS, 3),
+            "experience": f"{rng.randint(0, 15)} years",
+            "location": rng.choice(["Kochi", "Trivandrum", "Kozhikode"]),
+        }
+        for i in range(docs)
+    ]
+    ids = collection.insert_many(batch).inserted_ids
+    return ids
+
+
+def percentile(samples: list, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run(mode: str, args, ids: list) -> dict:
+    if mode == "sync":
+        collection = MongoClient(args.uri)[args.db][COLLECTION]
+    else:
+        collection = AsyncIOMotorClient(args.uri)[args.db][COLLECTION]
+
+    rng = random.Random(7)
+    plan = [rng.random() < args.slow_ratio for _ in range(args.requests)]
+    latencies = {"slow": [], "fast": []}
+    queue = asyncio.Queue()
+    for is_slow in plan:
+        queue.put_nowait(is_slow)
+
+    async def handler(is_slow: bool):
+        if is_slow:
+            query = {"role": "developer", "name": {"$regex": "9999", "$options": "i"}}
+            if mode == "sync":
+                list(collection.find(query))
+            else:
+                await collection.find(query).to_list(length=None)
+        else:
+            query = {"_id": rng.choice(ids)}
+            if mode == "sync":
+                collection.find_one(query)
+            else:
+                await collection.find_one(query)
+
+    async def worker():
+        while not queue.empty():
+            is_slow = queue.get_nowait()
+            started = time.perf_counter()
+            await handler(is_slow)
+            elapsed = time.perf_counter() - started
+            latencies["slow" if is_slow else "fast"].append(elapsed * 1000)
+            # Yield like the ASGI server does between requests.
+            await asyncio.sleep(0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    wall = time.perf_counter() - started
+
+    return {
+        "mode": mode,
+        "requests_per_sec": args.requests / wall,
+        "fast_p50_ms": percentile(latencies["fast"], 50),
+        "fast_p95_ms": percentile(latencies["fast"], 95),
+        "slow_mean_ms": statistics.fmean(latencies["slow"] or [0.0]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--uri", default=os.environ.get("MONGODB_URI"))
+    parser.add_argument("--db", default=os.environ.get("MONGODB_NAME", "benchmarks"))
+    parser.add_argument("--docs", type=int, default=50_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--slow-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+    if not args.uri:
+        parser.error("set MONGODB_URI or pass --uri")
+
+    seed_client = MongoClient(args.uri)
+    ids = seed(seed_client, args.db, args.docs)
+
+    print(
+        f"{'mode':<6} {'req/s':>10} {'fast p50':>10} {'fast p95':>10} {'slow avg':>10}"
+    )
+    for mode in ("sync", "async"):
+        result = asyncio.run(run(mode, args, ids))
+        print(
+            f"{result['mode']:<6} {result['requests_per_sec']:>10.1f} "
+            f"{result['fast_p50_ms']:>8.2f}ms {result['fast_p95_ms']:>8.2f}ms "
+            f"{result['slow_mean_ms']:>8.2f}ms"
+        )
+
+    seed_client[args.db][COLLECTION].drop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+"""
+load_test.py
+
+Drives every API route at a fixed concurrency and records p50/p95/p99
+latency and requests/sec per route in a JSON file, so runs on different
+commits can be compared.
+
+The app runs in-process behind httpx's ASGI transport, with its lifespan, so
+the caches, buffered writers and search index behave as in production.
+Before the app starts, a throwaway database is seeded with developers,
+companies and openings. Every seeded developer can log in with the password
+"benchmark". The database is either a local mongod (`--uri`, dropped
+afterwards) or, with `--in-memory`, mongomock-motor. The in-memory
+stand-in answers every query with a collection scan, so its numbers only
+compare with other in-memory runs.
+
+Usage:
+
+    python -m benchmarks.load_test --uri mongodb://localhost:27017 \
+        --output results.json
+    python -m benchmarks.load_test --in-memory --developers 10000 \
+        --companies 1000 --openings 5000 --compare results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_NAME", "benchmarks")
+# Every request is measured, none is traced
+os.environ.setdefault("TRACE_SAMPLE_RATE", "0")
+
+import httpx  # noqa: E402
+
+PASSWORD = "benchmark"
+SKILLS = [
+    "python", "fastapi", "django", "flask", "react", "angular", "vue", "node.js",
+    "go", "rust", "java", "kotlin", "swift", "c++", "aws", "gcp", "docker",
+    "kubernetes", "terraform", "postgresql", "mongodb", "redis", "kafka", "spark",
+]  # fmt: skip
+LOCATIONS = ["Kochi", "Trivandrum", "Kozhikode", "Thrissur", "Kannur", "Kollam"]
+NAMES = ["Anu", "Arjun", "Meera", "Rahul", "Fathima", "Joel", "Nithya", "Vishnu"]
+ROLES = ["frontend", "backend", "fullstack", "mobile", "devops", "data_engineer"]
+INDUSTRIES = ["Software", "Fintech", "Healthcare", "Edtech", "Logistics", "Gaming"]
+JOB_ROLES = ["Backend Developer", "Frontend Developer", "DevOps Engineer", "SRE"]
+
+
+def make_developer(rng: random.Random, i: int, password_hash: str) -> dict:
+    return {
+        "username": f"dev{i}",
+        "email": f"dev{i}@example.com",
+        "password": password_hash,
+        "role": "developer",
+        "name": f"{rng.choice(NAMES)} {i}",
+        "developer_role": rng.choice(ROLES),
+        "skills": rng.sample(SKILLS, rng.randint(2, 6)),
+        "experience": f"{rng.randint(0, 15)} years",
+        "education": "BTech",
+        "location": rng.choice(LOCATIONS),
+        "socials": {"LinkedIn": f"https://linkedin.com/in/dev{i}"},
+    }
+
+
+def make_company(rng: random.Random, i: int, password_hash: str) -> dict:
+    return {
+        "username": f"company{i}",
+        "email": f"company{i}@example.com",
+        "password": password_hash,
+        "role": "company",
+        "name": f"Company {i}",
+        "full_name": f"Company {i} Private Limited",
+        "industry": rng.choice(INDUSTRIES),
+        "detail_intro": "We build software in Kerala.",
+        "location": rng.choice(LOCATIONS),
+    }
+
+
+def make_opening(rng: random.Random) -> dict:
+    skills = rng.sample(SKILLS, rng.randint(1, 4))
+    return {
+        "skills_needed": skills,
+        "qualification_required": "BTech",
+        "job_role": rng.choice(JOB_ROLES),
+        "job_description": f"Build services with {', '.join(skills)}",
+        "no_of_openings": rng.randint(1, 5),
+        "status": "active",
+    }
+
+
+async def seed(database, args) -> dict:
+    """Insert the data set and return the IDs the routes pick from."""
+    from app.core.security import pwd_context
+    from app.search.filters import (
+        COMPANY_FILTERS,
+        DEVELOPER_FILTERS,
+        JOB_FILTERS,
+        shadow_fields,
+    )
+
+    rng = random.Random(42)
+    password_hash = pwd_context.hash(PASSWORD)
+    ids = {}
+    for key, collection, count, filters, make in (
+        (
+            "developers",
+            "UserRegistration",
+            args.developers,
+            DEVELOPER_FILTERS,
+            lambda i: make_developer(rng, i, password_hash),
+        ),
+        (
+            "companies",
+            "UserRegistration",
+            args.companies,
+            COMPANY_FILTERS,
+            lambda i: make_company(rng, i, password_hash),
+        ),
+        (
+            "openings",
+            "Opening",
+            args.openings,
+            JOB_FILTERS,
+            lambda i: make_opening(rng),
+        ),
+    ):
+        ids[key] = []
+        for start in range(0, count, 5_000):
+            batch = [make(i) for i in range(start, min(count, start + 5_000))]
+            # The lowercase copies the search filters match on, as the create
+            # routes write them
+            for doc in batch:
+                doc.update(shadow_fields(filters, doc))
+            result = await database[collection].insert_many(batch)
+            ids[key].extend(str(_id) for _id in result.inserted_ids)
+    return ids
+
+
+def percentile(samples: list, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def scenarios(ids: dict, developers: int) -> dict:
+    """Route name -> function building the request arguments from an RNG."""
+
+    def query(rng):
+        return " ".join(rng.sample(SKILLS, rng.randint(1, 2)))
+
+    def job(rng):
+        return make_opening(rng)
+
+    return {
+        "login": lambda rng: (
+            "POST",
+            "/api/v1/user/token",
+            {
+                "data": {
+                    "username": f"dev{rng.randrange(developers)}",
+                    "password": PASSWORD,
+                }
+            },
+        ),
+        "developers.list": lambda rng: (
+            "GET",
+            "/api/v1/developers/",
+            {"params": {"limit": rng.choice([10, 20, 50])}},
+        ),
+        "developers.get": lambda rng: (
+            "GET",
+            f"/api/v1/developers/{rng.choice(ids['developers'])}",
+            {},
+        ),
+        "developers.search": lambda rng: (
+            "GET",
+            "/api/v1/developers/search",
+            {"params": {"q": query(rng), "location": rng.choice(LOCATIONS)}},
+        ),
+        "companies.list": lambda rng: (
+            "GET",
+            "/api/v1/company/",
+            {"params": {"limit": rng.choice([10, 20, 50])}},
+        ),
+        "companies.get": lambda rng: (
+            "GET",
+            f"/api/v1/company/{rng.choice(ids['companies'])}",
+            {},
+        ),
+        "companies.search": lambda rng: (
+            "GET",
+            "/api/v1/company/search",
+            {"params": {"industry": rng.choice(INDUSTRIES)}},
+        ),
+        "jobs.list": lambda rng: (
+            "GET",
+            "/api/v1/job/list",
+            {"params": {"limit": rng.choice([10, 20, 50])}},
+        ),
+        "jobs.search": lambda rng: (
+            "GET",
+            "/api/v1/job/search",
+            {"params": {"q": query(rng)}},
+        ),
+        "developers.create": lambda rng: (
+            "POST",
+            "/api/v1/developers/post",
+            {
+                "json": {
+                    k: v
+                    for k, v in make_developer(rng, rng.randrange(10**9), "").items()
+                    if k not in ("username", "password", "role")
+                }
+            },
+        ),
+        "developers.update": lambda rng: (
+            "PUT",
+            f"/api/v1/developers/{rng.choice(ids['developers'])}",
+            {"json": {"location": rng.choice(LOCATIONS)}},
+        ),
+        "jobs.create": lambda rng: ("POST", "/api/v1/job/post", {"json": job(rng)}),
+        "jobs.update": lambda rng: (
+            "PUT",
+            "/api/v1/job/update",
+            {"params": {"job_id": rng.choice(ids["openings"])}, "json": job(rng)},
+        ),
+        "jobs.bulk": lambda rng: (
+            "POST",
+            "/api/v1/job/bulk",
+            {
+                "json": {
+                    "operations": [
+                        {"op": "update", "job_id": job_id, "job": job(rng)}
+                        for job_id in rng.sample(ids["openings"], 20)
+                    ]
+                }
+            },
+        ),
+    }
+
+
+async def drive(client, build, headers, args) -> dict:
+    """Send `args.requests` requests from `args.concurrency` workers."""
+    rng = random.Random(7)
+    plan = [build(rng) for _ in range(args.requests + args.warmup)]
+    warmup, plan = plan[: args.warmup], iter(plan[args.warmup :])
+    for method, url, kwargs in warmup:
+        await client.request(method, url, headers=headers, **kwargs)
+
+    latencies = []
+    statuses = {}
+
+    async def worker():
+        for method, url, kwargs in plan:
+            started = time.perf_counter()
+            response = await client.request(method, url, headers=headers, **kwargs)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    wall = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "errors": sum(n for status, n in statuses.items() if status >= 400),
+        "statuses": {str(status): n for status, n in sorted(statuses.items())},
+        "requests_per_sec": len(latencies) / wall,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies, default=0.0),
+    }
+
+
+async def run(args) -> dict:
+    if args.in_memory:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--in-memory needs mongomock-motor (poetry install --with dev)")
+        client = AsyncMongoMockClient()
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        client = AsyncIOMotorClient(args.uri)
+
+    from app.db.engine import Database
+    from app.main import app
+
+    if args.in_memory:
+        # The app's client is the seeded in-memory one
+        def connect(self, uri, db_name):
+            self.client = client
+            self._db = client[db_name]
+
+        Database.connect = connect
+
+    print(
+        f"seeding {args.developers} developers, {args.companies} companies, "
+        f"{args.openings} openings into {args.db}",
+        file=sys.stderr,
+    )
+    ids = await seed(client[args.db], args)
+    results = {}
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench", timeout=60
+            ) as http:
+                token = (
+                    await http.post(
+                        "/api/v1/user/token",
+                        data={"username": "dev0", "password": PASSWORD},
+                    )
+                ).json()["access_token"]
+                headers = {"Authorization": f"Bearer {token}"}
+                routes = scenarios(ids, args.developers)
+                for name in args.routes or routes:
+                    results[name] = await drive(http, routes[name], headers, args)
+                    print(format_row(name, results[name]), file=sys.stderr)
+    finally:
+        if not args.in_memory:
+            await client.drop_database(args.db)
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def format_row(name: str, result: dict) -> str:
+    return (
+        f"{name:<20} {result['requests_per_sec']:>9.1f} "
+        f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+        f"{result['p99_ms']:>8.2f} {result['errors']:>7}"
+    )
+
+
+def compare(baseline: dict, current: dict):
+    """Print the change of req/s and p95 per route against a previous run."""
+    print(
+        f"\nagainst {baseline['meta']['commit']}:\n"
+        f"{'route':<20} {'req/s':>9} {'p95':>9}"
+    )
+    for name, result in current["routes"].items():
+        before = baseline["routes"].get(name)
+        if before is None:
+            continue
+        rps = result["requests_per_sec"] / before["requests_per_sec"] - 1
+        p95 = result["p95_ms"] / before["p95_ms"] - 1 if before["p95_ms"] else 0.0
+        print(f"{name:<20} {rps:>+8.1%} {p95:>+8.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--uri", default="mongodb://localhost:27017")
+    source.add_argument("--in-memory", action="store_true")
+    parser.add_argument("--db", default=f"load_test_{uuid.uuid4().hex[:8]}")
+    parser.add_argument("--developers", type=int, default=100_000)
+    parser.add_argument("--companies", type=int, default=10_000)
+    parser.add_argument("--openings", type=int, default=50_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1_000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--routes", nargs="+", help="Subset of routes to run")
+    parser.add_argument("--output", default="load_test.json")
+    parser.add_argument("--compare", help="A previous output file")
+    args = parser.parse_args()
+    # Read by the app's settings, which are loaded on first import
+    os.environ["MONGODB_URI"] = args.uri
+    os.environ["MONGODB_NAME"] = args.db
+
+    print(
+        f"{'route':<20} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'errors':>7}",
+        file=sys.stderr,
+    )
+    routes = asyncio.run(run(args))
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "database": "in-memory" if args.in_memory else "mongod",
+            "developers": args.developers,
+            "companies": args.companies,
+            "openings": args.openings,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+        },
+        "routes": routes,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.output}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+matching.py
+
+Measures the skill matching index of `app/search/matching.py` at production
+scale: building it, ranking developers for openings, and applying profile
+updates one at a time, as the write endpoints do.
+
+Developers draw their skills from a vocabulary with Zipf-like popularity, so
+a few skills (python, javascript) are common and most are rare, as in real
+profiles. The same openings are also ranked by a pure Python scan that
+intersects each developer's skill set, the obvious implementation without
+the bitset index, to show what the vectorized scoring saves.
+
+Usage:
+
+    python -m benchmarks.matching --developers 100000
+    python -m benchmarks.matching --vocabulary 2000 --output matching.json
+"""
+import argparse
+import heapq
+import json
+import random
+import time
+
+from app.search.matching import SkillIndex, normalize_skills
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def make_skills(rng: random.Random, vocabulary: list, weights: list, n: int) -> list:
+    return list({skill: None for skill in rng.choices(vocabulary, weights, k=n)})
+
+
+def scan(profiles: dict, skills: list, limit: int) -> list:
+    """Rank by coverage with a Python loop over every profile's skill set."""
+    needed = set(normalize_skills(skills))
+    scored = (
+        (len(needed & owned), doc_id)
+        for doc_id, owned in profiles.items()
+        if not needed.isdisjoint(owned)
+    )
+    return heapq.nlargest(limit, scored)
+
+
+def timings(fn, items: list) -> list:
+    samples = []
+    for item in items:
+        started = time.perf_counter()
+        fn(item)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def summary(name: str, samples: list) -> dict:
+    result = {
+        "name": name,
+        "count": len(samples),
+        "p50_ms": percentile(samples, 50),
+        "p95_ms": percentile(samples, 95),
+        "p99_ms": percentile(samples, 99),
+        "per_sec": len(samples) / (sum(samples) / 1000),
+    }
+    print(
+        f"{name:<18} {result['count']:>7} {result['p50_ms']:>9.3f} "
+        f"{result['p95_ms']:>9.3f} {result['p99_ms']:>9.3f} {result['per_sec']:>10.0f}"
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--developers", type=int, default=100_000)
+    parser.add_argument("--vocabulary", type=int, default=500)
+    parser.add_argument("--max-skills", type=int, default=15)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--scan-queries", type=int, default=50)
+    parser.add_argument("--updates", type=int, default=10_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--output", help="Also write the results to a JSON file")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    vocabulary = [f"skill{i}" for i in range(args.vocabulary)]
+    weights = [1 / (rank + 1) for rank in range(args.vocabulary)]
+    docs = {
+        f"dev{i}": {
+            "skills": make_skills(
+                rng, vocabulary, weights, rng.randint(1, args.max_skills)
+            )
+        }
+        for i in range(args.developers)
+    }
+    openings = [
+        make_skills(rng, vocabulary, weights, rng.randint(1, 8))
+        for _ in range(args.queries)
+    ]
+
+    index = SkillIndex("skills")
+    started = time.perf_counter()
+    for doc_id, doc in docs.items():
+        index.add(doc_id, doc)
+    build = time.perf_counter() - started
+    print(
+        f"built {len(index)} developers, {index.vocabulary_size} skills in "
+        f"{build:.2f}s, matrix {index.nbytes / 2**20:.1f} MiB"
+    )
+
+    profiles = {
+        doc_id: set(normalize_skills(doc["skills"])) for doc_id, doc in docs.items()
+    }
+    ids = list(docs)
+    updates = [
+        (
+            rng.choice(ids),
+            {
+                "skills": make_skills(
+                    rng, vocabulary, weights, rng.randint(1, args.max_skills)
+                )
+            },
+        )
+        for _ in range(args.updates)
+    ]
+
+    print(
+        f"{'operation':<18} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} "
+        f"{'p99 ms':>9} {'per sec':>10}"
+    )
+    results = [
+        summary("match", timings(lambda q: index.match(q, args.limit), openings)),
+        summary(
+            "python scan",
+            timings(
+                lambda q: scan(profiles, q, args.limit),
+                openings[: args.scan_queries],
+            ),
+        ),
+        summary("update", timings(lambda u: index.add(*u), updates)),
+    ]
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "developers": args.developers,
+                    "vocabulary": index.vocabulary_size,
+                    "build_seconds": build,
+                    "matrix_bytes": index.nbytes,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
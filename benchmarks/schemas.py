@@ -0,0 +1,183 @@
+"""
+schemas.py
+
+Measures the cost of the pydantic models in `app/schemas/` on the paths the
+endpoints take: validating a request or document, and dumping a model with
+`.dict(by_alias=True)` (create/update routes), `model_dump`, and
+`model_dump(mode="json")` / `model_dump_json` (what a `response_model`
+does after validating).
+
+Each model runs at several payload sizes: the number of skills and socials
+of a developer, the number of nested `Opening`s of a company and the number
+of skills of an opening, since those lists grow with real profiles. Per
+operation, the table shows throughput and the peak memory allocated by one
+call, measured with tracemalloc on a separate call so it does not slow the
+timed ones down.
+
+Usage:
+
+    python -m benchmarks.schemas --sizes 1 10 100 --number 2000
+    python -m benchmarks.schemas --models CompanyProfile --output schemas.json
+"""
+import argparse
+import json
+import timeit
+import tracemalloc
+import warnings
+
+from app.schemas.company import (
+    CompanyProfile,
+    Opening,
+    OpeningOut,
+    UpdateCompanyProfileModel,
+)
+from app.schemas.developer import DeveloperProfile, UpdateDeveloperModel
+
+SKILLS = ["python", "fastapi", "react", "go", "rust", "aws", "docker", "mongodb"]
+
+# `.dict()` is what the endpoints still call; pydantic warns it is deprecated
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+
+def opening(i: int) -> dict:
+    return {
+        "skills_needed": SKILLS[: 1 + i % len(SKILLS)],
+        "qualification_required": "BTech",
+        "job_role": "Backend Developer",
+        "job_description": "Develop and maintain backend services " * 4,
+        "no_of_openings": 1 + i % 5,
+        "status": "active",
+    }
+
+
+def opening_with_skills(size: int) -> dict:
+    return {**opening(0), "skills_needed": [f"skill{i}" for i in range(size)]}
+
+
+def developer(size: int) -> dict:
+    return {
+        "_id": "65a1f0c2e4b0a1b2c3d4e5f6",
+        "name": "Developer Name",
+        "email": "developer@example.com",
+        "profile_pic": "s3://bucket/profile_pic.jpg",
+        "contact": "+91 90000 00000",
+        "developer_role": "backend",
+        "skills": [SKILLS[i % len(SKILLS)] + str(i) for i in range(size)],
+        "experience": "5 years",
+        "education": "Bachelor's in Computer Science",
+        "location": "Kochi",
+        "socials": {f"site{i}": f"https://example.com/{i}" for i in range(size)},
+        "website": "https://developer.example.com",
+    }
+
+
+def company(size: int) -> dict:
+    return {
+        "_id": "65a1f0c2e4b0a1b2c3d4e5f7",
+        "name": "Company Name",
+        "full_name": "Full Company Name",
+        "email": "hr@company.example.com",
+        "industry": "Software",
+        "detail_intro": "Detailed introduction about the company " * 4,
+        "location": "Kochi",
+        "openings": [opening(i) for i in range(size)],
+        "socials": {f"site{i}": f"https://example.com/{i}" for i in range(size)},
+        "website": "https://company.example.com",
+    }
+
+
+def company_update(size: int) -> dict:
+    payload = company(size)
+    payload.pop("_id")
+    payload.pop("email")
+    # the update model takes openings by ID and a contact email
+    payload["openings"] = [f"65a1f0c2e4b0a1b2c3d4{i:04x}" for i in range(size)]
+    payload["contact"] = "contact@company.example.com"
+    return payload
+
+
+def developer_update(size: int) -> dict:
+    payload = developer(size)
+    payload.pop("_id")
+    return payload
+
+
+# model name -> (model, payload factory)
+MODELS = {
+    "DeveloperProfile": (DeveloperProfile, developer),
+    "UpdateDeveloperModel": (UpdateDeveloperModel, developer_update),
+    "CompanyProfile": (CompanyProfile, company),
+    "UpdateCompanyProfileModel": (UpdateCompanyProfileModel, company_update),
+    "Opening": (Opening, opening_with_skills),
+    "OpeningOut": (OpeningOut, lambda size: {"_id": "x", **opening_with_skills(size)}),
+}
+
+
+def operations(model, payload: dict) -> dict:
+    instance = model.model_validate(payload)
+    return {
+        "validate": lambda: model.model_validate(payload),
+        "dict(by_alias=True)": lambda: instance.dict(by_alias=True),
+        "model_dump": lambda: instance.model_dump(),
+        "model_dump(json)": lambda: instance.model_dump(mode="json"),
+        "model_dump_json": lambda: instance.model_dump_json(),
+    }
+
+
+def peak_bytes(fn) -> int:
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        fn()
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+
+def measure(fn, number: int, repeat: int) -> float:
+    """Operations per second, from the fastest of `repeat` runs."""
+    best = min(timeit.repeat(fn, number=number, repeat=repeat))
+    return number / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--models", nargs="+", choices=MODELS, default=list(MODELS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--number", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Also write the results to a JSON file")
+    args = parser.parse_args()
+
+    results = []
+    print(
+        f"{'model':<26} {'size':>5} {'operation':<20} {'ops/s':>10} "
+        f"{'us/op':>8} {'peak KiB':>9}"
+    )
+    for name in args.models:
+        model, make = MODELS[name]
+        for size in args.sizes:
+            for operation, fn in operations(model, make(size)).items():
+                ops = measure(fn, args.number, args.repeat)
+                peak = peak_bytes(fn)
+                results.append(
+                    {
+                        "model": name,
+                        "size": size,
+                        "operation": operation,
+                        "ops_per_sec": ops,
+                        "peak_bytes": peak,
+                    }
+                )
+                print(
+                    f"{name:<26} {size:>5} {operation:<20} {ops:>10.0f} "
+                    f"{1e6 / ops:>8.2f} {peak / 1024:>9.1f}"
+                )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+search_latency.py
+
+Compares query latency of the in-process BM25 index (`app.search.bm25`) with
+the unanchored case-insensitive `$regex` search the `/search` endpoints used
+before it.
+
+The BM25 part runs offline on synthetic developer profiles. The regex part
+runs against MongoDB when MONGODB_URI is set, on its own collection seeded
+with the same profiles.
+
+Usage:
+
+    python -m benchmarks.search_latency --docs 100000 --queries 200
+    MONGODB_URI=mongodb://localhost:27017 python -m benchmarks.search_latency
+"""
+import argparse
+import os
+import random
+import time
+
+from app.search.bm25 import BM25Index
+
+COLLECTION = "bench_search_latency"
+SKILLS = [
+    "python", "fastapi", "django", "flask", "react", "angular", "vue", "node.js",
+    "go", "rust", "java", "kotlin", "swift", "c++", "aws", "gcp", "docker",
+    "kubernetes", "terraform", "postgresql", "mongodb", "redis", "kafka", "spark",
+]  # fmt: skip
+LOCATIONS = ["Kochi", "Trivandrum", "Kozhikode", "Thrissur", "Kannur", "Kollam"]
+NAMES = ["Anu", "Arjun", "Meera", "Rahul", "Fathima", "Joel", "Nithya", "Vishnu"]
+
+
+def make_developers(count: int) -> list:
+    rng = random.Random(42)
+    return [
+        {
+            "_id": str(i),
+            "role": "developer",
+            "name": f"{rng.choice(NAMES)} {i}",
+            "skills": rng.sample(SKILLS, rng.randint(2, 6)),
+            "experience": f"{rng.randint(0, 15)} years",
+            "location": rng.choice(LOCATIONS),
+        }
+        for i in range(count)
+    ]
+
+
+def make_queries(count: int) -> list:
+    rng = random.Random(7)
+    return [
+        " ".join(rng.sample(SKILLS, rng.randint(1, 3)) + [rng.choice(LOCATIONS)])
+        for _ in range(count)
+    ]
+
+
+def summarize(label: str, samples: list):
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000
+
+    print(
+        f"{label:<28} p50 {pct(50):8.3f}ms  p95 {pct(95):8.3f}ms  p99 {pct(99):8.3f}ms"
+    )
+
+
+def bench_bm25(developers: list, queries: list, limit: int):
+    index = BM25Index({"name": 1.5, "skills": 2.0, "experience": 1.0, "location": 1.0})
+    started = time.perf_counter()
+    for doc in developers:
+        index.add(doc["_id"], doc)
+    print(
+        f"bm25 build: {time.perf_counter() - started:.2f}s for {len(developers)} docs"
+    )
+
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query, limit)
+        samples.append(time.perf_counter() - started)
+    summarize("bm25 ranked top-k", samples)
+
+    samples = []
+    for doc in developers[: len(queries)]:
+        started = time.perf_counter()
+        index.add(doc["_id"], {**doc, "skills": doc["skills"] + ["graphql"]})
+        samples.append(time.perf_counter() - started)
+    summarize("bm25 incremental update", samples)
+
+
+def bench_regex(uri: str, db_name: str, developers: list, queries: list, limit: int):
+    from pymongo import MongoClient
+
+    collection = MongoClient(uri)[db_name][COLLECTION]
+    collection.drop()
+    collection.insert_many(
+        [{k: v for k, v in d.items() if k != "_id"} for d in developers]
+    )
+
+    samples = []
+    for query in queries:
+        # The old endpoints matched a single caller-chosen field.
+        value = query.split()[0]
+        started = time.perf_counter()
+        list(
+            collection.find(
+                {"role": "developer", "skills": {"$regex": value, "$options": "i"}}
+            ).limit(limit)
+        )
+        samples.append(time.perf_counter() - started)
+    summarize("mongo $regex (first page)", samples)
+    collection.drop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--uri", default=os.environ.get("MONGODB_URI"))
+    parser.add_argument("--db", default=os.environ.get("MONGODB_NAME", "benchmarks"))
+    args = parser.parse_args()
+
+    developers = make_developers(args.docs)
+    queries = make_queries(args.queries)
+    bench_bm25(developers, queries, args.limit)
+    if args.uri:
+        bench_regex(args.uri, args.db, developers, queries, args.limit)
+    else:
+        print("MONGODB_URI not set, skipping the $regex baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+serialization.py
+
+Compares the time to turn a page of developer documents, as read from
+MongoDB, into a JSON response body before and after the orjson/TypeAdapter
+path in `app.api.responses`.
+
+Two shapes of route are measured for each document count:
+
+- raw: routes returning the documents as they are (developer and company
+  lists). Before: a copy of every document with `_id` stringified, encoded
+  by the stdlib `JSONResponse`. After: `dumps`, which encodes the documents
+  directly with orjson.
+- model: routes rendering through a response model (search, job list).
+  Before: `model_validate` + `model_dump(mode="json")` on the copied
+  documents, then `JSONResponse`, as FastAPI does for a `response_model`.
+  After: `render_page`, which wraps the documents in unvalidated model
+  instances and dumps them to JSON with a cached `TypeAdapter`.
+
+Usage:
+
+    python -m benchmarks.serialization --docs 1000 10000 --repeat 20
+"""
+import argparse
+import os
+import random
+import timeit
+
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGODB_NAME", "benchmarks")
+
+from bson import ObjectId  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.api.responses import dumps, render_page  # noqa: E402
+from app.schemas.developer import DeveloperProfile  # noqa: E402
+from app.schemas.pagination import Page  # noqa: E402
+
+SKILLS = ["python", "fastapi", "react", "go", "rust", "aws", "docker", "mongodb"]
+LOCATIONS = ["Kochi", "Trivandrum", "Kozhikode", "Thrissur", "Kannur", "Kollam"]
+
+
+def make_developers(count: int) -> list:
+    rng = random.Random(42)
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Developer {i}",
+            "email": f"dev{i}@example.com",
+            "profile_pic": None,
+            "contact": "+91 90000 00000",
+            "developer_role": "backend",
+            "skills": rng.sample(SKILLS, 3),
+            "experience": f"{rng.randint(0, 15)} years",
+            "education": "BTech",
+            "location": rng.choice(LOCATIONS),
+            "socials": {"LinkedIn": f"https://linkedin.com/in/dev{i}"},
+            "website": None,
+            "role": "developer",
+        }
+        for i in range(count)
+    ]
+
+
+def raw_before(docs):
+    data = [{**doc, "_id": str(doc["_id"])} for doc in docs]
+    return JSONResponse({"status": "success", "data": data, "next_cursor": None}).body
+
+
+def raw_after(docs):
+    return dumps({"status": "success", "data": docs, "next_cursor": None})
+
+
+def model_before(docs):
+    data = [{**doc, "_id": str(doc["_id"])} for doc in docs]
+    content = (
+        Page[DeveloperProfile]
+        .model_validate({"data": data, "next_cursor": None})
+        .model_dump(mode="json", by_alias=False)
+    )
+    return JSONResponse(content).body
+
+
+def model_after(docs):
+    return render_page(DeveloperProfile, {"data": docs, "next_cursor": None})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--docs", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    cases = [
+        ("raw", raw_before, raw_after),
+        ("model", model_before, model_after),
+    ]
+    print(f"{'docs':>6} {'path':<6} {'before':>10} {'after':>10} {'speedup':>8}")
+    for count in args.docs:
+        docs = make_developers(count)
+        for label, before, after in cases:
+            assert before(docs) == after(docs), f"{label} outputs differ"
+            timings = [
+                min(timeit.repeat(lambda: fn(docs), number=1, repeat=args.repeat))
+                for fn in (before, after)
+            ]
+            print(
+                f"{count:>6} {label:<6} {timings[0] * 1000:>8.2f}ms "
+                f"{timings[1] * 1000:>8.2f}ms {timings[0] / timings[1]:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+import os
+import uuid
+
+import pytest
+
+# Settings are read when app.core.config is first imported, so the test
+# environment is set before any test module imports the app.
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault(
+    "MONGODB_URI", os.environ.get("MONGODB_TEST_URI", "mongodb://localhost:27017")
+)
+os.environ.setdefault("MONGODB_NAME", f"test_{uuid.uuid4().hex[:8]}")
+os.environ.setdefault("SEARCH_REINDEX_INTERVAL_SECONDS", "0")
+os.environ.setdefault("BULK_WRITE_DURABILITY", "flushed")
+os.environ.setdefault("TRACE_SAMPLE_RATE", "0")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def mongo():
+    """A fresh in-memory Motor database."""
+    from mongomock_motor import AsyncMongoMockClient
+
+    return AsyncMongoMockClient()[f"test_{uuid.uuid4().hex[:8]}"]
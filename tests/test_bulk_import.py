@@ -0,0 +1,207 @@
+"""
+Bulk imports parse NDJSON and CSV uploads as they stream in, number the rows
+as the client sees them, skip records that are too long without reading
+them whole, and upsert profiles on their email.
+"""
+import pytest
+from fastapi import HTTPException
+
+from app.crud import bulk_import
+from app.crud.bulk_import import (
+    CSV,
+    NDJSON,
+    BulkImporter,
+    _write_error,
+    csv_rows,
+    ndjson_rows,
+)
+from app.schemas.developer import UpdateDeveloperModel
+from app.search.filters import DEVELOPER_FILTERS
+
+pytestmark = pytest.mark.anyio
+
+
+async def _chunks(body: bytes, size: int = 3):
+    # Small chunks split lines, cells and multibyte characters
+    for start in range(0, len(body), size):
+        yield body[start : start + size]
+
+
+async def _collect(rows):
+    return [row async for row in rows]
+
+
+async def test_ndjson_rows():
+    body = (
+        b'\xef\xbb\xbf{"name": "Ad\xc3\xa9"}\n'
+        b"\n"
+        b"   \r\n"
+        b"{not json}\n"
+        b"[1, 2]\n"
+        b'{"name": "last"}'
+    )
+
+    rows = await _collect(ndjson_rows(_chunks(body), 1_000))
+
+    assert [(number, row) for number, row, _ in rows] == [
+        (1, {"name": "Adé"}),
+        (2, None),
+        (3, None),
+        (4, {"name": "last"}),
+    ]
+    assert rows[1][2].startswith("Invalid JSON")
+    assert rows[2][2] == "Each line must be a JSON object"
+
+
+async def test_ndjson_oversize_line_is_skipped():
+    long = b'{"name": "' + b"x" * 100 + b'"}'
+    body = b'{"name": "a"}\n' + long + b'\n{"name": "b"}\n' + long
+
+    rows = await _collect(ndjson_rows(_chunks(body, 7), 50))
+
+    assert rows == [
+        (1, {"name": "a"}, None),
+        (2, None, "Line is longer than 50 characters"),
+        (3, {"name": "b"}, None),
+        (4, None, "Line is longer than 50 characters"),
+    ]
+
+
+async def test_csv_rows():
+    body = (
+        b"name,skills,socials.LinkedIn,experience\r\n"
+        b"Ada,Python; Go ;,https://linkedin.com/in/ada,\r\n"
+        b"\r\n"
+        b'"Lovelace, Ada",,,"Two\nlines"\r\n'
+        b"a,b,c,d,e\r\n"
+        b'"unterminated,x\n'
+    )
+
+    rows = await _collect(csv_rows(_chunks(body), UpdateDeveloperModel, 1_000))
+
+    assert rows == [
+        (
+            1,
+            {
+                "name": "Ada",
+                "skills": ["Python", "Go"],
+                "socials": {"LinkedIn": "https://linkedin.com/in/ada"},
+            },
+            None,
+        ),
+        (2, {"name": "Lovelace, Ada", "experience": "Two\nlines"}, None),
+        (3, None, "Expected 4 cells, got 5"),
+        (4, None, "Unterminated quoted cell"),
+    ]
+
+
+async def test_csv_oversize_record_is_skipped():
+    body = (
+        b"name,experience\n"
+        + (b"a," + b"x" * 40 + b"\n")
+        # Over the limit inside a quoted cell: skipped up to its closing quote
+        + (b'b,"' + b"x\n" * 40 + b'"\n')
+        + b"c,short\n"
+    )
+
+    rows = await _collect(csv_rows(_chunks(body, 5), UpdateDeveloperModel, 30))
+
+    assert rows == [
+        (1, None, "Record is longer than 30 characters"),
+        (2, None, "Record is longer than 30 characters"),
+        (3, {"name": "c", "experience": "short"}, None),
+    ]
+
+
+async def test_csv_oversize_header_is_refused():
+    body = b"name," + b"x" * 100 + b"\nAda,1\n"
+
+    with pytest.raises(HTTPException) as raised:
+        await _collect(csv_rows(_chunks(body), UpdateDeveloperModel, 30))
+    assert raised.value.status_code == 413
+
+
+@pytest.fixture
+def importer(mongo, monkeypatch):
+    monkeypatch.setattr(bulk_import, "db", mongo)
+    monkeypatch.setattr(bulk_import.settings, "BULK_IMPORT_CHUNK_SIZE", 2)
+    written = []
+    importer = BulkImporter(
+        UpdateDeveloperModel, "developer", DEVELOPER_FILTERS, written.extend
+    )
+    return importer, written
+
+
+async def test_import_upserts_on_the_email(mongo, importer):
+    importer, written = importer
+    first = (
+        b'{"name": "Ada", "email": "ada@x.com", "skills": ["Python"]}\n'
+        b'{"name": "No Email"}\n'
+        b'{"name": "Bob", "email": "bob@x.com"}\n'
+    )
+
+    report = await importer.run(_chunks(first), NDJSON)
+
+    assert report["status"] == "success"
+    assert (report["rows"], report["inserted"], report["updated"]) == (3, 3, 0)
+
+    second = b"name,email\r\nAda Lovelace,ada@x.com\r\nCarol,carol@x.com\r\n"
+    report = await importer.run(_chunks(second), CSV)
+
+    assert (report["rows"], report["inserted"], report["updated"]) == (2, 1, 1)
+    ada = await mongo.UserRegistration.find_one({"email": "ada@x.com"})
+    # The import sets the fields it holds and keeps the others
+    assert (ada["name"], ada["skills"]) == ("Ada Lovelace", ["Python"])
+    assert ada["role"] == "developer"
+    assert await mongo.UserRegistration.count_documents({}) == 4
+    # Updated profiles are read back whole for the search index
+    assert sorted(doc["name"] for doc in written[-2:]) == ["Ada Lovelace", "Carol"]
+    assert all("_id" in doc for doc in written)
+
+
+async def test_import_never_updates_an_account(mongo, importer):
+    importer, _ = importer
+    await mongo.UserRegistration.create_index("email", unique=True)
+    await mongo.UserRegistration.insert_one(
+        {"email": "ada@x.com", "password": "hash", "role": "developer"}
+    )
+    body = b'{"email": "ada@x.com", "name": "Forged"}\n'
+
+    report = await importer.run(_chunks(body), NDJSON)
+
+    assert (report["status"], report["failed"]) == ("partial", 1)
+    assert report["errors"][0]["row"] == 1
+    assert "ada@x.com" in report["errors"][0]["errors"][0]
+    account = await mongo.UserRegistration.find_one({"email": "ada@x.com"})
+    assert "name" not in account
+
+
+async def test_failed_rows_are_numbered(importer, monkeypatch):
+    importer, _ = importer
+    body = (
+        b'{"name": "Ada"}\n'
+        b"\n"
+        b'{"email": "not an email"}\n'
+        b'{"name": "' + b"x" * 100 + b'"}\n'
+        b'{"developer_role": "Astronaut"}\n'
+    )
+    monkeypatch.setattr(bulk_import.settings, "BULK_IMPORT_MAX_RECORD_SIZE", 50)
+
+    report = await importer.run(_chunks(body), NDJSON)
+
+    assert (report["rows"], report["inserted"], report["failed"]) == (4, 1, 3)
+    assert [error["row"] for error in report["errors"]] == [2, 3, 4]
+    assert report["errors"][0]["errors"][0].startswith("email: ")
+
+
+def test_duplicate_key_names_the_taken_value():
+    error = {
+        "index": 0,
+        "code": 11000,
+        "errmsg": "E11000 duplicate key error collection: UserRegistration",
+        "keyValue": {"username": "ada"},
+    }
+
+    assert _write_error(error) == "username 'ada' is already used by another account"
+    assert _write_error({**error, "keyValue": None}) == error["errmsg"]
+    assert _write_error({"index": 0, "code": 121}) == "Write failed"
@@ -0,0 +1,171 @@
+"""
+A batch of job operations is written with one `bulk_write`, and every
+operation gets its own result: merged changes share theirs, operations on
+missing openings are left out, and write errors fail only the operations
+they belong to.
+"""
+import pytest
+from bson import ObjectId
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.crud import bulk_jobs
+from app.crud.bulk_jobs import run_job_operations
+from app.schemas.company import BulkJobRequest, Opening
+
+pytestmark = pytest.mark.anyio
+
+JOB = Opening.Config.json_schema_extra["example"]
+
+
+class Openings:
+    """The Opening collection, recording the requests of each bulk write."""
+
+    def __init__(self, collection, details=None):
+        self.collection = collection
+        self.details = details
+        self.writes = []
+
+    def find(self, *args, **kwargs):
+        return self.collection.find(*args, **kwargs)
+
+    async def bulk_write(self, requests, ordered):
+        self.writes.append(requests)
+        if self.details is not None:
+            raise BulkWriteError(self.details)
+        return await self.collection.bulk_write(requests, ordered=ordered)
+
+
+class Database:
+    def __init__(self, openings):
+        self.Opening = openings
+
+
+@pytest.fixture
+def openings(mongo, monkeypatch):
+    openings = Openings(mongo.Opening)
+    monkeypatch.setattr(bulk_jobs, "db", Database(openings))
+    return openings
+
+
+async def _jobs(mongo, count):
+    result = await mongo.Opening.insert_many([dict(JOB) for _ in range(count)])
+    return [str(job_id) for job_id in result.inserted_ids]
+
+
+def _operations(*operations):
+    return BulkJobRequest.model_validate({"operations": operations}).operations
+
+
+def _statuses(report):
+    return [(result["status"], result.get("detail")) for result in report["results"]]
+
+
+async def test_successive_changes_are_merged(mongo, openings):
+    (job_id,) = await _jobs(mongo, 1)
+    operations = _operations(
+        {"op": "update", "job_id": job_id, "job": {"no_of_openings": 2}},
+        {"op": "status", "job_id": job_id, "status": "paused"},
+        {"op": "update", "job_id": job_id, "job": {"no_of_openings": 5}},
+    )
+
+    report, docs, removed = await run_job_operations(operations)
+
+    assert _statuses(report) == [("updated", None)] * 3
+    assert (report["updated"], report["failed"]) == (3, 0)
+    (requests,) = openings.writes
+    assert len(requests) == 1 and isinstance(requests[0], UpdateOne)
+    stored = await mongo.Opening.find_one({"_id": ObjectId(job_id)})
+    assert (stored["no_of_openings"], stored["status"]) == (5, "paused")
+    # Merged in memory, as stored
+    assert docs == [stored]
+    assert removed == []
+
+
+async def test_operations_on_missing_openings_are_not_found(mongo, openings):
+    (job_id,) = await _jobs(mongo, 1)
+    missing = str(ObjectId())
+    operations = _operations(
+        {"op": "update", "job_id": missing, "job": {"no_of_openings": 2}},
+        {"op": "status", "job_id": missing, "status": "closed"},
+        {"op": "delete", "job_id": str(ObjectId())},
+        {"op": "delete", "job_id": "not an id"},
+        {"op": "status", "job_id": job_id, "status": "closed"},
+    )
+
+    report, docs, _ = await run_job_operations(operations)
+
+    assert _statuses(report) == [
+        ("not_found", "Job not found"),
+        ("not_found", "Job not found"),
+        ("not_found", "Job not found"),
+        ("error", "Invalid job id"),
+        ("updated", None),
+    ]
+    assert (report["status"], report["updated"], report["failed"]) == ("partial", 1, 4)
+    # Only the found opening is written
+    assert [type(request) for request in openings.writes[0]] == [UpdateOne]
+    assert [str(doc["_id"]) for doc in docs] == [job_id]
+
+
+async def test_a_deleted_opening_is_the_target_of_no_other_operation(mongo, openings):
+    first, second = await _jobs(mongo, 2)
+    operations = _operations(
+        {"op": "delete", "job_id": first},
+        {"op": "update", "job_id": first, "job": {"no_of_openings": 2}},
+        {"op": "status", "job_id": second, "status": "closed"},
+        {"op": "delete", "job_id": second},
+        {"op": "delete", "job_id": first},
+    )
+
+    report, _, removed = await run_job_operations(operations)
+
+    earlier = ("error", "Job is the target of an earlier operation")
+    assert _statuses(report) == [
+        ("deleted", None),
+        earlier,
+        ("updated", None),
+        earlier,
+        earlier,
+    ]
+    assert removed == [first]
+    stored = await mongo.Opening.find_one({"_id": ObjectId(second)})
+    assert stored["status"] == "closed"
+
+
+async def test_write_errors_fail_their_operations(mongo, openings):
+    updated, deleted = await _jobs(mongo, 2)
+    operations = _operations(
+        {"op": "create", "job": JOB},
+        {"op": "update", "job_id": updated, "job": {"no_of_openings": 2}},
+        {"op": "delete", "job_id": deleted},
+        {"op": "status", "job_id": updated, "status": "closed"},
+        {"op": "create", "job": JOB},
+    )
+    # The second write (the merged update) fails; its index is the position
+    # of the write, not of the operation.
+    openings.details = {
+        "writeErrors": [{"index": 1, "code": 121, "errmsg": "Document failed"}],
+        "nInserted": 2,
+        "nRemoved": 1,
+    }
+
+    report, docs, removed = await run_job_operations(operations)
+
+    assert [type(request) for request in openings.writes[0]] == [
+        InsertOne,
+        UpdateOne,
+        DeleteOne,
+        InsertOne,
+    ]
+    assert _statuses(report) == [
+        ("created", None),
+        ("error", "Document failed"),
+        ("deleted", None),
+        ("error", "Document failed"),
+        ("created", None),
+    ]
+    assert (report["created"], report["deleted"], report["failed"]) == (2, 1, 2)
+    created = [report["results"][0]["job_id"], report["results"][4]["job_id"]]
+    assert [str(doc["_id"]) for doc in docs] == created
+    assert removed == [deleted]
@@ -0,0 +1,186 @@
+"""
+The buffered writer batches submissions into `insert_many` calls, merges
+duplicates of its dedupe key, and loses nothing it accepted when the worker
+shuts down cleanly.
+"""
+import asyncio
+
+import pytest
+from pymongo.errors import DuplicateKeyError
+
+from app.db import bulk
+from app.db.bulk import BufferedWriter, BufferFull
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def mongo(mongo, monkeypatch):
+    monkeypatch.setattr(bulk, "db", mongo)
+    return mongo
+
+
+def _writer(**options):
+    options = {
+        "max_batch": 100,
+        "max_delay": 60,
+        "max_buffer": 1_000,
+        "durability": "flushed",
+        **options,
+    }
+    return BufferedWriter("waitlist", **options)
+
+
+async def _emails(mongo):
+    return sorted([doc["email"] async for doc in mongo.waitlist.find()])
+
+
+async def test_flushes_a_full_batch_at_once(mongo):
+    writer = _writer(max_batch=3)
+    writer.start()
+    try:
+        ids = await asyncio.wait_for(
+            asyncio.gather(*(writer.submit({"email": f"{n}@x.com"}) for n in range(3))),
+            1,
+        )
+    finally:
+        await writer.close()
+
+    assert len(set(ids)) == 3
+    assert await _emails(mongo) == ["0@x.com", "1@x.com", "2@x.com"]
+    assert writer.stats()["batches"] == 1
+    assert writer.stats()["written"] == 3
+
+
+async def test_flushes_after_the_delay(mongo):
+    writer = _writer(max_delay=0.01)
+    writer.start()
+    try:
+        doc_id = await asyncio.wait_for(writer.submit({"email": "a@x.com"}), 1)
+    finally:
+        await writer.close()
+
+    assert await mongo.waitlist.find_one({"_id": doc_id}) is not None
+    assert writer.stats()["avg_batch_size"] == 1
+
+
+async def test_writes_at_once_without_a_flusher(mongo):
+    writer = _writer()
+
+    doc_id = await writer.submit({"email": "a@x.com"})
+
+    assert (await mongo.waitlist.find_one({"_id": doc_id}))["email"] == "a@x.com"
+
+
+async def test_merges_buffered_duplicates(mongo):
+    writer = _writer(max_delay=0.01, dedupe_key="email")
+    writer.start()
+    try:
+        first, second, other = await asyncio.wait_for(
+            asyncio.gather(
+                writer.submit({"email": "a@x.com"}),
+                writer.submit({"email": "a@x.com"}),
+                writer.submit({"email": "b@x.com"}),
+            ),
+            1,
+        )
+    finally:
+        await writer.close()
+
+    assert first == second != other
+    assert await _emails(mongo) == ["a@x.com", "b@x.com"]
+    stats = writer.stats()
+    assert (stats["submitted"], stats["merged_duplicates"]) == (2, 1)
+
+
+async def test_duplicate_of_a_stored_key_fails_only_its_submission(mongo):
+    await mongo.waitlist.create_index("email", unique=True)
+    await mongo.waitlist.insert_one({"email": "a@x.com"})
+    writer = _writer(max_delay=0.01)
+    writer.start()
+    try:
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                writer.submit({"email": "a@x.com"}),
+                writer.submit({"email": "b@x.com"}),
+                return_exceptions=True,
+            ),
+            1,
+        )
+    finally:
+        await writer.close()
+
+    assert isinstance(results[0], DuplicateKeyError)
+    assert not isinstance(results[1], Exception)
+    assert await _emails(mongo) == ["a@x.com", "b@x.com"]
+    assert (writer.stats()["written"], writer.stats()["failed"]) == (1, 1)
+
+
+async def test_refuses_submissions_beyond_the_buffer(mongo):
+    writer = _writer(max_buffer=2, durability="buffered")
+    writer.start()
+    try:
+        await writer.submit({"email": "a@x.com"})
+        await writer.submit({"email": "b@x.com"})
+        with pytest.raises(BufferFull):
+            await writer.submit({"email": "c@x.com"})
+    finally:
+        await writer.close()
+
+    assert writer.stats()["rejected"] == 1
+    assert await _emails(mongo) == ["a@x.com", "b@x.com"]
+
+
+async def test_buffered_documents_are_written_on_close(mongo):
+    writer = _writer(max_batch=2, durability="buffered")
+    writer.start()
+    # Answered before anything is written; the delay never elapses
+    for n in range(5):
+        await writer.submit({"email": f"{n}@x.com"})
+    await asyncio.sleep(0)
+    assert writer.stats()["buffered"] > 0
+
+    await writer.close()
+
+    assert await _emails(mongo) == [f"{n}@x.com" for n in range(5)]
+    assert writer.stats()["buffered"] == 0
+    assert writer.stats()["written"] == 5
+
+
+async def test_close_waits_for_flushed_submissions(mongo):
+    writer = _writer()
+    writer.start()
+    pending = asyncio.ensure_future(writer.submit({"email": "a@x.com"}))
+    await asyncio.sleep(0)
+    assert not pending.done()
+
+    await writer.close()
+
+    assert await asyncio.wait_for(pending, 1) is not None
+    assert await _emails(mongo) == ["a@x.com"]
+
+
+async def test_close_finishes_the_batch_being_written(mongo, monkeypatch):
+    writing = asyncio.Event()
+
+    class SlowCollection:
+        async def insert_many(self, docs, **kwargs):
+            writing.set()
+            await asyncio.sleep(0.05)
+            return await mongo.waitlist.insert_many(docs, **kwargs)
+
+    monkeypatch.setattr(bulk, "db", {"waitlist": SlowCollection()})
+    writer = _writer(max_batch=1)
+    writer.start()
+    pending = asyncio.ensure_future(writer.submit({"email": "a@x.com"}))
+    await asyncio.wait_for(writing.wait(), 1)
+
+    await asyncio.wait_for(writer.close(), 1)
+
+    assert await asyncio.wait_for(pending, 1) is not None
+    assert await _emails(mongo) == ["a@x.com"]
+
+
+def test_rejects_unknown_durability():
+    with pytest.raises(ValueError):
+        _writer(durability="eventually")
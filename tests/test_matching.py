@@ -0,0 +1,129 @@
+"""
+The skill index scores a developer by the fraction of an opening's skills
+they have, after both sides are normalized to one spelling per skill.
+"""
+import random
+
+import pytest
+
+from app.search.matching import SkillIndex, normalize_skill, normalize_skills
+
+
+@pytest.mark.parametrize(
+    "skill, name",
+    [
+        ("Python", "python"),
+        ("python3", "python"),
+        ("ReactJS", "react"),
+        ("React.js", "react"),
+        ("GoLang", "go"),
+        ("Go.", "go"),
+        ("NodeJS", "node.js"),
+        ("Node.js", "node.js"),
+        ("  Machine \t Learning ", "machine learning"),
+        ("K8s", "kubernetes"),
+        ("Rust", "rust"),
+    ],
+)
+def test_normalize_skill(skill, name):
+    assert normalize_skill(skill) == name
+
+
+def test_normalize_skills_dedupes_in_order():
+    skills = ["ReactJS", "Python", "react", None, "", " ", 3, "py", "Go"]
+
+    assert normalize_skills(skills) == ["react", "python", "go"]
+    assert normalize_skills(None) == []
+
+
+def _index(docs):
+    index = SkillIndex("skills")
+    for doc_id, skills in docs.items():
+        index.add(doc_id, {"skills": skills})
+    return index
+
+
+def test_scores_the_fraction_of_skills_matched():
+    index = _index(
+        {
+            "all": ["python", "FastAPI", "MongoDB"],
+            "two": ["Python3", "mongo"],
+            "one": ["fastapi", "Rust"],
+            "none": ["Java"],
+        }
+    )
+
+    results, total = index.match(["Python", "fastapi", "MongoDB", "Python"], 10)
+
+    assert total == 3
+    assert [(doc_id, round(score, 3)) for doc_id, score, _ in results] == [
+        ("all", 1.0),
+        ("two", 0.667),
+        ("one", 0.333),
+    ]
+    assert results[1][2] == ["python", "mongodb"]
+
+
+def test_unknown_skills_count_as_missing():
+    index = _index({"dev": ["python"]})
+
+    assert index.match(["python", "cobol"], 10) == ([("dev", 0.5, ["python"])], 1)
+    assert index.match(["cobol"], 10) == ([], 0)
+    assert SkillIndex("skills").match(["python"], 10) == ([], 0)
+
+
+def test_ties_keep_insertion_order_and_limit_counts_all():
+    index = _index({f"dev{n}": ["python"] for n in range(5)})
+
+    results, total = index.match(["python"], 3)
+
+    assert total == 5
+    assert [doc_id for doc_id, _, _ in results] == ["dev0", "dev1", "dev2"]
+
+
+def test_add_replaces_and_remove_frees_the_row():
+    index = _index({"a": ["python"], "b": ["python", "go"]})
+
+    index.add("a", {"skills": ["go"]})
+    assert index.match(["python"], 10)[0] == [("b", 1.0, ["python"])]
+
+    index.remove("b")
+    index.add("c", {"skills": ["python"]})
+    assert "b" not in index and len(index) == 2
+    assert index.match(["python", "go"], 10)[0] == [
+        ("a", 0.5, ["go"]),
+        ("c", 0.5, ["python"]),
+    ]
+
+    index.add("a", {"skills": []})
+    assert "a" not in index
+
+
+def test_matches_a_brute_force_ranking_across_words_and_rows():
+    # Over 64 skills and 1024 developers, so both the bitset words and the
+    # rows of the matrix grow, and queries span several words.
+    rng = random.Random(7)
+    vocabulary = [f"skill{n}" for n in range(150)]
+    docs = {f"dev{n}": rng.sample(vocabulary, rng.randint(1, 12)) for n in range(1100)}
+    index = _index(docs)
+    assert index.vocabulary_size == 150
+
+    for _ in range(20):
+        wanted = rng.sample(vocabulary, rng.randint(1, 20))
+        overlap = {
+            doc_id: [skill for skill in wanted if skill in skills]
+            for doc_id, skills in docs.items()
+        }
+        order = list(docs)
+        expected = sorted(
+            (doc_id for doc_id in order if overlap[doc_id]),
+            key=lambda doc_id: (-len(overlap[doc_id]), order.index(doc_id)),
+        )
+
+        results, total = index.match(wanted, 25)
+
+        assert total == len(expected)
+        assert [doc_id for doc_id, _, _ in results] == expected[:25]
+        for doc_id, score, matched in results:
+            assert matched == overlap[doc_id]
+            assert score == len(matched) / len(wanted)
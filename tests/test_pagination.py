@@ -0,0 +1,183 @@
+"""
+Keyset pagination walks every document exactly once, whatever the sort key
+holds: duplicates are ordered by `_id`, and null or missing values sort
+first, as MongoDB orders them.
+"""
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import ASCENDING, DESCENDING
+
+from app.crud.pagination import decode_cursor, encode_cursor, fetch_page
+from app.search.engine import SEARCH_CURSOR
+
+pytestmark = pytest.mark.anyio
+
+# Duplicates, nulls and missing keys, interleaved with distinct values
+NAMES = ["b", None, "a", "b", "c", "b", None, "a", "MISSING", "c", "MISSING", "b"]
+
+
+@pytest.fixture
+async def people(mongo):
+    docs = []
+    for name in NAMES:
+        doc = {"_id": ObjectId(), "age": len(docs)}
+        if name != "MISSING":
+            doc["name"] = name
+        docs.append(doc)
+    await mongo.people.insert_many(docs)
+    return mongo.people, docs
+
+
+def _expected(docs, direction):
+    ordered = sorted(
+        docs,
+        key=lambda doc: (
+            doc.get("name") is not None,
+            doc.get("name") or "",
+            doc["_id"],
+        ),
+    )
+    ids = [doc["_id"] for doc in ordered]
+    return ids if direction == ASCENDING else ids[::-1]
+
+
+async def _walk(collection, limit, sort, projection=None):
+    pages, after = [], None
+    while True:
+        docs, after = await fetch_page(
+            collection, {}, projection, limit=limit, after=after, sort=sort
+        )
+        pages.append(docs)
+        if after is None:
+            return pages
+        # Every cursor survives the trip through the query string
+        assert decode_cursor(after)["id"] == docs[-1]["_id"]
+
+
+@pytest.mark.parametrize("direction", [ASCENDING, DESCENDING])
+@pytest.mark.parametrize("limit", [1, 2, 3, 5, len(NAMES)])
+async def test_walks_every_document_once(people, direction, limit):
+    collection, docs = people
+    pages = await _walk(collection, limit, ("name", direction))
+
+    ids = [doc["_id"] for page in pages for doc in page]
+    assert ids == _expected(docs, direction)
+    assert all(len(page) == limit for page in pages[:-1])
+
+
+async def test_walks_by_id_without_a_sort_key(people):
+    collection, docs = people
+    pages = await _walk(collection, 4, None)
+
+    ids = [doc["_id"] for page in pages for doc in page]
+    assert ids == sorted(doc["_id"] for doc in docs)
+
+
+async def test_page_boundary_inside_duplicates(people):
+    collection, docs = people
+    duplicates = sorted(doc["_id"] for doc in docs if doc.get("name") == "b")
+    # Skip past the nulls and the "a"s to stop between two "b"s
+    skipped = sum(1 for doc in docs if doc.get("name") in (None, "a"))
+    first, after = await fetch_page(
+        collection, {}, limit=skipped + 2, sort=("name", ASCENDING)
+    )
+    assert [doc["_id"] for doc in first[-2:]] == duplicates[:2]
+
+    rest, _ = await fetch_page(
+        collection, {}, limit=2, after=after, sort=("name", ASCENDING)
+    )
+    assert [doc["_id"] for doc in rest] == duplicates[2:]
+
+
+async def test_page_boundary_on_a_null(people):
+    collection, docs = people
+    nulls = sorted(doc["_id"] for doc in docs if doc.get("name") is None)
+    first, after = await fetch_page(collection, {}, limit=1, sort=("name", ASCENDING))
+    assert first[0]["_id"] == nulls[0]
+    assert decode_cursor(after)["v"] is None
+
+    rest, _ = await fetch_page(
+        collection, {}, limit=len(nulls), after=after, sort=("name", ASCENDING)
+    )
+    assert [doc["_id"] for doc in rest[: len(nulls) - 1]] == nulls[1:]
+    assert rest[-1].get("name") == "a"
+
+
+async def test_projection_keeps_the_sort_key_out(people):
+    collection, docs = people
+    pages = await _walk(collection, 5, ("name", DESCENDING), projection={"age": 1})
+
+    returned = [doc for page in pages for doc in page]
+    assert [doc["_id"] for doc in returned] == _expected(docs, DESCENDING)
+    assert all(set(doc) == {"_id", "age"} for doc in returned)
+
+
+def test_cursor_round_trip():
+    state = {"k": "name", "d": DESCENDING, "v": None, "id": ObjectId()}
+    cursor = encode_cursor(state)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == state
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "bm90IGpzb24", encode_cursor([1])])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(cursor)
+    assert raised.value.status_code == 400
+
+
+def _forged(**fields):
+    return encode_cursor(
+        {"k": "name", "d": ASCENDING, "v": "b", "id": ObjectId(), **fields}
+    )
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        _forged(v={"$regex": ".*"}),
+        _forged(v={"$ne": None}),
+        _forged(v=["a", "b"]),
+        _forged(id="not an id"),
+        _forged(id={"$gt": ""}),
+        _forged(d=0),
+        _forged(k={"$where": "1"}),
+        _forged(extra=1),
+        encode_cursor({"k": "name", "d": ASCENDING, "id": ObjectId()}),
+    ],
+)
+async def test_forged_cursor_is_rejected(people, cursor):
+    collection, _ = people
+    with pytest.raises(HTTPException) as raised:
+        await fetch_page(
+            collection, {}, limit=2, after=cursor, sort=("name", ASCENDING)
+        )
+    assert (raised.value.status_code, raised.value.detail) == (400, "Invalid cursor")
+
+
+def test_search_cursor_fields():
+    state = {"s": 1.5, "id": str(ObjectId())}
+    assert decode_cursor(encode_cursor(state), SEARCH_CURSOR) == state
+
+    for forged in [{"s": "1", "id": "x"}, {"s": 1.0, "id": {"$ne": ""}}, {"id": "x"}]:
+        with pytest.raises(HTTPException):
+            decode_cursor(encode_cursor(forged), SEARCH_CURSOR)
+    # A page cursor is not a search cursor
+    with pytest.raises(HTTPException):
+        decode_cursor(_forged(), SEARCH_CURSOR)
+
+
+async def test_cursor_of_another_sort_is_rejected(people):
+    collection, _ = people
+    _, after = await fetch_page(collection, {}, limit=2, sort=("name", ASCENDING))
+
+    for sort in [("name", DESCENDING), ("age", ASCENDING), None]:
+        with pytest.raises(HTTPException) as raised:
+            await fetch_page(collection, {}, limit=2, after=after, sort=sort)
+        assert raised.value.status_code == 400
+
+    # Decodes, but holds no position
+    with pytest.raises(HTTPException):
+        await fetch_page(collection, {}, limit=2, after=encode_cursor({}))
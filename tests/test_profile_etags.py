@@ -0,0 +1,117 @@
+"""
+Single profile responses carry an ETag derived from their body: a matching
+`If-None-Match` gets 304, any write of the profile changes the ETag, and a
+sparse fieldset has an ETag of its own.
+
+The app runs against an in-memory database.
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+PROFILE = {
+    "name": "Asha",
+    "email": "asha@x.com",
+    "skills": ["Python"],
+    "experience": "2 years",
+    "location": "Kochi",
+    "developer_role": "backend",
+}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """The app client, its auth headers and the ID of a developer profile."""
+    from mongomock_motor import AsyncMongoMockClient
+
+    from app.db import engine
+    from app.main import app
+
+    def connect(self, uri, db_name):
+        self.client = AsyncMongoMockClient()
+        self._db = self.client[db_name]
+
+    async def command(self, *args, **kwargs):
+        return {"ok": 1.0}
+
+    monkeypatch.setattr(engine.Database, "connect", connect)
+    monkeypatch.setattr(engine.Database, "command", command)
+    with TestClient(app) as client:
+        user = {"username": "dev", "email": "dev@x.com", "password": "pw"}
+        client.post("/api/v1/user/register", data={**user, "role": "developer"})
+        token = client.post(
+            "/api/v1/user/token", data={"username": "dev", "password": "pw"}
+        ).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        response = client.post("/api/v1/developers/post", json=PROFILE, headers=headers)
+        yield client, headers, response.json()["id"]
+
+
+def _get(client, headers, id, etag=None, **params):
+    if etag is not None:
+        headers = {**headers, "If-None-Match": etag}
+    return client.get(f"/api/v1/developers/{id}", headers=headers, params=params)
+
+
+def test_matching_etag_gets_304(client):
+    client, headers, id = client
+    response = _get(client, headers, id)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    for candidate in [etag, f"W/{etag}", f'"other", {etag}', "*"]:
+        not_modified = _get(client, headers, id, candidate)
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert not_modified.headers["ETag"] == etag
+
+    assert _get(client, headers, id, '"other"').status_code == 200
+    assert _get(client, headers, id).headers["ETag"] == etag
+
+
+def test_update_changes_the_etag(client):
+    client, headers, id = client
+    etag = _get(client, headers, id).headers["ETag"]
+
+    client.put(
+        f"/api/v1/developers/{id}", json={"experience": "3 years"}, headers=headers
+    )
+
+    response = _get(client, headers, id, etag)
+    assert response.status_code == 200
+    assert response.json()["experience"] == "3 years"
+    assert response.headers["ETag"] != etag
+
+
+def test_import_changes_the_etag(client):
+    client, headers, id = client
+    etag = _get(client, headers, id).headers["ETag"]
+
+    report = client.post(
+        "/api/v1/developers/import",
+        content=b'{"email": "asha@x.com", "location": "Pune"}\n',
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    ).json()
+    assert report["updated"] == 1
+
+    response = _get(client, headers, id, etag)
+    assert response.status_code == 200
+    assert response.json()["location"] == "Pune"
+    assert response.headers["ETag"] != etag
+
+
+def test_fieldsets_have_their_own_etag(client):
+    client, headers, id = client
+    full = _get(client, headers, id).headers["ETag"]
+    sparse = _get(client, headers, id, fields="name,skills")
+    etag = sparse.headers["ETag"]
+
+    assert sparse.json() == {"name": "Asha", "skills": ["Python"]}
+    assert etag != full
+    assert _get(client, headers, id, full, fields="name,skills").status_code == 200
+    assert _get(client, headers, id, etag, fields="name,skills").status_code == 304
+    assert _get(client, headers, id, etag, fields="skills,name").status_code == 304
+    assert _get(client, headers, id, etag).status_code == 200
+
+    client.put(f"/api/v1/developers/{id}", json={"name": "Asha K"}, headers=headers)
+
+    assert _get(client, headers, id, etag, fields="name,skills").status_code == 200
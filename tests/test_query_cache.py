@@ -0,0 +1,126 @@
+"""
+A generation bump invalidates the cached pages of every cache sharing the
+generations, as the workers of a host do through `QUERY_CACHE_PATH`.
+"""
+import orjson
+import pytest
+
+from app.api import query_cache as query_cache_module
+from app.api.query_cache import QueryCache
+from app.core.cache import Generations, LRUCache, SQLiteCache, SQLiteGenerations
+
+pytestmark = pytest.mark.anyio
+
+
+class Source:
+    """Counts the computations of a cached result."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return {"version": self.calls}
+
+
+async def _get(cache: QueryCache, source: Source) -> dict:
+    response = await cache.response("jobs", "Opening", {"limit": 20}, source)
+    return orjson.loads(response.body)
+
+
+def _worker(path, shared_entries=False) -> QueryCache:
+    store = (
+        SQLiteCache(path, 100, table="query_cache") if shared_entries else LRUCache(100)
+    )
+    return QueryCache(store, SQLiteGenerations(path), ttl=300)
+
+
+async def test_bump_invalidates_the_entries_of_another_worker(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    first, second = _worker(path), _worker(path)
+    source = Source()
+    assert await _get(first, source) == {"version": 1}
+    assert await _get(second, source) == {"version": 2}
+    assert await _get(second, source) == {"version": 2}
+
+    first.bump("Opening")
+
+    assert await _get(second, source) == {"version": 3}
+    assert await _get(first, source) == {"version": 4}
+    assert await _get(first, source) == {"version": 4}
+
+
+async def test_bump_of_another_collection_keeps_the_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    first, second = _worker(path), _worker(path)
+    source = Source()
+    await _get(second, source)
+
+    first.bump("UserRegistration")
+
+    assert await _get(second, source) == {"version": 1}
+
+
+async def test_shared_entries_are_invalidated_for_every_worker(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    first = _worker(path, shared_entries=True)
+    second = _worker(path, shared_entries=True)
+    source = Source()
+    assert await _get(first, source) == {"version": 1}
+    # Computed once for the host
+    assert await _get(second, source) == {"version": 1}
+
+    second.bump("Opening")
+
+    assert await _get(first, source) == {"version": 2}
+    assert await _get(second, source) == {"version": 2}
+    assert source.calls == 2
+
+
+async def test_unshared_generations_only_invalidate_their_worker():
+    first = QueryCache(LRUCache(100), Generations(), ttl=300)
+    second = QueryCache(LRUCache(100), Generations(), ttl=300)
+    source = Source()
+    await _get(first, source)
+    await _get(second, source)
+
+    first.bump("Opening")
+
+    assert await _get(first, source) == {"version": 3}
+    # Left to its TTL
+    assert await _get(second, source) == {"version": 2}
+
+
+async def test_nothing_is_cached_without_the_generations_file(tmp_path):
+    cache = _worker(str(tmp_path / "missing" / "cache.sqlite"))
+    source = Source()
+
+    await _get(cache, source)
+    await _get(cache, source)
+
+    assert source.calls == 2
+
+
+@pytest.mark.parametrize(
+    "workers, path, ttl, backend",
+    [
+        (1, None, 300, "memory"),
+        (4, None, 5, "memory"),
+        (4, "cache.sqlite", 300, "sqlite"),
+    ],
+)
+def test_unshared_workers_keep_pages_briefly(
+    tmp_path, monkeypatch, workers, path, ttl, backend
+):
+    settings = query_cache_module.settings
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", workers)
+    monkeypatch.setattr(settings, "QUERY_CACHE_TTL_SECONDS", 300)
+    monkeypatch.setattr(settings, "QUERY_CACHE_UNSHARED_TTL_SECONDS", 5)
+    monkeypatch.setattr(
+        settings, "QUERY_CACHE_PATH", str(tmp_path / path) if path else None
+    )
+
+    cache = query_cache_module._make_cache()
+
+    assert cache.ttl == ttl
+    assert cache.generations.stats()["backend"] == backend
@@ -0,0 +1,216 @@
+"""
+The revoked token filter never clears a revoked token, picks up revocations
+recorded by other workers through the revocation log, and sends every token
+to the blocklist while it may be behind.
+"""
+import asyncio
+import secrets
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import AutoReconnect
+
+from app.core import revocation
+from app.core.revocation import (
+    LOG_COLLECTION,
+    BloomFilter,
+    RevokedTokenFilter,
+    token_digest,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+class TailCursor:
+    """A tailable, await-data cursor over the capped log."""
+
+    def __init__(self, log, after):
+        self.log = log
+        self.after = after
+        self.alive = True
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        for entry in self.log.entries:
+            if self.after is None or entry["_id"] > self.after:
+                self.after = entry["_id"]
+                return entry
+        # The server waits a little for new entries before an empty batch
+        await asyncio.sleep(0.01)
+        raise StopAsyncIteration
+
+    async def close(self):
+        self.alive = False
+        self.closed = True
+
+
+class RevocationLog:
+    """The capped `revocation_log` collection, which mongomock cannot create."""
+
+    def __init__(self):
+        self.entries = []
+        self.cursors = []
+        self.fail = False
+
+    async def insert_one(self, doc):
+        self.entries.append({"_id": ObjectId(), **doc})
+
+    async def find_one(self, query, projection, sort):
+        return self.entries[-1] if self.entries else None
+
+    def find(self, query, cursor_type):
+        if self.fail:
+            raise AutoReconnect("connection refused")
+        after = query["_id"]["$gt"] if query else None
+        cursor = TailCursor(self, after)
+        self.cursors.append(cursor)
+        return cursor
+
+
+class Database:
+    def __init__(self, mongo):
+        self.mongo = mongo
+        self.log = RevocationLog()
+
+    async def create_collection(self, name, **options):
+        pass
+
+    def __getitem__(self, name):
+        return self.log if name == LOG_COLLECTION else self.mongo[name]
+
+    def __getattr__(self, name):
+        return self[name]
+
+
+@pytest.fixture
+def database(mongo, monkeypatch):
+    database = Database(mongo)
+    monkeypatch.setattr(revocation, "db", database)
+    return database
+
+
+async def _revoke(database, worker, token):
+    # What blacklist_token does
+    await database.blocklist.insert_one({"token": token})
+    await worker.record(token)
+
+
+async def _until(condition, timeout=3):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(poll(), timeout)
+
+
+def _token():
+    return secrets.token_urlsafe(32)
+
+
+def test_bloom_filter_keeps_every_item():
+    bloom = BloomFilter(capacity=1_000, error_rate=0.01)
+    added = [token_digest(_token()) for _ in range(1_000)]
+    for digest in added:
+        bloom.add(digest)
+
+    assert all(digest in bloom for digest in added)
+    assert bloom.count == 1_000
+    false_positives = sum(token_digest(_token()) in bloom for _ in range(10_000))
+    # 1% expected at capacity
+    assert false_positives < 300
+
+
+def test_every_token_may_be_revoked_until_loaded():
+    assert RevokedTokenFilter().might_be_revoked(_token())
+
+
+async def test_load_reads_the_blocklist(database):
+    revoked = _token()
+    await database.blocklist.insert_one({"token": revoked})
+    await database.log.insert_one({"digest": token_digest(revoked).hex()})
+    worker = RevokedTokenFilter()
+
+    newest = await worker.load()
+
+    assert newest == database.log.entries[-1]["_id"]
+    assert worker.might_be_revoked(revoked)
+    assert not worker.might_be_revoked(_token())
+
+
+async def test_revocations_reach_the_other_workers(database):
+    first, second = RevokedTokenFilter(), RevokedTokenFilter()
+    follower = asyncio.ensure_future(second.follow())
+    try:
+        await _until(lambda: second._synced)
+        token = _token()
+        assert not second.might_be_revoked(token)
+
+        await _revoke(database, first, token)
+
+        assert first.might_be_revoked(token)
+        await _until(lambda: second.might_be_revoked(token))
+    finally:
+        follower.cancel()
+        await asyncio.gather(follower, return_exceptions=True)
+
+    assert all(cursor.closed for cursor in database.log.cursors)
+
+
+async def test_dead_cursor_is_closed_and_replaced(database):
+    worker = RevokedTokenFilter()
+    follower = asyncio.ensure_future(worker.follow())
+    try:
+        await _until(lambda: database.log.cursors)
+        dead = database.log.cursors[0]
+        dead.alive = False
+
+        await _until(lambda: len(database.log.cursors) == 2)
+        assert dead.closed
+        token = _token()
+        await _revoke(database, RevokedTokenFilter(), token)
+        await _until(lambda: worker.might_be_revoked(token))
+    finally:
+        follower.cancel()
+        await asyncio.gather(follower, return_exceptions=True)
+
+
+async def test_filter_is_rebuilt_past_its_capacity(database, monkeypatch):
+    monkeypatch.setattr(revocation.settings, "REVOCATION_FILTER_CAPACITY", 2)
+    worker = RevokedTokenFilter()
+    follower = asyncio.ensure_future(worker.follow())
+    try:
+        await _until(lambda: worker._synced)
+        token = _token()
+        await _revoke(database, RevokedTokenFilter(), token)
+        # Logged only: expired and dropped from the blocklist meanwhile
+        for _ in range(2):
+            await database.log.insert_one({"digest": token_digest(_token()).hex()})
+
+        await _until(lambda: len(database.log.cursors) == 2)
+        assert database.log.cursors[0].closed
+        await _until(lambda: worker._bloom.count == 1)
+        assert worker.might_be_revoked(token)
+    finally:
+        follower.cancel()
+        await asyncio.gather(follower, return_exceptions=True)
+
+
+async def test_every_token_is_checked_while_the_tail_is_broken(database):
+    worker = RevokedTokenFilter()
+    follower = asyncio.ensure_future(worker.follow())
+    try:
+        await _until(lambda: worker._synced)
+        token = _token()
+        assert not worker.might_be_revoked(token)
+
+        database.log.fail = True
+        database.log.cursors[0].alive = False
+
+        await _until(lambda: not worker._synced)
+        assert worker.might_be_revoked(token)
+    finally:
+        follower.cancel()
+        await asyncio.gather(follower, return_exceptions=True)
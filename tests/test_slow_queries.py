@@ -0,0 +1,192 @@
+"""
+The slow query log records commands at or above its threshold with their
+values redacted, and explains a read once its shape has been slow enough
+times.
+"""
+import asyncio
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+from app.db.slow_queries import SlowQueryLog, command_shape, redact
+
+pytestmark = pytest.mark.anyio
+
+request_ids = itertools.count()
+
+
+def _run(log, command_name, command, duration_ms, reply=None, failure=None):
+    request_id = next(request_ids)
+    log.started(
+        SimpleNamespace(
+            command_name=command_name, command=command, request_id=request_id
+        )
+    )
+    event = SimpleNamespace(
+        command_name=command_name,
+        request_id=request_id,
+        duration_micros=duration_ms * 1000,
+        reply=reply or {},
+        failure=failure,
+    )
+    if failure is None:
+        log.succeeded(event)
+    else:
+        log.failed(event)
+
+
+def _find(email):
+    return {
+        "find": "UserRegistration",
+        "filter": {"email": email, "age": {"$gte": 30}, "skills": ["go", "rust"]},
+        "sort": {"_id": 1},
+        "$db": "devs",
+        "lsid": {"id": "session"},
+    }
+
+
+def test_redact_keeps_keys_and_operators():
+    assert redact({"a": 1, "b": {"$in": [1, 2, 3]}, "c": []}) == {
+        "a": "?",
+        "b": {"$in": ["?"]},
+        "c": [],
+    }
+    assert command_shape("insert", {"insert": "waitlist", "documents": [{}]}) is None
+
+
+def test_records_only_commands_at_the_threshold():
+    log = SlowQueryLog(threshold_ms=50, size=10, explain_after=0)
+
+    _run(log, "find", _find("a@x.com"), 49.9)
+    _run(log, "find", _find("b@x.com"), 50)
+    _run(log, "find", _find("c@x.com"), 120)
+
+    snapshot = log.snapshot()
+    assert [entry["duration_ms"] for entry in snapshot["recent"]] == [120, 50]
+    assert snapshot["shapes"][0]["count"] == 2
+    assert snapshot["shapes"][0]["max_ms"] == 120
+
+
+def test_zero_threshold_disables_the_log():
+    log = SlowQueryLog(threshold_ms=0, size=10, explain_after=1)
+
+    _run(log, "find", _find("a@x.com"), 1_000)
+
+    assert log.snapshot()["recent"] == []
+
+
+def test_entries_hold_the_shape_but_no_values():
+    log = SlowQueryLog(threshold_ms=1, size=10, explain_after=0)
+
+    _run(
+        log,
+        "find",
+        _find("secret@x.com"),
+        5,
+        reply={"cursor": {"firstBatch": [{}, {}]}},
+    )
+    _run(
+        log,
+        "insert",
+        {"insert": "waitlist", "documents": [{"email": "secret@x.com"}] * 3},
+        5,
+    )
+    _run(log, "getMore", {"getMore": 7, "collection": "waitlist"}, 5)
+
+    getmore, insert, find = log.snapshot()["recent"]
+    assert find["shape"] == {
+        "filter": {"email": "?", "age": {"$gte": "?"}, "skills": ["?"]},
+        "sort": {"_id": 1},
+    }
+    assert find["docs_returned"] == 2
+    assert (insert["shape"], insert["documents"]) == (None, 3)
+    assert (getmore["collection"], getmore["shape"]) == ("waitlist", None)
+    assert "secret" not in repr(log.snapshot())
+
+
+def test_only_explainable_commands_are_kept_until_they_finish():
+    log = SlowQueryLog(threshold_ms=1, size=10, explain_after=1)
+    documents = [{"email": "secret@x.com"}]
+
+    log.started(
+        SimpleNamespace(
+            command_name="insert",
+            command={"insert": "waitlist", "documents": documents},
+            request_id="insert",
+        )
+    )
+    log.started(
+        SimpleNamespace(
+            command_name="find", command=_find("a@x.com"), request_id="find"
+        )
+    )
+
+    assert log._started["insert"][2] is None
+    assert log._started["find"][2] == _find("a@x.com")
+
+
+async def test_explains_a_shape_once_after_n_slow_runs():
+    explained = []
+
+    async def explain(command):
+        explained.append(command)
+        return {
+            "queryPlanner": {
+                "winningPlan": {
+                    "stage": "FETCH",
+                    "inputStage": {"stage": "IXSCAN", "indexName": "email_1"},
+                }
+            },
+            "executionStats": {
+                "nReturned": 2,
+                "totalDocsExamined": 10,
+                "totalKeysExamined": 10,
+                "executionTimeMillis": 3,
+            },
+        }
+
+    log = SlowQueryLog(threshold_ms=1, size=10, explain_after=3)
+    log.start(explain)
+    try:
+        for n in range(5):
+            _run(log, "find", _find(f"{n}@x.com"), 5)
+            # Writes share the threshold but are never explained
+            _run(log, "delete", {"delete": "waitlist", "deletes": [{"q": {}}]}, 5)
+            for _ in range(3):
+                await asyncio.sleep(0)
+    finally:
+        log.stop()
+
+    assert len(explained) == 1
+    assert explained[0]["verbosity"] == "executionStats"
+    # Explained as the third slow run was sent, without the driver's fields
+    assert explained[0]["explain"] == {
+        key: value
+        for key, value in _find("2@x.com").items()
+        if key not in ("$db", "lsid")
+    }
+    find = next(
+        shape for shape in log.snapshot()["shapes"] if shape["command"] == "find"
+    )
+    assert find["count"] == 5
+    assert find["explain"]["plan"] == ["FETCH", "IXSCAN email_1"]
+    assert find["explain"]["examined_per_returned"] == 5
+
+
+async def test_failed_explain_is_recorded():
+    async def explain(command):
+        raise RuntimeError("not authorized")
+
+    log = SlowQueryLog(threshold_ms=1, size=10, explain_after=1)
+    log.start(explain)
+    try:
+        _run(log, "find", _find("a@x.com"), 5, failure={"errmsg": "timeout"})
+        for _ in range(3):
+            await asyncio.sleep(0)
+    finally:
+        log.stop()
+
+    shape = log.snapshot()["shapes"][0]
+    assert log.snapshot()["recent"][0]["failed"]
+    assert "not authorized" in shape["explain"]["error"]
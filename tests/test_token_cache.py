@@ -0,0 +1,107 @@
+"""
+Verified access tokens are cached by digest until they expire, so a token
+presented again skips the signature check, and a revoked token is never
+served from the cache.
+"""
+import time
+from types import SimpleNamespace
+
+import pytest
+from jose import jwt
+
+from app.core import cache, revocation, security
+from app.core.cache import LRUCache
+from app.core.revocation import token_digest
+from app.core.security import (
+    blacklist_token,
+    create_access_token,
+    decode_access_token,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def decodes(monkeypatch):
+    """Counts the tokens whose signature is checked."""
+    calls = []
+    decode = jwt.decode
+
+    def counting(token, *args, **kwargs):
+        calls.append(token)
+        return decode(token, *args, **kwargs)
+
+    monkeypatch.setattr(security.jwt, "decode", counting)
+    monkeypatch.setattr(security, "verified_tokens", LRUCache(100))
+    return calls
+
+
+def test_claims_are_cached(decodes):
+    token = create_access_token({"sub": "ada"})
+
+    first = decode_access_token(token)
+    first["sub"] = "changed"
+    second = decode_access_token(token)
+
+    assert second["sub"] == "ada"
+    assert decodes == [token]
+    assert token_digest(token) in security.verified_tokens._entries
+
+
+async def test_revoked_token_is_evicted(decodes, mongo, monkeypatch):
+    monkeypatch.setattr(security, "db", mongo)
+    monkeypatch.setattr(revocation, "db", mongo)
+    token = create_access_token({"sub": "ada"})
+    other = create_access_token({"sub": "bob"})
+    decode_access_token(token)
+    decode_access_token(other)
+
+    await blacklist_token(token)
+
+    assert token_digest(token) not in security.verified_tokens._entries
+    assert token_digest(other) in security.verified_tokens._entries
+    assert await mongo.blocklist.find_one({"token": token}) is not None
+
+
+def test_entry_expires_with_the_token(decodes, monkeypatch):
+    token = create_access_token({"sub": "ada"})
+    decode_access_token(token)
+    exp = jwt.get_unverified_claims(token)["exp"]
+    assert security.verified_tokens._entries[token_digest(token)][1] == exp
+
+    monkeypatch.setattr(cache, "time", SimpleNamespace(time=lambda: exp - 1))
+    decode_access_token(token)
+    assert len(decodes) == 1
+
+    # From `exp` on, the token is verified again (and jose rejects it then)
+    monkeypatch.setattr(cache, "time", SimpleNamespace(time=lambda: exp))
+    decode_access_token(token)
+    assert len(decodes) == 2
+
+
+def test_expired_token_is_rejected(decodes):
+    token = jwt.encode(
+        {"sub": "ada", "exp": int(time.time()) - 1},
+        security.SECRET_KEY,
+        algorithm=security.ALGORITHM,
+    )
+
+    for _ in range(2):
+        with pytest.raises(jwt.ExpiredSignatureError):
+            decode_access_token(token)
+    assert len(security.verified_tokens) == 0
+
+
+def test_zero_size_disables_the_cache(decodes, monkeypatch):
+    monkeypatch.setattr(security.settings, "TOKEN_CACHE_SIZE", 0)
+    # As the module builds it at import
+    monkeypatch.setattr(
+        security, "verified_tokens", LRUCache(security.settings.TOKEN_CACHE_SIZE)
+    )
+    token = create_access_token({"sub": "ada"})
+
+    assert decode_access_token(token)["sub"] == "ada"
+    assert decode_access_token(token)["sub"] == "ada"
+
+    assert decodes == [token, token]
+    assert len(security.verified_tokens) == 0
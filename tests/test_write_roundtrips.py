@@ -0,0 +1,164 @@
+"""
+Every write route costs a single database command.
+
+Commands are counted with a pymongo CommandListener, which only sees a real
+server: the module is skipped unless MONGODB_TEST_URI (default
+mongodb://localhost:27017) answers. The test database is dropped afterwards.
+"""
+import os
+import threading
+import time
+
+import pytest
+from pymongo import MongoClient, monitoring
+from pymongo.errors import PyMongoError
+
+# Handshakes, index builds and the revocation log tail are not counted.
+COLLECTIONS = {"UserRegistration", "Opening", "waitlist", "contact", "blocklist"}
+
+PROFILE = {
+    "name": "Asha",
+    "skills": ["Python"],
+    "experience": "3 years",
+    "location": "Kochi",
+    "developer_role": "backend",
+}
+JOB = {
+    "skills_needed": ["Python"],
+    "qualification_required": "BTech",
+    "job_role": "Backend Developer",
+    "job_description": "APIs",
+    "no_of_openings": 2,
+}
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.commands = []
+
+    def reset(self):
+        with self._lock:
+            self.commands = []
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if event.command_name != "getMore" and target in COLLECTIONS:
+            with self._lock:
+                self.commands.append(f"{event.command_name} {target}")
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def _server_available(uri: str) -> bool:
+    try:
+        MongoClient(uri, serverSelectionTimeoutMS=500).admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+
+
+pytestmark = pytest.mark.skipif(
+    not _server_available(os.environ["MONGODB_URI"]),
+    reason="needs a MongoDB server at MONGODB_TEST_URI",
+)
+
+
+@pytest.fixture(scope="module")
+def counted():
+    """The app client, its auth headers and the command counter."""
+    counter = CommandCounter()
+    # Registered globally, so the app's client created on startup reports to it
+    monitoring.register(counter)
+
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    try:
+        with TestClient(app) as client:
+            user = {"username": "dev", "email": "dev@x.com", "password": "pw"}
+            client.post("/api/v1/user/register", data={**user, "role": "developer"})
+            token = client.post(
+                "/api/v1/user/token", data={"username": "dev", "password": "pw"}
+            ).json()["access_token"]
+            # Until the revocation filter has synced, every token is also
+            # checked against the blocklist.
+            from app.core.revocation import revoked_tokens
+
+            deadline = time.monotonic() + 5
+            while revoked_tokens.might_be_revoked(token):
+                assert time.monotonic() < deadline, "revocation filter never synced"
+                time.sleep(0.05)
+            yield client, {"Authorization": f"Bearer {token}"}, counter
+    finally:
+        MongoClient(os.environ["MONGODB_URI"]).drop_database(os.environ["MONGODB_NAME"])
+
+
+def _commands(counter, client, method, url, **kwargs):
+    counter.reset()
+    response = client.request(method, url, **kwargs)
+    assert response.status_code == 200, response.text
+    return list(counter.commands), response
+
+
+def test_register(counted):
+    client, _, counter = counted
+    user = {"username": "new", "email": "new@x.com", "password": "pw"}
+    commands, _ = _commands(
+        counter,
+        client,
+        "POST",
+        "/api/v1/user/register",
+        data={**user, "role": "company"},
+    )
+    assert commands == ["insert UserRegistration"]
+
+
+def test_create_developer(counted):
+    client, headers, counter = counted
+    commands, _ = _commands(
+        counter,
+        client,
+        "POST",
+        "/api/v1/developers/post",
+        json=PROFILE,
+        headers=headers,
+    )
+    assert commands == ["insert UserRegistration"]
+
+
+def test_create_company(counted):
+    client, headers, counter = counted
+    commands, _ = _commands(
+        counter,
+        client,
+        "POST",
+        "/api/v1/company/post",
+        json={"name": "Acme", "industry": "Software"},
+        headers=headers,
+    )
+    assert commands == ["insert UserRegistration"]
+
+
+def test_post_and_update_job(counted):
+    client, headers, counter = counted
+    commands, response = _commands(
+        counter, client, "POST", "/api/v1/job/post", json=JOB, headers=headers
+    )
+    assert commands == ["insert Opening"]
+
+    commands, _ = _commands(
+        counter,
+        client,
+        "PUT",
+        "/api/v1/job/update",
+        params={"job_id": response.json()["job"]["_id"]},
+        json={**JOB, "no_of_openings": 1},
+        headers=headers,
+    )
+    assert commands == ["findAndModify Opening"]